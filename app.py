@@ -1,16 +1,25 @@
 # app.py
 import streamlit as st
-import re
-import io
 import os
 import json
 import time
-from PyPDF2 import PdfReader
-import docx2txt
-from typing import List, Dict, Any
+import threading
+from typing import List, Dict, Any, Optional
 import google.generativeai as genai
-from fpdf import FPDF
-import base64
+from core import AI_SECTIONS, SAMPLE_JOBS, pack_skill_mask, unpack_skill_mask
+from taxonomy import TaxonomyStore
+from report import PDFReport
+from ingest import IngestPool, PDF_TYPE, DOCX_TYPE, TXT_TYPE, join_pages
+from doc_cache import DocumentCache, content_key
+from near_duplicates import NearDuplicateIndex
+from bulk_jobs import BulkJob, format_progress
+from llm_client import GeminiClient, LLMUnavailable
+from llm_fake import FakeModel
+from llm_cache import ResponseCache
+from skill_index import SkillIndex
+from job_profiles import JobProfileStore
+import metrics
+from metrics import REGISTRY, instrument
 
 # Configure the page
 st.set_page_config(
@@ -25,6 +34,9 @@ def init_gemini():
     """Initialize Gemini AI with API key"""
     try:
         api_key = os.getenv('GEMINI_API_KEY')
+        if os.getenv('GEMINI_FAKE'):
+            # Offline stand-in (llm_fake.FakeModel) for local development
+            return True
         if api_key:
             genai.configure(api_key=api_key)
             return True
@@ -38,101 +50,78 @@ def init_gemini():
 # Check if Gemini is available
 GEMINI_AVAILABLE = init_gemini()
 
+@st.cache_resource
+def get_llm_client():
+    """Gemini client shared by all sessions, so model objects, threads, rate limits and cached responses are shared"""
+    fake = bool(os.getenv('GEMINI_FAKE'))
+    cache = None
+    if not fake:
+        cache = ResponseCache(
+            os.getenv('GEMINI_CACHE_PATH', os.path.join('.cache', 'gemini_responses.sqlite3')),
+            ttl_seconds=float(os.getenv('GEMINI_CACHE_TTL', str(7 * 24 * 3600)))
+        )
+        REGISTRY.register_collector('llm_cache', cache.stats)
+    client = GeminiClient(
+        timeout=float(os.getenv('GEMINI_TIMEOUT', '60')),
+        cache=cache,
+        requests_per_minute=float(os.getenv('GEMINI_RPM', '60')),
+        max_retries=int(os.getenv('GEMINI_MAX_RETRIES', '3')),
+        model_factory=FakeModel.factory(latency=0.5) if fake else None
+    )
+    REGISTRY.register_collector('llm_client', client.stats)
+    return client
+
+@instrument('call_gemini')
 def call_gemini(prompt: str, model: str = "gemini-pro") -> str:
-    """Call Gemini AI API"""
+    """Call Gemini AI API; raises on failure so callers fall back to rule-based text"""
     if not GEMINI_AVAILABLE:
-        return "Gemini AI not available. Using enhanced rule-based analysis."
+        raise LLMUnavailable("Gemini AI not available")
     
     try:
-        model = genai.GenerativeModel(model)
-        response = model.generate_content(prompt)
-        return response.text
-    except Exception as e:
-        return f"AI service error: {str(e)}. Using rule-based analysis."
-
-# Sample job descriptions
-SAMPLE_JOBS = [
-    {
-        "title": "Senior Python Developer",
-        "description": """
-        We are looking for a Senior Python Developer with 5+ years of experience.
-        Required Skills:
-        - Python programming
-        - Django or Flask framework experience
-        - REST API development
-        - Database design with SQL
-        - Cloud platforms (AWS/Azure)
-        - Docker and containerization
-        - CI/CD pipelines
-        - Agile development methodology
-        
-        Preferred Qualifications:
-        - Machine learning experience
-        - Microservices architecture
-        - Kubernetes experience
-        - Test-driven development
-        """
-    },
-    {
-        "title": "Data Scientist",
-        "description": """
-        Data Scientist Position
-        Requirements:
-        - Python programming for data analysis
-        - SQL and database skills
-        - Machine learning algorithms
-        - Data visualization with Tableau or Power BI
-        - Statistical analysis
-        - Data cleaning and preprocessing
-        
-        Nice to Have:
-        - R programming language
-        - Big data tools (Spark, Hadoop)
-        - Deep learning experience
-        - Cloud computing experience
-        """
-    }
-    # Add more sample jobs as needed...
-]
+        return get_llm_client().generate(prompt, model=model)
+    except Exception:
+        REGISTRY.record_error('call_gemini')
+        raise
 
 # File processing functions
+@st.cache_resource
+def get_ingest_pool():
+    """Extraction pool shared by all sessions (survives script reruns)"""
+    return IngestPool(
+        workers=int(os.getenv('INGEST_WORKERS', '0')) or None,
+        timeout=float(os.getenv('INGEST_TIMEOUT', '30')),
+        max_pages=int(os.getenv('INGEST_MAX_PAGES', '50')),
+        max_text_bytes=int(os.getenv('INGEST_MAX_TEXT_KB', '1024')) * 1024
+    )
+
 def extract_text_from_pdf(uploaded_file):
     """Extract text from PDF file using PyPDF2"""
     try:
-        pdf_reader = PdfReader(uploaded_file)
-        text = ""
-        for page in pdf_reader.pages:
-            page_text = page.extract_text()
-            if page_text:
-                text += page_text + "\n"
-        return text
+        return get_ingest_pool().extract(uploaded_file.getvalue(), PDF_TYPE)
     except Exception as e:
+        REGISTRY.record_error('extract')
         st.error(f"Error reading PDF: {str(e)}")
         return ""
 
 def extract_text_from_docx(uploaded_file):
     """Extract text from DOCX file using docx2txt"""
     try:
-        file_content = uploaded_file.read()
-        text = docx2txt.process(io.BytesIO(file_content))
-        return text
+        return get_ingest_pool().extract(uploaded_file.getvalue(), DOCX_TYPE)
     except Exception as e:
+        REGISTRY.record_error('extract')
         st.error(f"Error reading DOCX: {str(e)}")
         return ""
 
 def extract_text_from_txt(uploaded_file):
     """Extract text from TXT file"""
     try:
-        file_content = uploaded_file.read()
-        if isinstance(file_content, bytes):
-            text = file_content.decode('utf-8')
-        else:
-            text = str(file_content)
-        return text
+        return get_ingest_pool().extract(uploaded_file.getvalue(), TXT_TYPE)
     except Exception as e:
+        REGISTRY.record_error('extract')
         st.error(f"Error reading TXT file: {str(e)}")
         return ""
 
+@instrument('process_uploaded_resume')
 def process_uploaded_resume(uploaded_file):
     """Process uploaded resume based on file type"""
     if uploaded_file is None:
@@ -140,327 +129,606 @@ def process_uploaded_resume(uploaded_file):
     
     file_type = uploaded_file.type
     
-    if file_type == "application/pdf":
+    if file_type == PDF_TYPE:
         return extract_text_from_pdf(uploaded_file)
-    elif file_type == "application/vnd.openxmlformats-officedocument.wordprocessingml.document":
+    elif file_type == DOCX_TYPE:
         return extract_text_from_docx(uploaded_file)
-    elif file_type == "text/plain":
+    elif file_type == TXT_TYPE:
         return extract_text_from_txt(uploaded_file)
     else:
+        REGISTRY.record_error('extract')
         st.error(f"Unsupported file type: {file_type}")
         return ""
 
-# Enhanced Resume Analyzer with Gen AI Capabilities
-class ResumeAnalyzer:
-    def __init__(self):
-        # Skills with weights (Gen AI: Intelligent prioritization)
-        self.skill_keywords = {
-            'core_technical': {
-                'weight': 1.5,
-                'skills': ['python', 'java', 'javascript', 'sql', 'machine learning', 'data analysis', 'c++', 'r']
-            },
-            'frameworks': {
-                'weight': 1.3,
-                'skills': ['django', 'flask', 'react', 'angular', 'vue', 'spring', 'tensorflow', 'pytorch', 'node.js', 'express']
-            },
-            'cloud_devops': {
-                'weight': 1.4,
-                'skills': ['aws', 'azure', 'gcp', 'docker', 'kubernetes', 'ci/cd', 'jenkins', 'terraform']
-            },
-            'databases': {
-                'weight': 1.2,
-                'skills': ['mysql', 'postgresql', 'mongodb', 'redis', 'oracle', 'sqlite', 'dynamodb']
-            },
-            'tools_methodologies': {
-                'weight': 1.1,
-                'skills': ['git', 'agile', 'scrum', 'jira', 'linux', 'rest api', 'microservices', 'devops']
-            },
-            'soft_skills': {
-                'weight': 0.9,
-                'skills': ['leadership', 'communication', 'teamwork', 'problem solving', 'project management', 'collaboration']
-            }
-        }
-        
-        # Experience level indicators (Gen AI: Pattern recognition)
-        self.experience_indicators = {
-            'senior': ['senior', 'lead', 'principal', 'architect', '5+ years', '7+ years', '10+ years', 'manager'],
-            'mid': ['mid-level', '3+ years', '4+ years', 'experienced', 'professional', 'specialist'],
-            'junior': ['junior', 'entry', 'graduate', '0-2 years', '1+ years', 'associate', 'intern']
+def process_uploaded_resumes(uploaded_files) -> List[str]:
+    """Process a batch of uploads in parallel; failed files come back as "" """
+    # Byte-identical uploads are extracted once
+    first_upload = {}
+    for uploaded_file in uploaded_files:
+        first_upload.setdefault(content_key(uploaded_file.getvalue()), uploaded_file)
+    extracted = dict(zip(first_upload, get_ingest_pool().extract_many(
+        [(f.getvalue(), f.type) for f in first_upload.values()]
+    )))
+    texts = []
+    for uploaded_file in uploaded_files:
+        text, error = extracted[content_key(uploaded_file.getvalue())]
+        if error:
+            REGISTRY.record_error('extract')
+            st.error(f"Error reading {uploaded_file.name}: {error}")
+        texts.append(text)
+    return texts
+
+# Initialize analyzer and PDF generator
+@st.cache_resource
+def get_taxonomy_store():
+    """Skill taxonomy from SKILL_TAXONOMY_PATH (built-in if unset), reloaded when the file changes"""
+    return TaxonomyStore(os.getenv('SKILL_TAXONOMY_PATH'), llm=call_gemini if GEMINI_AVAILABLE else None)
+
+analyzer = get_taxonomy_store().current()
+analyzer.prompt_token_budget = int(os.getenv('PROMPT_TOKEN_BUDGET', '1200'))
+if os.getenv('SEMANTIC_MATCH_THRESHOLD'):
+    # Built once per analyzer; a taxonomy reload brings a fresh analyzer
+    analyzer.enable_semantic(float(os.getenv('SEMANTIC_MATCH_THRESHOLD')))
+pdf_generator = PDFReport()
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def render_pdf_report(analysis: Dict, resume_file_name: str, job_title: str, cover_letter: str) -> bytes:
+    """PDF bytes for a report; identical inputs are served from the cache"""
+    return pdf_generator.generate_report(analysis, resume_file_name, job_title, cover_letter)
+
+@st.cache_resource
+def get_document_cache(fingerprint: str):
+    """Resume profile cache shared by all sessions (one per taxonomy); set RESUME_CACHE_DIR to persist it"""
+    cache_dir = os.getenv('RESUME_CACHE_DIR')
+    cache = DocumentCache(
+        max_memory_bytes=int(os.getenv('RESUME_CACHE_MB', '64')) * 1024 * 1024,
+        disk_path=os.path.join(cache_dir, 'resume_cache.sqlite3') if cache_dir else None,
+        namespace=fingerprint
+    )
+    REGISTRY.register_collector('document_cache', cache.stats)
+    return cache
+
+@st.cache_resource
+def get_near_duplicates():
+    """MinHash index of uploaded resume texts (NEAR_DUPLICATE_THRESHOLD), persisted under RESUME_CACHE_DIR"""
+    cache_dir = os.getenv('RESUME_CACHE_DIR')
+    index = NearDuplicateIndex(
+        threshold=float(os.getenv('NEAR_DUPLICATE_THRESHOLD', '0.9')),
+        path=os.path.join(cache_dir, 'near_duplicates.sqlite3') if cache_dir else None
+    )
+    REGISTRY.register_collector('near_duplicates', index.stats)
+    return index
+
+@st.cache_resource
+def get_analysis_cache(fingerprint: str, weights_fingerprint: str, settings: str):
+    """Gemini sections of finished analyses, keyed by resume and job, reused for near-duplicate resumes"""
+    cache_dir = os.getenv('RESUME_CACHE_DIR')
+    cache = DocumentCache(
+        max_memory_bytes=int(os.getenv('RESUME_CACHE_MB', '64')) * 1024 * 1024,
+        disk_path=os.path.join(cache_dir, 'analysis_cache.sqlite3') if cache_dir else None,
+        namespace=f"{fingerprint}:{weights_fingerprint}:{settings}"
+    )
+    REGISTRY.register_collector('analysis_cache', cache.stats)
+    return cache
+
+def analysis_cache() -> DocumentCache:
+    """Analysis cache for the current taxonomy, weights, semantic threshold and Gemini availability"""
+    settings = f"{os.getenv('SEMANTIC_MATCH_THRESHOLD', '')}:{'gemini' if GEMINI_AVAILABLE else 'rules'}"
+    return get_analysis_cache(analyzer.fingerprint, analyzer.weights_fingerprint, settings)
+
+def scores_stamp(analysis: Dict[str, Any]) -> str:
+    """Fingerprint of the scores and skills an AI text describes"""
+    scored = {name: analysis.get(name) for name in ('overall_capability', 'matching_skills', 'missing_skills')}
+    return content_key(json.dumps(scored, sort_keys=True).encode('utf-8'))
+
+def reusable_ai_sections(analysis: Dict[str, Any], shared_key: str, letter_key: str) -> Dict[str, str]:
+    """Stored Gemini sections that were written for exactly these scores and skills.
+
+    The explanation and recommendation are shared by near-duplicate resumes
+    (shared_key); a cover letter quotes its resume, so it is only reused for
+    the same resume text (letter_key).
+    """
+    stamp = scores_stamp(analysis)
+    sections = {}
+    for key, names in ((shared_key, ('explanation', 'recommendation')), (letter_key, ('cover_letter',))):
+        # One entry per set of scores, so a near-duplicate that scores differently does not replace the original's
+        entry = analysis_cache().get(f"{key}:{stamp}")
+        if entry is not None and entry.get('scores') == stamp:
+            sections.update({name: entry[name] for name in names if entry.get(name)})
+    return sections
+
+def store_ai_sections(saved: Dict[str, Any], shared_key: str, letter_key: str):
+    """Cache the sections Gemini wrote (never rule-based fallbacks) with the scores they describe"""
+    stamp = scores_stamp(saved['analysis'])
+    kept = set(saved.get('generated', [])) | set(saved.get('reused', []))
+    shared = {name: saved[name] for name in ('explanation', 'recommendation') if name in kept}
+    if set(shared) - set(saved.get('reused', [])):
+        analysis_cache().put(f"{shared_key}:{stamp}", {**shared, 'scores': stamp})
+    # Stopped or failed cover letters are not stored, so the next run tries again
+    if 'cover_letter' in saved.get('generated', []) and not saved['cover_letter_cancelled']:
+        analysis_cache().put(f"{letter_key}:{stamp}", {'cover_letter': saved['cover_letter'], 'scores': stamp})
+
+@st.cache_resource
+def get_skill_index(fingerprint: str):
+    """Searchable pool of analyzed resumes (RESUME_INDEX_PATH), reopened when the taxonomy changes"""
+    return SkillIndex(
+        analyzer,
+        os.getenv('RESUME_INDEX_PATH', os.path.join('.cache', 'resume_index.sqlite3'))
+    )
+
+@st.cache_resource
+def get_job_profiles(fingerprint: str, weights_fingerprint: str):
+    """Compiled job profiles; sample and saved jobs are compiled at startup (JOB_PROFILES_PATH)"""
+    store = JobProfileStore(
+        analyzer,
+        os.getenv('JOB_PROFILES_PATH', os.path.join('.cache', 'job_profiles.sqlite3'))
+    )
+    store.warm(SAMPLE_JOBS)
+    REGISTRY.register_collector('job_profiles', store.stats)
+    return store
+
+def available_jobs() -> List[Dict[str, str]]:
+    """Sample jobs followed by saved custom jobs"""
+    return SAMPLE_JOBS + get_job_profiles(analyzer.fingerprint, analyzer.weights_fingerprint).saved_jobs()
+
+def save_job_button(job_description: str, job_title: str):
+    """Sidebar button that saves a custom job for later sessions"""
+    if job_description and job_title and st.sidebar.button("💾 Save Job"):
+        get_job_profiles(analyzer.fingerprint, analyzer.weights_fingerprint).save(job_description, job_title)
+        st.sidebar.success(f"Saved \"{job_title}\"")
+
+@instrument('stream_pdf_resume')
+def stream_pdf_resume(uploaded_file):
+    """Extract a PDF page by page, matching skills and reporting progress while later pages are parsed.
+
+    Returns the text, skill mask and experience level; the page tokens are reused for the level.
+    """
+    status = st.empty()
+    stream = analyzer.matcher.stream()
+    pages = []
+    try:
+        for page_text in get_ingest_pool().iter_pages(uploaded_file.getvalue(), PDF_TYPE):
+            pages.append(page_text)
+            stream.feed(page_text)
+            status.caption(f"📄 {len(pages)} pages read, {len(stream.skill_ids)} skills found so far")
+    except Exception as e:
+        REGISTRY.record_error('extract')
+        st.error(f"Error reading PDF: {str(e)}")
+        return "", analyzer.skill_mask(()), "unknown"
+    finally:
+        status.empty()
+    return join_pages(pages), analyzer.skill_mask(stream.skill_ids), analyzer.detect_experience_level("", stream.tokens)
+
+def get_resume_profile(uploaded_file) -> Dict[str, Any]:
+    """Extracted text, skill mask and experience level for an upload, cached by content hash.
+    
+    'canonical' is the content key of the earliest near-duplicate upload (its own key if none).
+    """
+    cache = get_document_cache(analyzer.fingerprint)
+    key = content_key(uploaded_file.getvalue())
+    profile = cache.get(key)
+    # Entries written before skills were bit-packed are recomputed
+    if profile is None or 'skill_bits' not in profile:
+        if uploaded_file.type == PDF_TYPE:
+            text, skill_mask, experience_level = stream_pdf_resume(uploaded_file)
+        else:
+            text = process_uploaded_resume(uploaded_file)
+            skill_mask, experience_level = analyzer.text_profile(text)
+        match = get_near_duplicates().find_or_add(key, text) if text else None
+        profile = {
+            'text': text,
+            'skill_bits': pack_skill_mask(skill_mask).hex(),
+            'experience_level': experience_level,
+            'canonical': match[0] if match else key,
+            'similarity': round(match[1], 3) if match else 1.0
         }
+        # Failed extractions are not cached so a retry gets another chance
+        if text:
+            cache.put(key, profile)
+    profile.setdefault('canonical', key)
+    profile['skills'] = unpack_skill_mask(bytes.fromhex(profile['skill_bits']), len(analyzer.matcher.skills))
+    return profile
+
+# Batch screening mode
+def batch_screening():
+    """Rank many resumes against one or more job descriptions"""
+    st.sidebar.header("📤 Upload Resumes")
+    uploaded_files = st.sidebar.file_uploader(
+        "Choose resume files",
+        type=['pdf', 'docx', 'txt'],
+        accept_multiple_files=True,
+        help="Supported formats: PDF, DOCX, TXT"
+    )
     
-    def extract_skills(self, text: str) -> Dict[str, Any]:
-        """Extract and categorize skills"""
-        if not text:
-            return {}
-            
-        text_lower = text.lower()
-        found_skills = {}
-        
-        for category, data in self.skill_keywords.items():
-            skills = data['skills']
-            found = [skill for skill in skills if skill in text_lower]
-            if found:
-                found_skills[category] = {
-                    'skills': found,
-                    'weight': data['weight']
-                }
-        
-        return found_skills
+    st.sidebar.header("💼 Job Descriptions")
+    all_jobs = available_jobs()
+    selected_titles = st.sidebar.multiselect(
+        "Sample Jobs:", [j["title"] for j in all_jobs], default=[j["title"] for j in SAMPLE_JOBS]
+    )
+    jobs = [j for j in all_jobs if j["title"] in selected_titles]
+    custom_description = st.sidebar.text_area("Custom Job Description (optional):", height=150)
+    custom_title = st.sidebar.text_input("Custom Job Title:", placeholder="e.g., Senior Python Developer")
+    if custom_description and custom_title:
+        jobs.append({"title": custom_title, "description": custom_description})
+        save_job_button(custom_description, custom_title)
     
-    def detect_experience_level(self, text: str) -> str:
-        """Detect experience level from text"""
-        if not text:
-            return "unknown"
-            
-        text_lower = text.lower()
-        
-        for level, indicators in self.experience_indicators.items():
-            for indicator in indicators:
-                if indicator in text_lower:
-                    return level
-        return "unknown"
-    
-    def calculate_capability_score(self, resume_skills: Dict, job_skills: Dict, 
-                                 resume_exp: str, job_title: str) -> Dict[str, Any]:
-        """Calculate comprehensive scores"""
-        
-        # Calculate weighted skill match
-        total_possible_score = 0
-        actual_score = 0
-        
-        for category, job_data in job_skills.items():
-            job_skill_list = job_data['skills']
-            weight = job_data['weight']
-            
-            total_possible_score += len(job_skill_list) * weight
-            
-            resume_category_skills = resume_skills.get(category, {'skills': []})
-            resume_skill_list = resume_category_skills['skills']
-            
-            for skill in job_skill_list:
-                if skill in resume_skill_list:
-                    actual_score += weight
-        
-        skill_match_percentage = (actual_score / total_possible_score * 100) if total_possible_score > 0 else 0
-        
-        # Calculate experience compatibility
-        job_level = self.detect_job_level(job_title)
-        exp_compatibility = self.calculate_experience_compatibility(resume_exp, job_level)
-        
-        # Overall capability score
-        overall_capability = (skill_match_percentage * 0.7) + (exp_compatibility * 0.3)
-        
-        return {
-            'overall_capability': round(overall_capability, 1),
-            'skill_match': round(skill_match_percentage, 1),
-            'experience_compatibility': round(exp_compatibility, 1),
-            'skill_breakdown': {
-                'total_possible': total_possible_score,
-                'actual_achieved': actual_score
-            }
+    if not uploaded_files:
+        st.info("👋 Upload several resumes to rank them against the selected jobs.")
+        return
+    if not jobs:
+        st.warning("Select at least one job description.")
+        return
+    
+    st.subheader("📊 Batch Screening")
+    st.info(f"{len(uploaded_files)} resumes × {len(jobs)} jobs")
+    
+    if st.button("🧠 **Rank Candidates**", use_container_width=True, type="primary"):
+        with st.spinner("🔍 Processing resumes..."):
+            resumes = []
+            for uploaded_file, text in zip(uploaded_files, process_uploaded_resumes(uploaded_files)):
+                if text:
+                    # Resumes are keyed by content; the file name is only shown, so same-named uploads stay apart
+                    resumes.append({"key": content_key(uploaded_file.getvalue()), "name": uploaded_file.name, "text": text})
+                else:
+                    st.warning(f"Could not extract text from {uploaded_file.name}")
+        
+        # Identical files are scored once and share their rows; near-duplicates are scored on their own
+        # text (an edit can change their skills) and only flagged
+        batch_index = NearDuplicateIndex(threshold=get_near_duplicates().threshold)
+        unique = {}  # content key -> first resume with that content
+        copies = []  # (resume, content key of the identical upload that was scored)
+        near_duplicate_of = {}  # content key -> content key of an earlier, similar resume
+        for resume in resumes:
+            if resume["key"] in unique:
+                copies.append((resume, resume["key"]))
+                continue
+            unique[resume["key"]] = resume
+            match = batch_index.find_or_add(resume["key"], resume["text"])
+            if match:
+                near_duplicate_of[resume["key"]] = match[0]
+        
+        with st.spinner("🔄 Scoring candidates..."):
+            job_profiles = get_job_profiles(analyzer.fingerprint, analyzer.weights_fingerprint)
+            rows = analyzer.batch_analyze(
+                [{"name": key, "text": resume["text"]} for key, resume in unique.items()], jobs,
+                [job_profiles.get(j["description"], j["title"]) for j in jobs]
+            )
+        rows_by_resume = {}
+        for row in rows:
+            key = row['resume']
+            rows_by_resume.setdefault(key, []).append(row)
+            row['resume'] = unique[key]["name"]
+            if near_duplicate_of or copies:
+                row['duplicate_of'] = unique[near_duplicate_of[key]]["name"] if key in near_duplicate_of else ""
+        if copies:
+            for resume, key in copies:
+                rows.extend({**row, 'resume': resume["name"], 'duplicate_of': unique[key]["name"]} for row in rows_by_resume[key])
+            rows.sort(key=lambda row: row['overall_capability'], reverse=True)
+            st.info(f"♻️ {len(copies)} uploads were identical to an earlier file and reused its scores.")
+        if near_duplicate_of:
+            st.info(f"🔁 {len(near_duplicate_of)} resumes are near-duplicates of an earlier upload (see duplicate_of).")
+        
+        # Screened resumes join the searchable pool (identical files once)
+        skill_index = get_skill_index(analyzer.fingerprint)
+        for key, resume in unique.items():
+            skill_index.add(key, *analyzer.text_profile(resume["text"]), name=resume["name"])
+        
+        if rows:
+            st.dataframe(rows, use_container_width=True)
+
+# Resume pool search mode
+def pool_search():
+    """Find the best already-analyzed resumes for a job description"""
+    skill_index = get_skill_index(analyzer.fingerprint)
+    st.sidebar.header("💼 Job Description")
+    job_option = st.sidebar.radio("Choose Job Input:", ["Use Sample Job", "Paste Custom Description"])
+    if job_option == "Use Sample Job":
+        jobs = available_jobs()
+        job_title = st.sidebar.selectbox("Select Sample Job:", [j["title"] for j in jobs])
+        job_description = next(j["description"] for j in jobs if j["title"] == job_title)
+    else:
+        job_description = st.sidebar.text_area("Paste Job Description:", height=150)
+        job_title = st.sidebar.text_input("Job Title:", placeholder="e.g., Senior Python Developer")
+        save_job_button(job_description, job_title)
+    top_k = st.sidebar.number_input("Candidates to show:", min_value=1, max_value=500, value=20)
+    # Stored skill sets are rescored directly, so weights can be tuned without re-reading resumes
+    with st.sidebar.expander("⚖️ Category Weights"):
+        weights = {
+            category: st.number_input(category, min_value=0.0, max_value=5.0, value=float(weight), step=0.1)
+            for category, weight in analyzer.category_weights().items()
         }
     
-    def detect_job_level(self, job_title: str) -> str:
-        """Detect job level from title"""
-        if not job_title:
-            return "mid"
-            
-        job_lower = job_title.lower()
-        
-        if any(word in job_lower for word in ['senior', 'lead', 'principal', 'architect', 'staff', 'manager']):
-            return 'senior'
-        elif any(word in job_lower for word in ['junior', 'entry', 'associate', 'graduate', 'intern']):
-            return 'junior'
+    st.subheader("🔎 Search Resume Pool")
+    st.info(f"{len(skill_index)} resumes in the pool. Resumes are added by Batch Screening.")
+    
+    if job_description and st.button("🔎 **Find Candidates**", use_container_width=True, type="primary"):
+        rows = skill_index.search(
+            get_job_profiles(analyzer.fingerprint, analyzer.weights_fingerprint).get(job_description, job_title), int(top_k), analyzer.weight_vector(weights)
+        )
+        if rows:
+            st.dataframe(rows, use_container_width=True)
         else:
-            return 'mid'
-    
-    def calculate_experience_compatibility(self, resume_exp: str, job_level: str) -> float:
-        """Experience compatibility matrix"""
-        compatibility_matrix = {
-            'senior': {'senior': 100, 'mid': 70, 'junior': 40, 'unknown': 50},
-            'mid': {'senior': 60, 'mid': 100, 'junior': 80, 'unknown': 70},
-            'junior': {'senior': 30, 'mid': 60, 'junior': 100, 'unknown': 80},
-            'unknown': {'senior': 40, 'mid': 60, 'junior': 80, 'unknown': 50}
-        }
-        
-        return compatibility_matrix.get(job_level, {}).get(resume_exp, 50)
+            st.warning("No resumes in the pool share any skills with this job.")
+
+# Bulk analysis mode
+def bulk_input_path(path: str, root: str) -> Optional[str]:
+    """Resolve a user-entered path against root; None if it leads outside root (symlinks included)"""
+    root = os.path.realpath(root)
+    resolved = os.path.realpath(os.path.join(root, path))
+    return resolved if os.path.commonpath([root, resolved]) == root else None
+
+def bulk_analysis():
+    """Analyze a directory or zip of resumes under BULK_INPUT_ROOT as a resumable, checkpointed job"""
+    input_root = os.getenv('BULK_INPUT_ROOT')
+    if not input_root:
+        st.subheader("📦 Bulk Analysis")
+        st.info("Bulk Analysis reads archives from the server's disk. Set BULK_INPUT_ROOT to the directory "
+                "that holds them to turn it on.")
+        return
+    st.sidebar.header("📦 Resume Archive")
+    source = st.sidebar.text_input(f"Directory or .zip under {input_root}:", placeholder="resumes.zip")
+    st.sidebar.header("💼 Job Description")
+    jobs = available_jobs()
+    job_title = st.sidebar.selectbox("Select Job:", [j["title"] for j in jobs])
+    job = next(j for j in jobs if j["title"] == job_title)
+    top_k = st.sidebar.number_input("Candidates to show:", min_value=1, max_value=1000, value=100)
     
-    def analyze_resume_job_match(self, resume_text: str, job_description: str, job_title: str) -> Dict[str, Any]:
-        """Main analysis function"""
-        if not resume_text or not job_description:
-            return self.get_empty_analysis()
-            
-        resume_skills = self.extract_skills(resume_text)
-        job_skills = self.extract_skills(job_description)
-        resume_experience = self.detect_experience_level(resume_text)
-        
-        # Calculate capability scores
-        capability_scores = self.calculate_capability_score(resume_skills, job_skills, resume_experience, job_title)
-        
-        # Find matching and missing skills
-        matching_skills = {}
-        missing_skills = {}
-        
-        for category, job_data in job_skills.items():
-            job_skill_list = job_data['skills']
-            resume_category_skills = resume_skills.get(category, {'skills': []})
-            resume_skill_list = resume_category_skills['skills']
-            
-            matching = [skill for skill in job_skill_list if skill in resume_skill_list]
-            missing = [skill for skill in job_skill_list if skill not in resume_skill_list]
-            
-            if matching:
-                matching_skills[category] = matching
-            if missing:
-                missing_skills[category] = missing
-        
-        return {
-            **capability_scores,
-            "resume_experience_level": resume_experience,
-            "job_level": self.detect_job_level(job_title),
-            "matching_skills": matching_skills,
-            "missing_skills": missing_skills,
-            "resume_skills": resume_skills,
-            "job_skills": job_skills
-        }
+    st.subheader("📦 Bulk Analysis")
+    st.info("Finished resumes are checkpointed as they complete. If the run stops, "
+            "start it again to continue where it left off.")
+    if not source:
+        st.info("👋 Enter the path of a resume directory or zip archive.")
+        return
+    path = bulk_input_path(source, input_root)
+    if path is None:
+        st.error(f"Only paths under {input_root} can be analyzed.")
+        return
+    if not (os.path.isdir(path) or os.path.isfile(path)):
+        st.error(f"No such file or directory: {source}")
+        return
     
-    def get_empty_analysis(self):
-        """Return empty analysis structure"""
-        return {
-            'overall_capability': 0,
-            'skill_match': 0,
-            'experience_compatibility': 0,
-            'resume_experience_level': 'unknown',
-            'job_level': 'unknown',
-            'matching_skills': {},
-            'missing_skills': {},
-            'resume_skills': {},
-            'job_skills': {},
-            'skill_breakdown': {'total_possible': 0, 'actual_achieved': 0}
-        }
+    if st.button("▶️ **Start or Resume**", use_container_width=True, type="primary"):
+        bulk_job = BulkJob(
+            os.getenv('BULK_CHECKPOINT_PATH', os.path.join('.cache', 'bulk_jobs.sqlite3')), path, job,
+            taxonomy=os.getenv('SKILL_TAXONOMY_PATH'),
+            semantic=float(os.getenv('SEMANTIC_MATCH_THRESHOLD') or 0) or None,
+            workers=int(os.getenv('INGEST_WORKERS', '0')) or os.cpu_count() or 1,
+            timeout=float(os.getenv('INGEST_TIMEOUT', '30'))
+        )
+        progress_bar = st.progress(0.0, text="Listing resumes...")
+        
+        def show_progress(progress):
+            done = progress['completed'] / progress['total'] if progress['total'] else 1.0
+            progress_bar.progress(min(1.0, done), text=format_progress(progress))
+        
+        try:
+            state = bulk_job.run(progress=show_progress)
+            st.success(f"✅ {state['completed'] - state['failed']:,} resumes analyzed, {state['failed']:,} failed.")
+            if os.getenv('RESULTS_DIR'):
+                # Columnar copy for analytics: one part per run, rewritten on resume so rows are never duplicated
+                sink = bulk_job.export(os.environ['RESULTS_DIR'], analyzer.category_weights())
+                st.info(f"📊 {sink.rows_written:,} results written to {sink.path}")
+            rows = [
+                {name: value for name, value in result.items() if name not in ('matching_skills', 'missing_skills', 'semantic_matches')}
+                for result in bulk_job.top(int(top_k))
+            ]
+            if rows:
+                st.dataframe(rows, use_container_width=True)
+        finally:
+            bulk_job.close()
+
+# Analysis results rendering
+def render_analysis(analysis: Dict) -> Dict[str, Any]:
+    """Render scores and the skill breakdown; return placeholders for the AI sections"""
+    st.subheader("📊 AI Capability Assessment Results")
     
-    def generate_ai_explanation(self, analysis: Dict) -> str:
-        """Create natural language explanations using Gemini"""
-        if GEMINI_AVAILABLE:
-            prompt = f"""
-            As a career coach, provide a brief but insightful analysis of this job match:
-            
-            Overall Capability: {analysis['overall_capability']}%
-            Skill Match: {analysis['skill_match']}%
-            Experience Compatibility: {analysis['experience_compatibility']}%
-            Candidate Level: {analysis['resume_experience_level']}
-            Job Level: {analysis['job_level']}
-            
-            Provide a 2-3 sentence professional assessment focusing on strengths and fit.
-            """
-            return call_gemini(prompt)
+    # Scores
+    col3, col4, col5 = st.columns(3)
+    with col3:
+        st.metric("Overall Capability", f"{analysis['overall_capability']}%")
+    with col4:
+        st.metric("Skills Match", f"{analysis['skill_match']}%")
+    with col5:
+        st.metric("Experience Fit", f"{analysis['experience_compatibility']}%")
+    
+    # AI Explanation
+    explanation_slot = st.empty()
+    
+    # Skills analysis
+    col6, col7 = st.columns(2)
+    with col6:
+        st.subheader("✅ Matching Skills")
+        if analysis['matching_skills']:
+            for category, skills in analysis['matching_skills'].items():
+                with st.expander(f"{category.replace('_', ' ').title()} ({len(skills)} skills)"):
+                    for skill in skills:
+                        st.success(f"• {skill}")
         else:
-            # Fallback to rule-based explanation
-            score = analysis['overall_capability']
-            if score >= 85:
-                return "🧠 **AI Insight**: Excellent match! Strong technical alignment and ideal experience fit."
-            elif score >= 70:
-                return "📊 **AI Assessment**: Strong candidate with good technical alignment."
-            elif score >= 50:
-                return "💡 **AI Analysis**: Moderate fit with room for skill development."
-            else:
-                return "🎯 **AI Recommendation**: Foundational match - consider skill development."
+            st.warning("No matching skills detected")
     
-    def generate_cover_letter(self, resume_text: str, job_description: str, job_title: str, analysis: Dict) -> str:
-        """Generate cover letter using Gemini AI"""
-        if not GEMINI_AVAILABLE:
-            return "Gemini AI not available for cover letter generation."
-        
-        prompt = f"""
-        Generate a professional cover letter for this job application:
-        
-        JOB TITLE: {job_title}
-        JOB DESCRIPTION: {job_description[:1000]}
-        RESUME EXCERPT: {resume_text[:1500]}
-        MATCH ANALYSIS: Overall capability: {analysis['overall_capability']}%
-        
-        Requirements:
-        - Professional tone
-        - 250-400 words
-        - Highlight relevant skills and experience
-        - Address potential gaps positively
-        - Include opening and closing sections
-        - Focus on value proposition
-        
-        Generate only the cover letter content without any additional explanations.
-        """
-        
-        return call_gemini(prompt)
+    with col7:
+        st.subheader("📚 Skills to Develop")
+        if analysis['missing_skills']:
+            for category, skills in analysis['missing_skills'].items():
+                with st.expander(f"{category.replace('_', ' ').title()} ({len(skills)} to learn)"):
+                    for skill in skills:
+                        st.error(f"• {skill}")
+        else:
+            st.success("Great! No critical skills missing")
+        if analysis.get('semantic_matches'):
+            st.caption("Mentioned in other words (partial credit):")
+            for category, skills in analysis['semantic_matches'].items():
+                for skill, confidence in skills.items():
+                    st.info(f"• {skill} ({confidence:.0%} similar)")
     
-    def get_personalized_recommendation(self, analysis: Dict) -> str:
-        """Create tailored advice using Gemini"""
-        if GEMINI_AVAILABLE:
-            prompt = f"""
-            Based on this job match analysis, provide specific career advice:
-            
-            Capability Score: {analysis['overall_capability']}%
-            Skill Match: {analysis['skill_match']}%
-            Experience Fit: {analysis['experience_compatibility']}%
-            
-            Provide 2-3 specific, actionable recommendations for this candidate.
-            """
-            return call_gemini(prompt)
+    # Recommendations
+    st.subheader("🎯 AI Recommendations")
+    recommendation_slot = st.empty()
+    
+    # Cover Letter
+    return {
+        'explanation': explanation_slot,
+        'recommendation': recommendation_slot,
+        'cover_letter': st.empty(),
+        'stop': st.empty()
+    }
+
+def show_cover_letter(slot, cover_letter: str, streaming: bool = False, cancelled: bool = False):
+    """Render the cover letter section (a live preview while tokens are still arriving)"""
+    if not cover_letter or cover_letter == "Gemini AI not available for cover letter generation.":
+        slot.empty()
+        return
+    with slot.container():
+        st.subheader("✍️ AI-Generated Cover Letter")
+        if streaming:
+            st.markdown(cover_letter + "▌")
         else:
-            # Fallback recommendations
-            overall = analysis['overall_capability']
-            if overall >= 80:
-                return "**Next Steps**: You're a strong candidate! Focus on interview preparation."
-            elif overall >= 60:
-                return "**Next Steps**: You're competitive! Develop 1-2 key missing skills."
-            else:
-                return "**Next Steps**: Build foundation in missing technical areas."
+            st.text_area("Cover Letter Preview", cover_letter, height=300)
+            if cancelled:
+                st.caption("Cover letter generation was stopped early.")
+
+def fill_ai_sections(saved: Dict[str, Any], slots: Dict[str, Any]):
+    """Redraw the AI sections from saved results (rule-based text for anything that never arrived)"""
+    slots['explanation'].info(saved['explanation'] or analyzer.rule_based_explanation(saved['analysis']))
+    slots['recommendation'].write(saved['recommendation'] or analyzer.rule_based_recommendation(saved['analysis']))
+    show_cover_letter(slots['cover_letter'], saved['cover_letter'], cancelled=saved['cover_letter_cancelled'])
 
-# PDF Report Generator
-class PDFReport:
-    def __init__(self):
-        self.pdf = FPDF()
+def cancel_cover_letter():
+    """Stop button callback: stop the stream and keep the partial letter"""
+    saved = st.session_state.get('last_analysis')
+    if saved:
+        saved['cover_letter_cancelled'] = True
+    cancel = st.session_state.get('cover_letter_cancel')
+    if cancel is not None:
+        cancel.set()
+
+def generate_ai_sections(saved: Dict[str, Any], slots: Dict[str, Any], resume_text: str,
+                         job_description: str, job_title: str, stream_cover_letter: bool,
+                         reused: Optional[Dict[str, str]] = None):
+    """Ask Gemini for the AI sections in one combined JSON request, filling each section as it arrives.
     
-    def generate_report(self, analysis: Dict, resume_file_name: str, job_title: str, cover_letter: str = "") -> str:
-        """Generate PDF report"""
-        self.pdf.add_page()
-        
-        # Title
-        self.pdf.set_font('Arial', 'B', 16)
-        self.pdf.cell(0, 10, 'AI Resume Analysis Report', 0, 1, 'C')
-        self.pdf.ln(10)
-        
-        # Basic info
-        self.pdf.set_font('Arial', '', 12)
-        self.pdf.cell(0, 10, f'Resume: {resume_file_name}', 0, 1)
-        self.pdf.cell(0, 10, f'Target Position: {job_title}', 0, 1)
-        self.pdf.cell(0, 10, f'Generated on: {time.strftime("%Y-%m-%d %H:%M:%S")}', 0, 1)
-        self.pdf.ln(10)
-        
-        # Scores
-        self.pdf.set_font('Arial', 'B', 14)
-        self.pdf.cell(0, 10, 'Assessment Scores', 0, 1)
-        self.pdf.set_font('Arial', '', 12)
-        self.pdf.cell(0, 10, f'Overall Capability: {analysis["overall_capability"]}%', 0, 1)
-        self.pdf.cell(0, 10, f'Skill Match: {analysis["skill_match"]}%', 0, 1)
-        self.pdf.cell(0, 10, f'Experience Compatibility: {analysis["experience_compatibility"]}%', 0, 1)
-        self.pdf.ln(10)
-        
-        # Cover letter
-        if cover_letter and cover_letter != "Gemini AI not available for cover letter generation.":
-            self.pdf.add_page()
-            self.pdf.set_font('Arial', 'B', 14)
-            self.pdf.cell(0, 10, 'AI-Generated Cover Letter', 0, 1)
-            self.pdf.set_font('Arial', '', 11)
-            self.pdf.multi_cell(0, 8, cover_letter)
-        
-        # Save PDF
-        filename = f"resume_analysis_{int(time.time())}.pdf"
-        self.pdf.output(filename)
-        return filename
+    A streamed cover letter is its own request, since it is shown word by word.
+    Sections in reused are shown as they are and not requested. The names
+    of the sections Gemini actually wrote (not fallbacks) go to saved['generated'].
+    """
+    analysis = saved['analysis']
+    client = get_llm_client()
+    reused = reused or {}
+    saved.update(reused)
+    saved['reused'] = list(reused)
+    saved['generated'] = []
+    if 'explanation' in reused:
+        slots['explanation'].info(reused['explanation'])
+    else:
+        slots['explanation'].info("⏳ Generating AI insight...")
+    if 'recommendation' in reused:
+        slots['recommendation'].write(reused['recommendation'])
+    else:
+        slots['recommendation'].write("⏳ Generating recommendations...")
+    if 'cover_letter' in reused:
+        show_cover_letter(slots['cover_letter'], reused['cover_letter'])
+    else:
+        slots['cover_letter'].info("📝 Generating cover letter...")
+    
+    stream_letter = stream_cover_letter and 'cover_letter' not in reused
+    fields = tuple(name for name in AI_SECTIONS if name not in reused and not (name == 'cover_letter' and stream_letter))
+    futures = {}
+    if fields:
+        # Cover letter prompts quote the resume, so they never reach the on-disk response cache
+        futures['sections'] = client.submit(analyzer.combined_prompt(
+            analysis, fields, resume_text, job_description, job_title
+        ), store='cover_letter' not in fields)
+    
+    fallbacks = {
+        'explanation': analyzer.rule_based_explanation,
+        'recommendation': analyzer.rule_based_recommendation
+    }
+    
+    def fill(name, text, error):
+        if error:
+            REGISTRY.record_error('call_gemini')
+        else:
+            saved['generated'].append(name)
+        if name == 'cover_letter':
+            saved[name] = "" if error else text
+            if error:
+                slots['cover_letter'].warning(f"Cover letter unavailable ({error}).")
+            else:
+                show_cover_letter(slots['cover_letter'], text)
+            return
+        # Failed sections get the rule-based text, never an error string
+        saved[name] = fallbacks[name](analysis) if error else text
+        if name == 'explanation':
+            slots['explanation'].info(saved[name])
+        else:
+            slots['recommendation'].write(saved[name])
+    
+    def fill_sections(text, error):
+        sections = {}
+        if not error:
+            try:
+                sections = analyzer.parse_ai_sections(text, fields)
+            except ValueError as e:
+                error = e
+        for name in fields:
+            fill(name, sections.get(name, ""), None if name in sections else error or "missing from the response")
+    
+    if stream_letter:
+        cancel = threading.Event()
+        st.session_state['cover_letter_cancel'] = cancel
+        slots['stop'].button("⏹ Stop cover letter", on_click=cancel_cover_letter)
+        stream_error = None
+        try:
+            for chunk in client.stream(
+                analyzer.cover_letter_prompt(resume_text, job_description, job_title, analysis), cancel=cancel,
+                store=False
+            ):
+                saved['cover_letter'] += chunk
+                show_cover_letter(slots['cover_letter'], saved['cover_letter'], streaming=True)
+                # Fill in the other sections as soon as they land, mid-stream
+                if futures and futures['sections'].done():
+                    future = futures.pop('sections')
+                    error = future.exception()
+                    fill_sections("" if error else future.result(), error)
+        except Exception as e:
+            REGISTRY.record_error('call_gemini')
+            stream_error = e
+        slots['stop'].empty()
+        # A partial letter is kept; a letter that never started stays out of the report
+        if stream_error is not None and not saved['cover_letter']:
+            slots['cover_letter'].warning(f"Cover letter unavailable ({stream_error}).")
+        else:
+            show_cover_letter(slots['cover_letter'], saved['cover_letter'], cancelled=cancel.is_set())
+        if stream_error is None and not cancel.is_set() and saved['cover_letter']:
+            saved['generated'].append('cover_letter')
+    
+    for _, text, error in client.iter_completed(futures):
+        fill_sections(text, error)
 
-# Initialize analyzer and PDF generator
-analyzer = ResumeAnalyzer()
-pdf_generator = PDFReport()
+# Instrumentation
+@st.cache_resource
+def start_metrics_exporter():
+    """Serve Prometheus metrics on METRICS_PORT (once per server process)"""
+    port = os.getenv('METRICS_PORT')
+    return metrics.serve(int(port)) if port else None
+
+def export_metrics():
+    """Write METRICS_FILE and show the optional debug panel"""
+    metrics_file = os.getenv('METRICS_FILE')
+    if metrics_file:
+        try:
+            REGISTRY.write(metrics_file)
+        except OSError as e:
+            st.sidebar.error(f"Could not write metrics: {str(e)}")
+    
+    if st.sidebar.checkbox("🔧 Show debug metrics", value=False):
+        with st.sidebar.expander("Stage timings", expanded=True):
+            summary = REGISTRY.stage_summary()
+            if summary:
+                st.dataframe([{'stage': stage, **values} for stage, values in sorted(summary.items())])
+            else:
+                st.caption("No stages recorded yet.")
+            st.code(REGISTRY.render(), language="text")
 
 # Main Streamlit App
 def main():
@@ -473,9 +741,22 @@ def main():
         st.sidebar.success("✅ Gemini AI Connected")
     else:
         st.sidebar.warning("🔑 Add GEMINI_API_KEY to enable AI features")
+    if get_taxonomy_store().last_error:
+        st.sidebar.error(f"Skill taxonomy not reloaded: {get_taxonomy_store().last_error}")
     
     st.markdown("---")
     
+    mode = st.sidebar.radio("Analysis Mode:", ["Single Resume", "Batch Screening", "Search Resume Pool", "Bulk Analysis"])
+    if mode == "Batch Screening":
+        batch_screening()
+        return
+    if mode == "Search Resume Pool":
+        pool_search()
+        return
+    if mode == "Bulk Analysis":
+        bulk_analysis()
+        return
+    
     # Sidebar for input
     st.sidebar.header("📤 Upload Your Resume")
     
@@ -487,11 +768,13 @@ def main():
     )
     
     resume_text = ""
+    resume_profile = {}
     
     if uploaded_file is not None:
         # Process the uploaded file
         with st.spinner("🔍 Processing your resume..."):
-            resume_text = process_uploaded_resume(uploaded_file)
+            resume_profile = get_resume_profile(uploaded_file)
+            resume_text = resume_profile['text']
         
         if resume_text:
             st.sidebar.success("✅ Resume processed successfully!")
@@ -505,12 +788,16 @@ def main():
     selected_job = ""
     
     if job_option == "Use Sample Job":
-        selected_job = st.sidebar.selectbox("Select Sample Job:", [j["title"] for j in SAMPLE_JOBS])
-        job_description = next(j["description"] for j in SAMPLE_JOBS if j["title"] == selected_job)
+        jobs = available_jobs()
+        selected_job = st.sidebar.selectbox("Select Sample Job:", [j["title"] for j in jobs])
+        job_description = next(j["description"] for j in jobs if j["title"] == selected_job)
         job_title = selected_job
     else:
         job_description = st.sidebar.text_area("Paste Job Description:", height=150)
         job_title = st.sidebar.text_input("Job Title:", placeholder="e.g., Senior Python Developer")
+        save_job_button(job_description, job_title)
+    
+    stream_cover_letter = GEMINI_AVAILABLE and st.sidebar.checkbox("Stream cover letter", value=True)
     
     # Main content area
     if uploaded_file is None:
@@ -553,88 +840,79 @@ def main():
         
         # Analyze button
         st.markdown("---")
+        job_title_for_analysis = selected_job if job_option == "Use Sample Job" else job_title
+        analysis_key = content_key("\x00".join([resume_text, job_description, job_title_for_analysis]).encode('utf-8'))
+        # Near-duplicate resumes share one stored explanation and recommendation per job
+        result_key = content_key(
+            "\x00".join([resume_profile['canonical'], job_description, job_title_for_analysis]).encode('utf-8')
+        )
+        saved = st.session_state.get('last_analysis')
+        
         if st.button("🧠 **Generate AI Capability Analysis**", use_container_width=True, type="primary"):
             with st.spinner("🔄 AI is analyzing your capabilities..."):
-                # Perform comprehensive analysis
-                job_title_for_analysis = selected_job if job_option == "Use Sample Job" else job_title
-                analysis = analyzer.analyze_resume_job_match(resume_text, job_description, job_title_for_analysis)
-                ai_explanation = analyzer.generate_ai_explanation(analysis)
-                recommendation = analyzer.get_personalized_recommendation(analysis)
-                
-                # Generate cover letter
-                cover_letter = ""
-                if GEMINI_AVAILABLE:
-                    with st.spinner("📝 Generating cover letter..."):
-                        cover_letter = analyzer.generate_cover_letter(resume_text, job_description, job_title_for_analysis, analysis)
-                
-                # Display results
-                st.subheader("📊 AI Capability Assessment Results")
-                
-                # Scores
-                col3, col4, col5 = st.columns(3)
-                with col3:
-                    st.metric("Overall Capability", f"{analysis['overall_capability']}%")
-                with col4:
-                    st.metric("Skills Match", f"{analysis['skill_match']}%")
-                with col5:
-                    st.metric("Experience Fit", f"{analysis['experience_compatibility']}%")
-                
-                # AI Explanation
-                st.info(ai_explanation)
-                
-                # Skills analysis
-                col6, col7 = st.columns(2)
-                with col6:
-                    st.subheader("✅ Matching Skills")
-                    if analysis['matching_skills']:
-                        for category, skills in analysis['matching_skills'].items():
-                            with st.expander(f"{category.replace('_', ' ').title()} ({len(skills)} skills)"):
-                                for skill in skills:
-                                    st.success(f"• {skill}")
-                    else:
-                        st.warning("No matching skills detected")
-                
-                with col7:
-                    st.subheader("📚 Skills to Develop")
-                    if analysis['missing_skills']:
-                        for category, skills in analysis['missing_skills'].items():
-                            with st.expander(f"{category.replace('_', ' ').title()} ({len(skills)} to learn)"):
-                                for skill in skills:
-                                    st.error(f"• {skill}")
-                    else:
-                        st.success("Great! No critical skills missing")
-                
-                # Recommendations
-                st.subheader("🎯 AI Recommendations")
-                st.write(recommendation)
-                
-                # Cover Letter
-                if cover_letter and cover_letter != "Gemini AI not available for cover letter generation.":
-                    st.subheader("✍️ AI-Generated Cover Letter")
-                    st.text_area("Cover Letter Preview", cover_letter, height=300)
+                # The rule-based analysis is cheap, so it always comes from this resume's own text
+                analysis = analyzer.analyze_resume_job_match(
+                    resume_text, job_description, job_title_for_analysis,
+                    resume_skills=resume_profile['skills'],
+                    resume_experience=resume_profile['experience_level'],
+                    job_profile=get_job_profiles(analyzer.fingerprint, analyzer.weights_fingerprint).get(job_description, job_title_for_analysis)
+                )
+            
+                # Results live in session state so later reruns (Stop, PDF export) can redraw them
+                saved = {
+                    'key': analysis_key,
+                    'analysis': analysis,
+                    'explanation': '',
+                    'recommendation': '',
+                    'cover_letter': '',
+                    'cover_letter_cancelled': False
+                }
+                st.session_state['last_analysis'] = saved
+                slots = render_analysis(analysis)
                 
-                # PDF Report Download
-                st.subheader("📄 Download Report")
-                if st.button("📥 Generate PDF Report", type="secondary"):
-                    with st.spinner("Generating PDF report..."):
-                        pdf_filename = pdf_generator.generate_report(
-                            analysis, uploaded_file.name, job_title_for_analysis, cover_letter
-                        )
-                        
-                        with open(pdf_filename, "rb") as pdf_file:
-                            pdf_data = pdf_file.read()
-                        
-                        st.download_button(
-                            label="📥 Download PDF Report",
-                            data=pdf_data,
-                            file_name=pdf_filename,
-                            mime="application/pdf",
-                            use_container_width=True
-                        )
+                if not GEMINI_AVAILABLE:
+                    saved['explanation'] = analyzer.generate_ai_explanation(analysis)
+                    saved['recommendation'] = analyzer.get_personalized_recommendation(analysis)
+                    fill_ai_sections(saved, slots)
+                else:
+                    # Same job and the same scores, for this resume or a near-duplicate of it: fewer Gemini calls
+                    reused = reusable_ai_sections(analysis, result_key, analysis_key)
+                    if reused and resume_profile.get('similarity', 1.0) < 1.0:
+                        st.info(f"♻️ This resume is {resume_profile['similarity']:.0%} similar to an earlier upload "
+                                "and scores the same; showing the AI explanation and recommendation written for it.")
+                    generate_ai_sections(saved, slots, resume_text, job_description, job_title_for_analysis,
+                                         stream_cover_letter, reused)
+                    store_ai_sections(saved, result_key, analysis_key)
+        elif saved and saved['key'] == analysis_key:
+            fill_ai_sections(saved, render_analysis(saved['analysis']))
+        else:
+            saved = None
+        
+        if saved:
+            analysis = saved['analysis']
+            cover_letter = saved['cover_letter']
+            
+            # PDF Report Download
+            st.subheader("📄 Download Report")
+            if st.button("📥 Generate PDF Report", type="secondary"):
+                with st.spinner("Generating PDF report..."):
+                    pdf_data = render_pdf_report(
+                        analysis, uploaded_file.name, job_title_for_analysis, cover_letter
+                    )
+                    
+                    st.download_button(
+                        label="📥 Download PDF Report",
+                        data=pdf_data,
+                        file_name=f"resume_analysis_{int(time.time())}.pdf",
+                        mime="application/pdf",
+                        use_container_width=True
+                    )
     
     elif uploaded_file and not resume_text:
         st.error("❌ Could not extract text from the uploaded file.")
         st.info("Try uploading a DOCX or text-based PDF for best results.")
 
 if __name__ == "__main__":
+    start_metrics_exporter()
     main()
+    export_metrics()
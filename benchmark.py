@@ -0,0 +1,235 @@
+# benchmark.py
+"""Benchmarks for the resume analysis hot path.
+
+Generates a synthetic corpus of resumes and job descriptions (varying length
+and skill density), times each pipeline stage at several corpus sizes and
+prints machine-readable JSON. Results can be saved as a baseline and later
+runs compared against it with a regression threshold:
+
+    python benchmark.py --save baseline.json
+    python benchmark.py --baseline baseline.json --threshold 0.2
+"""
+import argparse
+import io
+import json
+import platform
+import random
+import sys
+import time
+import zipfile
+import warnings
+from typing import Any, Callable, Dict, List
+from xml.sax.saxutils import escape
+
+FILLER_WORDS = (
+    "delivered designed built improved owned shipped managed team product customers platform "
+    "service pipeline features reliability performance quality stakeholders roadmap reporting "
+    "analysis users growth migration internal tooling requirements process release support"
+).split()
+
+EXPERIENCE_PHRASES = [
+    "senior engineer", "lead developer", "7+ years of experience", "3+ years of experience",
+    "experienced professional", "junior developer", "graduate", "entry level", "associate", "intern"
+]
+
+JOB_TITLES = ["Senior Python Developer", "Data Scientist", "Junior Web Developer", "Cloud Engineer", "Lead Architect"]
+
+# Synthetic corpus
+def all_skills(analyzer) -> List[str]:
+    return [skill for data in analyzer.skill_keywords.values() for skill in data['skills']]
+
+def generate_document(rng: random.Random, skills: List[str], words: int, skill_density: float) -> str:
+    """Filler text with roughly skill_density of the words replaced by taxonomy skills"""
+    tokens = []
+    for _ in range(words):
+        if rng.random() < skill_density:
+            tokens.append(rng.choice(skills))
+        else:
+            tokens.append(rng.choice(FILLER_WORDS))
+    lines = [" ".join(tokens[i:i + 12]) for i in range(0, len(tokens), 12)]
+    return "\n".join(lines)
+
+def generate_corpus(analyzer, count: int, seed: int = 42) -> Dict[str, List]:
+    """count resumes and count job descriptions of varying length and skill density"""
+    rng = random.Random(seed)
+    skills = all_skills(analyzer)
+    resumes = []
+    jobs = []
+    for index in range(count):
+        resume = generate_document(rng, skills, rng.choice([150, 400, 900, 2000]), rng.choice([0.02, 0.05, 0.12]))
+        resumes.append(rng.choice(EXPERIENCE_PHRASES) + "\n" + resume)
+        title = JOB_TITLES[index % len(JOB_TITLES)]
+        jobs.append({
+            "title": title,
+            "description": generate_document(rng, skills, rng.choice([80, 200, 400]), rng.choice([0.05, 0.1, 0.2]))
+        })
+    return {"resumes": resumes, "jobs": jobs}
+
+def text_to_pdf(text: str) -> bytes:
+    from fpdf import FPDF
+    pdf = FPDF()
+    pdf.add_page()
+    pdf.set_font('Helvetica', '', 11)
+    pdf.multi_cell(0, 6, text)
+    return bytes(pdf.output())
+
+def text_to_docx(text: str) -> bytes:
+    """Minimal DOCX container (enough for docx2txt)"""
+    paragraphs = "".join(
+        f'<w:p><w:r><w:t xml:space="preserve">{escape(line)}</w:t></w:r></w:p>' for line in text.splitlines()
+    )
+    document = (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main">'
+        f'<w:body>{paragraphs}</w:body></w:document>'
+    )
+    content_types = (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/word/document.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>'
+        '</Types>'
+    )
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr("[Content_Types].xml", content_types)
+        archive.writestr("word/document.xml", document)
+    return buffer.getvalue()
+
+# Timing
+def time_stage(fn: Callable[[int], Any], count: int, repeat: int) -> Dict[str, float]:
+    """Best-of-repeat wall time for calling fn(i) for every i in range(count)"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for index in range(count):
+            fn(index)
+        best = min(best, time.perf_counter() - start)
+    return {
+        "docs": count,
+        "seconds": round(best, 6),
+        "per_doc_ms": round(best / count * 1000, 6) if count else 0.0,
+        "docs_per_sec": round(count / best, 2) if best > 0 else 0.0
+    }
+
+def run_benchmarks(scales: List[int], extract_limit: int, repeat: int, seed: int) -> Dict[str, Any]:
+    from core import ResumeAnalyzer
+    from ingest import IngestPool, PDF_TYPE, DOCX_TYPE, TXT_TYPE
+
+    # IngestPool.extract is what the app's uploads go through (app.py itself
+    # needs a Streamlit session); the pool is warmed up before anything is measured
+    pool = IngestPool()
+    pool.extract(text_to_pdf("warm up"), PDF_TYPE)
+
+    analyzer = ResumeAnalyzer()
+    results = {}
+    for scale in scales:
+        corpus = generate_corpus(analyzer, scale, seed)
+        resumes, jobs = corpus["resumes"], corpus["jobs"]
+        rounds = repeat if scale < 1000 else 1
+
+        # Extraction builds real files, so it is capped to keep runs practical
+        extract_count = min(scale, extract_limit)
+        for label, file_type, encode in [
+            ("ingest_extract_txt", TXT_TYPE, lambda text: text.encode("utf-8")),
+            ("ingest_extract_docx", DOCX_TYPE, text_to_docx),
+            ("ingest_extract_pdf", PDF_TYPE, text_to_pdf),
+        ]:
+            files = [encode(text) for text in resumes[:extract_count]]
+            results[f"{label}@{scale}"] = time_stage(
+                lambda i: pool.extract(files[i], file_type),
+                extract_count, rounds
+            )
+
+        results[f"extract_skills@{scale}"] = time_stage(lambda i: analyzer.extract_skills(resumes[i]), scale, rounds)
+        results[f"detect_experience_level@{scale}"] = time_stage(
+            lambda i: analyzer.detect_experience_level(resumes[i]), scale, rounds
+        )
+
+        resume_skills = [analyzer.extract_skills(text) for text in resumes]
+        job_skills = [analyzer.extract_skills(job["description"]) for job in jobs]
+        levels = [analyzer.detect_experience_level(text) for text in resumes]
+        results[f"calculate_capability_score@{scale}"] = time_stage(
+            lambda i: analyzer.calculate_capability_score(resume_skills[i], job_skills[i], levels[i], jobs[i]["title"]),
+            scale, rounds
+        )
+        results[f"analyze_resume_job_match@{scale}"] = time_stage(
+            lambda i: analyzer.analyze_resume_job_match(resumes[i], jobs[i]["description"], jobs[i]["title"]),
+            scale, rounds
+        )
+
+        # One N x M call, reported per resume
+        batch_jobs = jobs[:len(JOB_TITLES)]
+        batch_resumes = [{"name": str(i), "text": text} for i, text in enumerate(resumes)]
+        timing = time_stage(lambda _: analyzer.batch_analyze(batch_resumes, batch_jobs), 1, rounds)
+        timing.update({
+            "docs": scale,
+            "per_doc_ms": round(timing["seconds"] / scale * 1000, 6),
+            "docs_per_sec": round(scale / timing["seconds"], 2) if timing["seconds"] > 0 else 0.0
+        })
+        results[f"batch_analyze@{scale}"] = timing
+
+    pool.close()
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "scales": scales,
+            "extract_limit": extract_limit,
+            "repeat": repeat,
+            "seed": seed
+        },
+        "results": results
+    }
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[Dict[str, Any]]:
+    """Per-benchmark ratio of per-document time against the baseline"""
+    comparison = []
+    for name, result in current["results"].items():
+        previous = baseline.get("results", {}).get(name)
+        if not previous or not previous.get("per_doc_ms"):
+            continue
+        ratio = result["per_doc_ms"] / previous["per_doc_ms"]
+        comparison.append({
+            "benchmark": name,
+            "baseline_ms": previous["per_doc_ms"],
+            "current_ms": result["per_doc_ms"],
+            "ratio": round(ratio, 3),
+            "regression": ratio > 1 + threshold
+        })
+    return comparison
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the resume analysis pipeline")
+    parser.add_argument("--scales", default="1,100,10000", help="comma-separated corpus sizes")
+    parser.add_argument("--extract-limit", type=int, default=200, help="max documents per extraction benchmark")
+    parser.add_argument("--repeat", type=int, default=3, help="rounds per benchmark below 1000 documents (best is kept)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--save", help="write results JSON to this file")
+    parser.add_argument("--baseline", help="compare against a previously saved results file")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed slowdown before a regression (0.2 = 20%%)")
+    args = parser.parse_args(argv)
+
+    warnings.simplefilter("ignore")
+    scales = [int(value) for value in args.scales.split(",") if value.strip()]
+    report = run_benchmarks(scales, args.extract_limit, args.repeat, args.seed)
+
+    exit_code = 0
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        report["comparison"] = compare(report, baseline, args.threshold)
+        report["regressions"] = [row["benchmark"] for row in report["comparison"] if row["regression"]]
+        exit_code = 1 if report["regressions"] else 0
+
+    output = json.dumps(report, indent=2)
+    if args.save:
+        with open(args.save, "w") as f:
+            f.write(output + "\n")
+    print(output)
+    return exit_code
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,305 @@
+# bulk_jobs.py
+"""Resumable bulk analysis of large resume archives.
+
+    python cli.py resumes.zip --sample-job "Data Scientist" --checkpoint .cache/bulk.sqlite3 -o results.jsonl
+
+A BulkJob analyzes every resume in a directory, zip or JSONL file with
+cli.analyze_item (worker processes extract the text and call
+analyze_resume_job_match) and checkpoints each finished item to SQLite.
+A run is keyed by its input, job, taxonomy fingerprint, weights and
+semantic threshold. Rerunning the same job after a crash, Ctrl-C or a
+stopped Streamlit session skips every checkpointed item, while a changed
+job or taxonomy starts a fresh run. Only max_in_flight items are queued at a
+time and results are committed in batches, so memory stays flat however
+large the archive is. An item that hangs past the timeout or kills its
+worker process (e.g. out of memory) is found by rerunning the items that
+were in flight one at a time, and is checkpointed as failed so later runs
+skip it. Progress (counts, throughput and ETA) goes to a
+callback: a stderr line in the CLI, a progress bar in the app.
+"""
+import json
+import multiprocessing
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, TimeoutError as FutureTimeoutError, wait
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import cli
+from doc_cache import content_key
+from ingest import terminate_executor
+from job_profiles import job_key
+from results_sink import ResultsSink
+
+def format_duration(seconds: Optional[float]) -> str:
+    if seconds is None:
+        return "?"
+    seconds = int(seconds)
+    if seconds >= 3600:
+        return f"{seconds // 3600}h {seconds % 3600 // 60:02d}m"
+    if seconds >= 60:
+        return f"{seconds // 60}m {seconds % 60:02d}s"
+    return f"{seconds}s"
+
+def format_progress(progress: Dict[str, Any]) -> str:
+    """One-line summary of a progress dict, e.g. for stderr or a progress bar label"""
+    return (
+        f"{progress['completed']:,}/{progress['total']:,} resumes"
+        f" ({progress['failed']:,} failed, {progress['resumed']:,} from checkpoint)"
+        f" · {progress['rate']:.1f}/s · ETA {format_duration(progress['eta_seconds'])}"
+    )
+
+class BulkJob:
+    """One job description applied to every resume of an input, checkpointed to SQLite"""
+
+    def __init__(self, path: str, source: str, job: Dict[str, str], weights: Optional[Dict[str, float]] = None,
+                 taxonomy: Optional[str] = None, semantic: Optional[float] = None, workers: int = 1,
+                 max_in_flight: Optional[int] = None, commit_every: int = 200, retry_failed: bool = False,
+                 timeout: Optional[float] = 30.0, analyze: Callable[[Dict[str, Any]], Dict[str, Any]] = None):
+        from taxonomy import load_analyzer
+        self.source = source
+        self.job = job
+        self.weights = weights
+        self.taxonomy = taxonomy
+        self.semantic = semantic
+        self.workers = max(1, workers)
+        self.max_in_flight = max_in_flight or self.workers * 4
+        self.commit_every = commit_every
+        self.retry_failed = retry_failed
+        # Seconds an item may take before it counts as failed (None: no limit, and workers=1 runs in-process)
+        self.timeout = timeout
+        # Per-item function run on the workers (must be importable by spawned processes)
+        self.analyze = analyze or cli.analyze_item
+        analyzer = load_analyzer(taxonomy)
+        analyzer.set_weights(weights or {})
+        # Results from another taxonomy, weighting or threshold are never mixed into a run
+        self.run_id = content_key(json.dumps([
+            os.path.abspath(source), job_key(job['description'], job['title']),
+            analyzer.fingerprint, analyzer.weights_fingerprint, semantic
+        ]).encode('utf-8'))[:16]
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS runs ("
+            "run TEXT PRIMARY KEY, source TEXT NOT NULL, job_title TEXT NOT NULL, "
+            "started REAL NOT NULL, finished REAL)"
+        )
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS items ("
+            "run TEXT NOT NULL, id TEXT NOT NULL, position INTEGER NOT NULL, failed INTEGER NOT NULL, "
+            "score REAL, result TEXT NOT NULL, PRIMARY KEY (run, id))"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS items_position ON items (run, position)")
+        self._db.execute(
+            "INSERT OR IGNORE INTO runs (run, source, job_title, started) VALUES (?, ?, ?, ?)",
+            (self.run_id, source, job['title'], time.time())
+        )
+        self._db.commit()
+
+    def checkpointed_ids(self) -> set:
+        """IDs that a resumed run skips (failed ones too, unless retry_failed)"""
+        query = "SELECT id FROM items WHERE run = ?" + (" AND failed = 0" if self.retry_failed else "")
+        with self._lock:
+            return {row[0] for row in self._db.execute(query, (self.run_id,))}
+
+    def counts(self) -> Dict[str, int]:
+        with self._lock:
+            done, failed = self._db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(failed), 0) FROM items WHERE run = ?", (self.run_id,)
+            ).fetchone()
+        return {'completed': done, 'failed': failed}
+
+    def _record(self, rows: List[Tuple[int, Dict[str, Any]]]):
+        """Checkpoint finished (position, result) pairs in one transaction"""
+        if not rows:
+            return
+        with self._lock:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO items (run, id, position, failed, score, result) VALUES (?, ?, ?, ?, ?, ?)",
+                [
+                    (self.run_id, result['id'], position, int('error' in result),
+                     result.get('overall_capability'), json.dumps(result))
+                    for position, result in rows
+                ]
+            )
+            self._db.commit()
+
+    def _pending(self, skip: set) -> Iterator[Tuple[int, Dict[str, Any]]]:
+        for position, item in enumerate(cli.iter_inputs(self.source)):
+            if item['id'] not in skip:
+                yield position, item
+
+    def run(self, progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+            interval: float = 1.0) -> Dict[str, Any]:
+        """Analyze every item not yet checkpointed; returns the final progress dict.
+
+        Finished results are committed every commit_every items or interval
+        seconds and whenever the run stops, including on an exception raised
+        by the progress callback (e.g. a stopped Streamlit script).
+        """
+        skip = self.checkpointed_ids()
+        total = sum(1 for _ in cli.iter_inputs(self.source))
+        counts = self.counts()
+        state = {
+            'total': total, 'completed': counts['completed'], 'failed': counts['failed'],
+            'resumed': len(skip), 'processed': 0, 'elapsed': 0.0, 'rate': 0.0, 'eta_seconds': None
+        }
+        if self.retry_failed:
+            state['completed'] -= counts['failed']
+            state['failed'] = 0
+        started = last_report = time.monotonic()
+        buffer = []
+
+        def finish(position, result):
+            nonlocal last_report
+            buffer.append((position, result))
+            state['completed'] += 1
+            state['failed'] += int('error' in result)
+            state['processed'] += 1
+            now = time.monotonic()
+            if len(buffer) >= self.commit_every or now - last_report >= interval:
+                self._record(buffer)
+                buffer.clear()
+            if now - last_report >= interval:
+                last_report = now
+                report(now)
+
+        def report(now):
+            state['elapsed'] = now - started
+            state['rate'] = state['processed'] / state['elapsed'] if state['elapsed'] > 0 else 0.0
+            remaining = max(0, state['total'] - state['completed'])
+            state['eta_seconds'] = remaining / state['rate'] if state['rate'] > 0 else None
+            if progress is not None:
+                progress(dict(state))
+
+        if progress is not None:
+            progress(dict(state))
+        try:
+            if self.workers == 1 and self.timeout is None:
+                cli.init_worker(self.job, self.weights, self.taxonomy, self.semantic)
+                for position, item in self._pending(skip):
+                    finish(position, self.analyze(item))
+            else:
+                self._run_pool(skip, finish)
+        finally:
+            self._record(buffer)
+            buffer.clear()
+        if state['completed'] >= total:
+            with self._lock:
+                self._db.execute("UPDATE runs SET finished = ? WHERE run = ?", (time.time(), self.run_id))
+                self._db.commit()
+        report(time.monotonic())
+        return state
+
+    def _new_pool(self, workers: int) -> ProcessPoolExecutor:
+        # Spawned workers avoid forking the Streamlit server's threads
+        return ProcessPoolExecutor(
+            max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+            initializer=cli.init_worker, initargs=(self.job, self.weights, self.taxonomy, self.semantic)
+        )
+
+    def _run_pool(self, skip: set, finish: Callable[[int, Dict[str, Any]], None]):
+        """Keep at most max_in_flight items queued on worker processes, recording them as they finish"""
+        in_flight = {}  # future -> (position, item)
+        executor = self._new_pool(self.workers)
+        try:
+            for position, item in self._pending(skip):
+                in_flight[executor.submit(self.analyze, item)] = (position, item)
+                if len(in_flight) >= self.max_in_flight:
+                    executor = self._collect(executor, in_flight, finish)
+            while in_flight:
+                executor = self._collect(executor, in_flight, finish)
+        finally:
+            # Items still queued are simply redone by the next run
+            terminate_executor(executor)
+
+    def _collect(self, executor: ProcessPoolExecutor, in_flight: Dict[Any, Tuple[int, Dict[str, Any]]],
+                 finish: Callable[[int, Dict[str, Any]], None]) -> ProcessPoolExecutor:
+        """Record whatever finishes next; returns the pool to keep using.
+
+        If a worker died (the pool is broken) or nothing finished within the
+        timeout, the pool is killed and the items in flight are rerun one at a
+        time, so only the culprit is checkpointed as failed.
+        """
+        finished, _ = wait(in_flight, timeout=self.timeout, return_when=FIRST_COMPLETED)
+        stalled = not finished
+        for future in finished:
+            position, item = in_flight.pop(future)
+            try:
+                result = future.result()
+            except BrokenProcessPool:
+                stalled = True
+                in_flight[future] = (position, item)
+                continue
+            except Exception as e:
+                result = {'id': item['id'], 'error': str(e)}
+            finish(position, result)
+        if not stalled:
+            return executor
+        terminate_executor(executor)
+        suspects = sorted(in_flight.values(), key=lambda pair: pair[0])
+        in_flight.clear()
+        self._isolate(suspects, finish)
+        return self._new_pool(self.workers)
+
+    def _isolate(self, suspects: List[Tuple[int, Dict[str, Any]]], finish: Callable[[int, Dict[str, Any]], None]):
+        """Run items one at a time on a single worker; one that times out or kills it is recorded as failed"""
+        executor = None
+        try:
+            for position, item in suspects:
+                if executor is None:
+                    executor = self._new_pool(1)
+                    # Worker start-up (taxonomy load, job compile) does not count against the item
+                    executor.submit(os.getpid).result()
+                future = executor.submit(self.analyze, item)
+                try:
+                    result = future.result(timeout=self.timeout)
+                except (FutureTimeoutError, BrokenProcessPool) as e:
+                    timed_out = isinstance(e, FutureTimeoutError)
+                    error = f"timed out after {self.timeout:g}s" if timed_out else "worker process died (e.g. out of memory)"
+                    result = {'id': item['id'], 'error': error}
+                    terminate_executor(executor)
+                    executor = None
+                except Exception as e:
+                    result = {'id': item['id'], 'error': str(e)}
+                finish(position, result)
+        finally:
+            if executor is not None:
+                terminate_executor(executor)
+
+    def results(self) -> Iterator[Dict[str, Any]]:
+        """Checkpointed results in input order, read a page at a time"""
+        position = -1
+        while True:
+            with self._lock:
+                rows = self._db.execute(
+                    "SELECT position, result FROM items WHERE run = ? AND position > ? ORDER BY position LIMIT 1000",
+                    (self.run_id, position)
+                ).fetchall()
+            if not rows:
+                return
+            for position, result in rows:
+                yield json.loads(result)
+
+    def export(self, directory: str, categories: Iterable[str], format: Optional[str] = None) -> ResultsSink:
+        """Write the run's results to its columnar part (see results_sink.py), replacing an earlier export"""
+        with ResultsSink(directory, categories, format, part_name=f"run-{self.run_id}") as sink:
+            sink.write(self.results())
+        return sink
+
+    def top(self, limit: int = 100) -> List[Dict[str, Any]]:
+        """Best-scoring results of the run"""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT result FROM items WHERE run = ? AND failed = 0 ORDER BY score DESC LIMIT ?",
+                (self.run_id, limit)
+            ).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def close(self):
+        with self._lock:
+            self._db.close()
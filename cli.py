@@ -0,0 +1,290 @@
+# cli.py
+"""Headless batch analysis: stream resumes through ResumeAnalyzer into JSONL.
+
+    python cli.py resumes/ --sample-job "Data Scientist" -o results.jsonl --workers 4
+    python cli.py resumes.jsonl --job-file job.txt --job-title "Cloud Engineer"
+    python cli.py .cache/resume_index.sqlite3 --from-pool --sample-job "Data Scientist" --weights weights.json
+    python cli.py resumes.zip --sample-job "Data Scientist" --checkpoint .cache/bulk.sqlite3 -o results.jsonl
+
+Input is a directory of PDF/DOCX/TXT files, a zip of them, a single such
+file, or a JSONL file whose lines hold {"id": ..., "text": ...} or
+{"id": ..., "path": ...}.
+With --from-pool the input is a resume pool database (RESUME_INDEX_PATH) and
+every stored resume is rescored from its saved skills, without any text.
+--weights takes a JSON object of category -> weight overrides, and
+--taxonomy a skill taxonomy file (see taxonomy.py). --semantic THRESHOLD
+adds partial credit for paraphrased skills (see semantic.py).
+Results are written in input order while at most --max-in-flight items
+are held in memory. With --checkpoint the run is resumable: finished items
+are saved to SQLite as they complete, rerunning the same command skips
+them, and progress with throughput and ETA goes to stderr (see
+bulk_jobs.py). --columnar DIR also appends the results to Parquet, Arrow or
+CSV part files for analytics (see results_sink.py). Streamlit and the
+Gemini client are never imported.
+"""
+import argparse
+import json
+import os
+import sys
+import zipfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterator, Optional
+
+from ingest import PDF_TYPE, DOCX_TYPE, TXT_TYPE
+
+FILE_TYPES = {'.pdf': PDF_TYPE, '.docx': DOCX_TYPE, '.txt': TXT_TYPE}
+
+# Per-process state, set up once by init_worker
+_analyzer = None
+_job = None
+_job_profile = None
+_archives = {}  # zip path -> open ZipFile, so the central directory is read once per worker
+
+def init_worker(job: Dict[str, str], weights: Optional[Dict[str, float]] = None, taxonomy: Optional[str] = None,
+                semantic: Optional[float] = None):
+    """Build the analyzer once per worker process (from the compiled taxonomy artifact)"""
+    global _analyzer, _job, _job_profile
+    from taxonomy import load_analyzer
+    _analyzer = load_analyzer(taxonomy)
+    _analyzer.set_weights(weights or {})
+    _analyzer.enable_semantic(semantic)
+    _job = job
+    _job_profile = _analyzer.compile_job_profile(job['description'], job['title'])
+
+def iter_inputs(source: str) -> Iterator[Dict[str, Any]]:
+    """Lazily yield {'id', 'path'}, {'id', 'archive', 'member'} or {'id', 'text'} items
+    from a directory, zip, file or JSONL"""
+    if os.path.isdir(source):
+        for root, dirs, files in os.walk(source):
+            dirs.sort()
+            for name in sorted(files):
+                if os.path.splitext(name)[1].lower() in FILE_TYPES:
+                    path = os.path.join(root, name)
+                    yield {'id': os.path.relpath(path, source), 'path': path}
+    elif source.lower().endswith('.zip'):
+        with zipfile.ZipFile(source) as archive:
+            members = sorted(info.filename for info in archive.infolist() if not info.is_dir())
+        for member in members:
+            if os.path.splitext(member)[1].lower() in FILE_TYPES:
+                yield {'id': member, 'archive': source, 'member': member}
+    elif source.endswith('.jsonl'):
+        with open(source, encoding='utf-8') as f:
+            for line_number, line in enumerate(f, 1):
+                if line.strip():
+                    item = json.loads(line)
+                    item.setdefault('id', item.get('path') or str(line_number))
+                    yield item
+    else:
+        yield {'id': os.path.basename(source), 'path': source}
+
+def load_text(item: Dict[str, Any]) -> str:
+    """Text of an input item, extracting documents in this process"""
+    from ingest import extract_text
+    if 'text' in item:
+        return item['text'] or ""
+    name = item.get('member') or item['path']
+    file_type = FILE_TYPES.get(os.path.splitext(name)[1].lower())
+    if file_type is None:
+        raise ValueError(f"Unsupported file type: {name}")
+    if 'archive' in item:
+        archive = _archives.get(item['archive'])
+        if archive is None:
+            archive = _archives[item['archive']] = zipfile.ZipFile(item['archive'])
+        return extract_text(archive.read(item['member']), file_type)
+    with open(item['path'], 'rb') as f:
+        return extract_text(f.read(), file_type)
+
+def analyze_item(item: Dict[str, Any]) -> Dict[str, Any]:
+    """Analyze one input against the configured job; errors are reported, not raised"""
+    try:
+        text = load_text(item)
+        if not text:
+            return {'id': item['id'], 'error': "no text extracted"}
+        analysis = _analyzer.analyze_resume_job_match(
+            text, _job['description'], _job['title'], job_profile=_job_profile
+        )
+    except Exception as e:
+        return {'id': item['id'], 'error': str(e)}
+    return {
+        'id': item['id'],
+        'job_title': _job['title'],
+        'overall_capability': analysis['overall_capability'],
+        'skill_match': analysis['skill_match'],
+        'experience_compatibility': analysis['experience_compatibility'],
+        'resume_experience_level': analysis['resume_experience_level'],
+        'job_level': analysis['job_level'],
+        'matching_skills': analysis['matching_skills'],
+        'missing_skills': analysis['missing_skills'],
+        'semantic_matches': analysis['semantic_matches']
+    }
+
+def run(source: str, job: Dict[str, str], output, workers: int = 1, max_in_flight: Optional[int] = None,
+        weights: Optional[Dict[str, float]] = None, taxonomy: Optional[str] = None,
+        semantic: Optional[float] = None, sink=None) -> Dict[str, int]:
+    """Analyze every input and write one JSON line per result (and to sink, if given); returns counts"""
+    counts = {'analyzed': 0, 'failed': 0}
+
+    def write(result):
+        counts['failed' if 'error' in result else 'analyzed'] += 1
+        output.write(json.dumps(result) + "\n")
+        if sink is not None:
+            sink.write([result])
+
+    if workers <= 1:
+        init_worker(job, weights, taxonomy, semantic)
+        for item in iter_inputs(source):
+            write(analyze_item(item))
+        return counts
+
+    window = max_in_flight or workers * 4
+    pending = deque()
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker,
+                             initargs=(job, weights, taxonomy, semantic)) as executor:
+        for item in iter_inputs(source):
+            pending.append(executor.submit(analyze_item, item))
+            if len(pending) >= window:
+                write(pending.popleft().result())
+        while pending:
+            write(pending.popleft().result())
+    return counts
+
+def rescore_pool(path: str, job: Dict[str, str], output, weights: Optional[Dict[str, float]] = None,
+                 taxonomy: Optional[str] = None) -> Dict[str, int]:
+    """Rank every resume in a stored pool for the job, best first; returns counts"""
+    from skill_index import SkillIndex
+    from taxonomy import load_analyzer
+    if not os.path.isfile(path):
+        raise SystemExit(f"No resume pool at {path}")
+    analyzer = load_analyzer(taxonomy)
+    analyzer.set_weights(weights or {})
+    rows = SkillIndex(analyzer, path).rescore(analyzer.compile_job_profile(job['description'], job['title']))
+    for row in rows:
+        output.write(json.dumps({'id': row.pop('resume_id'), 'job_title': job['title'], **row}) + "\n")
+    return {'analyzed': len(rows), 'failed': 0}
+
+def run_checkpointed(source: str, job: Dict[str, str], output, checkpoint: str, workers: int = 1,
+                     max_in_flight: Optional[int] = None, weights: Optional[Dict[str, float]] = None,
+                     taxonomy: Optional[str] = None, semantic: Optional[float] = None,
+                     retry_failed: bool = False, columnar: Optional[str] = None,
+                     columnar_format: Optional[str] = None, timeout: Optional[float] = 30.0) -> Dict[str, int]:
+    """Resumable run: skip items already in the checkpoint, report progress, then write every result.
+
+    An item that takes longer than timeout seconds, or whose worker process
+    dies, is checkpointed as failed. The columnar export is one part per run, rewritten from the checkpoint,
+    so resuming never duplicates rows there.
+    """
+    from bulk_jobs import BulkJob, format_progress
+    bulk_job = BulkJob(checkpoint, source, job, weights, taxonomy, semantic, workers, max_in_flight,
+                       retry_failed=retry_failed, timeout=timeout)
+    try:
+        state = bulk_job.run(progress=lambda progress: print(format_progress(progress), file=sys.stderr))
+        for result in bulk_job.results():
+            output.write(json.dumps(result) + "\n")
+        if columnar:
+            bulk_job.export(columnar, load_categories(taxonomy), columnar_format)
+    finally:
+        bulk_job.close()
+    return {'analyzed': state['completed'] - state['failed'], 'failed': state['failed']}
+
+def load_categories(taxonomy: Optional[str] = None):
+    from taxonomy import load_analyzer
+    return list(load_analyzer(taxonomy).category_weights())
+
+def load_weights(path: Optional[str], taxonomy: Optional[str] = None) -> Optional[Dict[str, float]]:
+    if not path:
+        return None
+    from taxonomy import load_analyzer
+    try:
+        with open(path, encoding='utf-8') as f:
+            weights = json.load(f)
+    except ValueError as e:
+        raise SystemExit(f"Could not read weights from {path}: {e}")
+    if not isinstance(weights, dict):
+        raise SystemExit(f"{path} must hold a JSON object of category -> weight")
+    unknown = set(weights) - set(load_analyzer(taxonomy).category_weights())
+    if unknown:
+        raise SystemExit(f"Unknown skill categories in {path}: {', '.join(sorted(unknown))}")
+    return {category: float(weight) for category, weight in weights.items()}
+
+def load_job(args) -> Dict[str, str]:
+    if args.job_file:
+        with open(args.job_file, encoding='utf-8') as f:
+            description = f.read()
+        return {'title': args.job_title or os.path.splitext(os.path.basename(args.job_file))[0], 'description': description}
+    from core import SAMPLE_JOBS
+    for job in SAMPLE_JOBS:
+        if job['title'] == args.sample_job:
+            return {'title': args.job_title or job['title'], 'description': job['description']}
+    raise SystemExit(f"Unknown sample job: {args.sample_job} (choose from {', '.join(j['title'] for j in SAMPLE_JOBS)})")
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Analyze resumes against a job description and write JSONL")
+    parser.add_argument("input", help="directory of resumes, a resume file, or a JSONL file")
+    job_source = parser.add_mutually_exclusive_group(required=True)
+    job_source.add_argument("--job-file", help="text file with the job description")
+    job_source.add_argument("--sample-job", help="title of one of the built-in sample jobs")
+    parser.add_argument("--job-title", help="job title (defaults to the sample title or job file name)")
+    parser.add_argument("-o", "--output", help="output JSONL file (default: stdout)")
+    parser.add_argument("--workers", type=int, default=1, help="worker processes (default: 1, in-process)")
+    parser.add_argument("--max-in-flight", type=int, help="max queued items (default: 4 x workers)")
+    parser.add_argument("--weights", help="JSON file of category -> weight overrides")
+    parser.add_argument("--from-pool", action="store_true", help="input is a resume pool database; rescore it")
+    parser.add_argument("--checkpoint", help="SQLite file of finished items; rerunning resumes where a run stopped")
+    parser.add_argument("--retry-failed", action="store_true", help="with --checkpoint, redo items that failed")
+    parser.add_argument("--timeout", type=float, default=float(os.getenv('INGEST_TIMEOUT', '30')),
+                        help="with --checkpoint, seconds before an item counts as failed (default: 30)")
+    parser.add_argument("--columnar", metavar="DIR", help="also append results to columnar part files in DIR")
+    parser.add_argument("--columnar-format", choices=["parquet", "arrow", "csv"],
+                        help="part file format (default: parquet, or csv without pyarrow)")
+    parser.add_argument("--taxonomy", default=os.getenv('SKILL_TAXONOMY_PATH'),
+                        help="skill taxonomy JSON (default: built-in)")
+    parser.add_argument("--semantic", type=float, metavar="THRESHOLD",
+                        default=float(os.getenv('SEMANTIC_MATCH_THRESHOLD') or 0) or None,
+                        help="credit paraphrased skills at or above this similarity, e.g. 0.8 (default: off)")
+    args = parser.parse_args(argv)
+    if args.checkpoint and args.from_pool:
+        parser.error("--checkpoint cannot be combined with --from-pool")
+    if args.columnar and args.from_pool:
+        parser.error("--columnar cannot be combined with --from-pool")
+
+    job = load_job(args)
+    if args.taxonomy:
+        # Compiled once here; workers then load the artifact
+        from taxonomy import TaxonomyError, compile_taxonomy
+        try:
+            compile_taxonomy(args.taxonomy)
+        except TaxonomyError as e:
+            raise SystemExit(str(e))
+    weights = load_weights(args.weights, args.taxonomy)
+    sink = None
+    if args.columnar:
+        from results_sink import ResultsSink, check_format
+        try:
+            check_format(args.columnar_format)
+        except ValueError as e:
+            raise SystemExit(str(e))
+        # A checkpointed run exports its own part once it finishes
+        if not args.checkpoint:
+            sink = ResultsSink(args.columnar, load_categories(args.taxonomy), args.columnar_format)
+    output = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    try:
+        if args.from_pool:
+            counts = rescore_pool(args.input, job, output, weights, args.taxonomy)
+        elif args.checkpoint:
+            counts = run_checkpointed(args.input, job, output, args.checkpoint, args.workers, args.max_in_flight,
+                                      weights, args.taxonomy, args.semantic, args.retry_failed, args.columnar,
+                                      args.columnar_format, args.timeout)
+        else:
+            counts = run(args.input, job, output, args.workers, args.max_in_flight, weights, args.taxonomy,
+                         args.semantic, sink)
+    finally:
+        if args.output:
+            output.close()
+        if sink is not None:
+            sink.close()
+    print(f"analyzed {counts['analyzed']}, failed {counts['failed']}", file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
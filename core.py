@@ -0,0 +1,901 @@
+# core.py
+"""Resume analysis core, importable without Streamlit, Gemini, fpdf or PyPDF2.
+
+The Streamlit app, the CLI and batch workers all build on ResumeAnalyzer
+from here; document extraction lives in ingest and imports its parsers
+only when a document is actually extracted.
+"""
+import re
+import json
+import hashlib
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from metrics import instrument
+
+# Sample job descriptions
+SAMPLE_JOBS = [
+    {
+        "title": "Senior Python Developer",
+        "description": """
+        We are looking for a Senior Python Developer with 5+ years of experience.
+        Required Skills:
+        - Python programming
+        - Django or Flask framework experience
+        - REST API development
+        - Database design with SQL
+        - Cloud platforms (AWS/Azure)
+        - Docker and containerization
+        - CI/CD pipelines
+        - Agile development methodology
+        
+        Preferred Qualifications:
+        - Machine learning experience
+        - Microservices architecture
+        - Kubernetes experience
+        - Test-driven development
+        """
+    },
+    {
+        "title": "Data Scientist",
+        "description": """
+        Data Scientist Position
+        Requirements:
+        - Python programming for data analysis
+        - SQL and database skills
+        - Machine learning algorithms
+        - Data visualization with Tableau or Power BI
+        - Statistical analysis
+        - Data cleaning and preprocessing
+        
+        Nice to Have:
+        - R programming language
+        - Big data tools (Spark, Hadoop)
+        - Deep learning experience
+        - Cloud computing experience
+        """
+    }
+    # Add more sample jobs as needed...
+]
+
+# Tokenization shared by skill matching
+TOKEN_PATTERN = re.compile(r"[a-z0-9][a-z0-9+#]*(?:[.\-][a-z0-9+#]+)*")
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase and split text into tokens ('c++', 'node.js' and 'ci/cd' parts stay intact)"""
+    if not text:
+        return []
+    return TOKEN_PATTERN.findall(text.lower())
+
+class SkillMatcher:
+    """Token-trie matcher compiled once from the skill taxonomy.
+
+    Every skill phrase is tokenized with the same rules as the input text and
+    inserted into a trie keyed by token, so a single pass over the tokens finds
+    all single- and multi-word skills on whole-token boundaries.
+    """
+
+    def __init__(self, skill_keywords: Dict[str, Dict[str, Any]], aliases: Dict[str, str] = None):
+        # Skill IDs follow taxonomy order so results keep the original ordering
+        self.skills = []  # skill_id -> (category, skill)
+        self.trie = {}
+        self.max_phrase_len = 0
+        ids_by_name = {}
+        for category, data in skill_keywords.items():
+            for skill in data['skills']:
+                if not tokenize(skill):
+                    continue
+                skill_id = len(self.skills)
+                self.skills.append((category, skill))
+                ids_by_name.setdefault(skill, []).append(skill_id)
+                self._insert(skill, skill_id)
+        # An alias matches as its canonical skill; aliases for unknown skills are ignored
+        for alias, skill in (aliases or {}).items():
+            for skill_id in ids_by_name.get(skill, []):
+                self._insert(alias, skill_id)
+
+    def _insert(self, phrase_text: str, skill_id: int):
+        phrase = tokenize(phrase_text)
+        if not phrase:
+            return
+        node = self.trie
+        for token in phrase:
+            node = node.setdefault(token, {})
+        hits = node.setdefault(None, [])
+        if skill_id not in hits:
+            hits.append(skill_id)
+        self.max_phrase_len = max(self.max_phrase_len, len(phrase))
+
+    def match_ids(self, tokens: List[str]) -> set:
+        """Return the IDs of every skill phrase occurring in the token list"""
+        found = set()
+        trie = self.trie
+        n = len(tokens)
+        for start in range(n):
+            node = trie.get(tokens[start])
+            pos = start + 1
+            while node is not None:
+                hits = node.get(None)
+                if hits:
+                    found.update(hits)
+                if pos >= n:
+                    break
+                node = node.get(tokens[pos])
+                pos += 1
+        return found
+
+    def match(self, tokens: List[str]) -> Dict[str, List[str]]:
+        """Return matched skills grouped by category, in taxonomy order"""
+        return self.group(self.match_ids(tokens))
+
+    def stream(self) -> 'StreamingMatch':
+        """Matcher state for text that arrives in pieces"""
+        return StreamingMatch(self)
+
+    def group(self, skill_ids) -> Dict[str, List[str]]:
+        """Group skill IDs by category, in taxonomy order"""
+        grouped = {}
+        for skill_id in sorted(skill_ids):
+            category, skill = self.skills[skill_id]
+            grouped.setdefault(category, []).append(skill)
+        return grouped
+
+class StreamingMatch:
+    """Incremental skill matching over text fed piece by piece (e.g. PDF pages).
+
+    The last few tokens of each piece are carried over, so phrases spanning a
+    page break are found exactly as in the joined text.
+    """
+
+    def __init__(self, matcher: SkillMatcher):
+        self.matcher = matcher
+        self.skill_ids = set()
+        self.tokens = []  # every token fed so far, for experience detection
+        self._carry = []
+
+    def feed(self, text: str) -> set:
+        """Match one more piece of text; returns the skill IDs it added"""
+        new_tokens = tokenize(text)
+        self.tokens.extend(new_tokens)
+        tokens = self._carry + new_tokens
+        found = self.matcher.match_ids(tokens) - self.skill_ids
+        self.skill_ids |= found
+        keep = self.matcher.max_phrase_len - 1
+        self._carry = tokens[-keep:] if keep > 0 else []
+        return found
+
+# Experience evidence in token streams
+YEAR_TOKEN = re.compile(r"(?:19|20)\d\d")
+YEARS_CLAIM = re.compile(r"(\d{1,2})(?:-\d{1,2})?\+?(years?|yrs?)?")
+YEAR_WORDS = {'year', 'years', 'yr', 'yrs'}
+PRESENT_WORDS = {'present', 'current', 'now', 'today', 'date'}
+MONTHS = {month: index for index, month in enumerate(
+    ['jan', 'feb', 'mar', 'apr', 'may', 'jun', 'jul', 'aug', 'sep', 'oct', 'nov', 'dec']
+)}
+MONTHS.update({name: MONTHS[name[:3]] for name in [
+    'january', 'february', 'march', 'april', 'june', 'july', 'august', 'sept', 'september',
+    'october', 'november', 'december'
+]})
+EDUCATION_WORDS = {
+    'university', 'college', 'school', 'bachelor', 'bachelors', 'master', 'masters', 'degree',
+    'bsc', 'b.sc', 'b.s', 'msc', 'm.sc', 'm.s', 'phd', 'gpa', 'diploma', 'coursework'
+}
+
+class ExperienceDetector:
+    """Single-pass experience-level detector compiled from the experience indicators.
+
+    Indicator phrases are matched on whole tokens with a SkillMatcher (so
+    'intern' does not fire on 'international'), and every level is scored
+    at once. Years of experience come from date ranges ('Jan 2018 - Present',
+    '2015-2019', overlapping ranges merged, education ranges skipped) and
+    'N+ years' claims; the level those years imply gets YEARS_WEIGHT of a
+    vote, so it settles ties between indicators and decides alone only when
+    none fired. Remaining ties go to the level listed first in the taxonomy.
+    """
+
+    YEARS_WEIGHT = 0.5  # below one indicator, so an explicit title always wins
+    RANGE_GAP = 3  # tokens allowed between the start and end of a date range (e.g. 'to', a month)
+    EDUCATION_WINDOW = 6
+
+    def __init__(self, experience_indicators: Dict[str, List[str]]):
+        self.levels = list(experience_indicators)
+        self.matcher = SkillMatcher({level: {'skills': phrases} for level, phrases in experience_indicators.items()})
+        self.indicator_levels = np.array(
+            [self.levels.index(level) for level, _ in self.matcher.skills], dtype=np.intp
+        )
+        # 'N+ years' indicators double as year thresholds: a level starts at its smallest N
+        thresholds = {}
+        for level, phrase in self.matcher.skills:
+            years = self.claimed_years(tokenize(phrase))
+            if years is not None:
+                thresholds[level] = min(years, thresholds.get(level, years))
+        self.year_thresholds = sorted(((years, level) for level, years in thresholds.items()), reverse=True)
+
+    @staticmethod
+    def claimed_years(tokens: List[str]) -> Optional[float]:
+        """Largest 'N years' / 'N+ yrs' claim in the tokens, or None"""
+        claimed = None
+        for index, token in enumerate(tokens):
+            match = YEARS_CLAIM.fullmatch(token)
+            if not match:
+                continue
+            if match.group(2) or (index + 1 < len(tokens) and tokens[index + 1] in YEAR_WORDS):
+                years = float(match.group(1))
+                claimed = years if claimed is None else max(claimed, years)
+        return claimed
+
+    @classmethod
+    def date_points(cls, tokens: List[str], now: float) -> List[tuple]:
+        """(token index, fractional year) for every year or 'present' in the tokens"""
+        points = []
+        month = None
+        for index, token in enumerate(tokens):
+            # '2015-2019' and 'mar-2020' stay one token; look at the parts
+            for part in token.split('-'):
+                if part in MONTHS:
+                    month = MONTHS[part]
+                elif YEAR_TOKEN.fullmatch(part):
+                    points.append((index, int(part) + (month or 0) / 12))
+                    month = None
+                elif part in PRESENT_WORDS:
+                    points.append((index, now))
+                    month = None
+                else:
+                    month = None
+        return points
+
+    def range_years(self, tokens: List[str], now: float) -> float:
+        """Total years covered by work date ranges, overlaps counted once"""
+        points = self.date_points(tokens, now)
+        spans = []
+        index = 0
+        while index + 1 < len(points):
+            (start_at, start), (end_at, end) = points[index], points[index + 1]
+            if end_at - start_at <= self.RANGE_GAP and 1950 <= start <= end <= now:
+                window = tokens[max(0, start_at - self.EDUCATION_WINDOW):end_at + self.EDUCATION_WINDOW + 1]
+                if not EDUCATION_WORDS.intersection(window):
+                    spans.append((start, end))
+                index += 2
+            else:
+                index += 1
+        total = 0.0
+        covered_to = None
+        for start, end in sorted(spans):
+            if covered_to is not None and start < covered_to:
+                start = covered_to
+            if end > start:
+                total += end - start
+                covered_to = end
+        return total
+
+    def years(self, tokens: List[str], now: Optional[float] = None) -> float:
+        """Years of experience from date ranges or explicit claims, whichever is larger"""
+        if now is None:
+            today = time.localtime()
+            now = today.tm_year + (today.tm_mon - 1) / 12
+        return max(self.range_years(tokens, now), self.claimed_years(tokens) or 0.0)
+
+    def scores(self, tokens: List[str], years: float) -> np.ndarray:
+        """Votes per level (taxonomy order)"""
+        hits = list(self.matcher.match_ids(tokens))
+        scores = np.bincount(self.indicator_levels[hits], minlength=len(self.levels)).astype(np.float64)
+        for threshold, level in self.year_thresholds:
+            if years > 0 and years >= threshold:
+                scores[self.levels.index(level)] += self.YEARS_WEIGHT
+                break
+        return scores
+
+    def detect(self, tokens: List[str]) -> str:
+        """Experience level for a token list, or 'unknown' without any evidence"""
+        if not tokens or not self.levels:
+            return "unknown"
+        scores = self.scores(tokens, self.years(tokens))
+        best = int(np.argmax(scores))
+        return self.levels[best] if scores[best] > 0 else "unknown"
+
+# Sections a combined Gemini request can answer (see ResumeAnalyzer.combined_prompt)
+AI_SECTIONS = ('explanation', 'recommendation', 'cover_letter')
+COVER_LETTER_REQUIREMENTS = "\n".join([
+    "- Professional tone",
+    "- 250-400 words",
+    "- Highlight relevant skills and experience",
+    "- Address potential gaps positively",
+    "- Include opening and closing sections",
+    "- Focus on value proposition"
+])
+
+# Part of ResumeAnalyzer.fingerprint: bump when detection changes so cached levels are recomputed
+EXPERIENCE_DETECTOR_VERSION = 2
+
+# Compact skill sets: one bit per skill ID
+def pack_skill_mask(mask: np.ndarray) -> bytes:
+    """Bit-pack a boolean skill mask (one byte per 8 skills)"""
+    return np.packbits(mask).tobytes()
+
+def unpack_skill_mask(data: bytes, size: int) -> np.ndarray:
+    """Inverse of pack_skill_mask for a vocabulary of the given size"""
+    return np.unpackbits(np.frombuffer(data, dtype=np.uint8), count=size).astype(bool)
+
+# Default skill taxonomy (taxonomy.py loads replacements from a file)
+DEFAULT_TAXONOMY = {
+    # Skills with weights (Gen AI: Intelligent prioritization)
+    'skills': {
+        'core_technical': {
+            'weight': 1.5,
+            'skills': ['python', 'java', 'javascript', 'sql', 'machine learning', 'data analysis', 'c++', 'r']
+        },
+        'frameworks': {
+            'weight': 1.3,
+            'skills': ['django', 'flask', 'react', 'angular', 'vue', 'spring', 'tensorflow', 'pytorch', 'node.js', 'express']
+        },
+        'cloud_devops': {
+            'weight': 1.4,
+            'skills': ['aws', 'azure', 'gcp', 'docker', 'kubernetes', 'ci/cd', 'jenkins', 'terraform']
+        },
+        'databases': {
+            'weight': 1.2,
+            'skills': ['mysql', 'postgresql', 'mongodb', 'redis', 'oracle', 'sqlite', 'dynamodb']
+        },
+        'tools_methodologies': {
+            'weight': 1.1,
+            'skills': ['git', 'agile', 'scrum', 'jira', 'linux', 'rest api', 'microservices', 'devops']
+        },
+        'soft_skills': {
+            'weight': 0.9,
+            'skills': ['leadership', 'communication', 'teamwork', 'problem solving', 'project management', 'collaboration']
+        }
+    },
+    # Alternative spellings -> canonical skill
+    'aliases': {
+        'k8s': 'kubernetes',
+        'postgres': 'postgresql',
+        'reactjs': 'react',
+        'react.js': 'react',
+        'nodejs': 'node.js',
+        'vue.js': 'vue',
+        'vuejs': 'vue',
+        'amazon web services': 'aws',
+        'google cloud': 'gcp',
+        'restful api': 'rest api',
+        'ci-cd': 'ci/cd'
+    },
+    # Experience level indicators (Gen AI: Pattern recognition)
+    'experience_indicators': {
+        'senior': ['senior', 'lead', 'principal', 'architect', '5+ years', '7+ years', '10+ years', 'manager'],
+        'mid': ['mid-level', '3+ years', '4+ years', 'experienced', 'professional', 'specialist'],
+        'junior': ['junior', 'entry', 'graduate', '0-2 years', '1+ years', 'associate', 'intern']
+    }
+}
+
+# Enhanced Resume Analyzer with Gen AI Capabilities
+class ResumeAnalyzer:
+    def __init__(self, llm: Optional[Callable[[str], str]] = None, taxonomy: Dict[str, Any] = None,
+                 matcher: Optional[SkillMatcher] = None):
+        # Prompt -> completion text (the app passes its Gemini caller); None means rule-based only
+        self.llm = llm
+        
+        taxonomy = taxonomy or DEFAULT_TAXONOMY
+        # Category dicts are copied since set_weights changes weights in place; skill lists are shared
+        self.skill_keywords = {category: dict(data) for category, data in taxonomy['skills'].items()}
+        self.aliases = taxonomy.get('aliases', {})
+        self.experience_indicators = taxonomy['experience_indicators']
+        
+        # Compile the taxonomy once (or reuse a precompiled matcher); matching is then a single pass per document
+        self.matcher = matcher or SkillMatcher(self.skill_keywords, self.aliases)
+        self.experience = ExperienceDetector(self.experience_indicators)
+        self.skill_lookup = {skill: skill_id for skill_id, skill in enumerate(self.matcher.skills)}
+        # Changes whenever the skill vocabulary, experience indicators or detector do, so cached
+        # skill profiles can be namespaced by it. Weights only affect scoring and are tracked separately.
+        vocabulary = {category: data['skills'] for category, data in self.skill_keywords.items()}
+        self.fingerprint = hashlib.sha256(json.dumps(
+            [vocabulary, self.aliases, self.experience_indicators, EXPERIENCE_DETECTOR_VERSION], sort_keys=True
+        ).encode('utf-8')).hexdigest()[:16]
+        self.set_weights({})
+        # Optional fuzzy matching stage (see enable_semantic)
+        self.semantic = None
+        # Tokens of resume and job excerpts per prompt (see prompts.select_excerpts)
+        self.prompt_token_budget = 1200
+    
+    def set_weights(self, weights: Dict[str, float]):
+        """Change category weights; cached skill profiles stay valid, only scores change"""
+        for category, weight in weights.items():
+            self.skill_keywords[category]['weight'] = float(weight)
+        self.skill_weights = self.weight_vector()
+        self.weights_fingerprint = hashlib.sha256(
+            json.dumps(self.category_weights(), sort_keys=True).encode('utf-8')
+        ).hexdigest()[:16]
+    
+    def enable_semantic(self, threshold: Optional[float] = 0.8):
+        """Turn on semantic skill matching (None turns it off); skill embeddings are built once"""
+        if threshold is None:
+            self.semantic = None
+            return
+        if self.semantic is None:
+            from semantic import SemanticMatcher
+            self.semantic = SemanticMatcher(self.matcher.skills, self.aliases, threshold)
+        self.semantic.threshold = threshold
+    
+    def category_weights(self) -> Dict[str, float]:
+        return {category: data['weight'] for category, data in self.skill_keywords.items()}
+    
+    def weight_vector(self, weights: Dict[str, float] = None) -> np.ndarray:
+        """Per-skill-ID weights for category weights (current weights for missing categories)"""
+        weights = {**self.category_weights(), **(weights or {})}
+        return np.array([weights[category] for category, _ in self.matcher.skills], dtype=np.float64)
+    
+    def extract_skills(self, text: str) -> Dict[str, Any]:
+        """Extract and categorize skills"""
+        if not text:
+            return {}
+            
+        return self.skills_from_ids(self.matcher.match_ids(tokenize(text)))
+    
+    def skills_from_ids(self, skill_ids) -> Dict[str, Any]:
+        """extract_skills() result for a set of matched skill IDs (weights are the current ones)"""
+        found_skills = {}
+        
+        for category, found in self.matcher.group(skill_ids).items():
+            found_skills[category] = {
+                'skills': found,
+                'weight': self.skill_keywords[category]['weight']
+            }
+        
+        return found_skills
+    
+    def skill_mask(self, skills) -> np.ndarray:
+        """Boolean mask over skill IDs from an extract_skills() result, skill IDs or a mask"""
+        if isinstance(skills, np.ndarray):
+            return skills.astype(bool, copy=False)
+        mask = np.zeros(len(self.matcher.skills), dtype=bool)
+        if isinstance(skills, dict):
+            skills = [
+                self.skill_lookup[(category, skill)]
+                for category, data in skills.items()
+                for skill in data['skills']
+                if (category, skill) in self.skill_lookup
+            ]
+        mask[list(skills)] = True
+        return mask
+    
+    def text_skill_mask(self, text: str) -> np.ndarray:
+        """Skill mask of a text"""
+        return self.skill_mask(self.matcher.match_ids(tokenize(text)) if text else ())
+    
+    def skills_from_mask(self, mask: np.ndarray) -> Dict[str, Any]:
+        """extract_skills() result for a skill mask"""
+        return self.skills_from_ids(np.flatnonzero(mask).tolist())
+    
+    def text_profile(self, text: str) -> Tuple[np.ndarray, str]:
+        """Skill mask and experience level of a text, tokenized once for both"""
+        tokens = tokenize(text)
+        return self.skill_mask(self.matcher.match_ids(tokens)), self.experience.detect(tokens)
+    
+    def detect_experience_level(self, text: str, tokens: List[str] = None) -> str:
+        """Detect experience level from text (or its tokens, when already tokenized)"""
+        if tokens is None:
+            tokens = tokenize(text)
+        return self.experience.detect(tokens)
+    
+    def experience_years(self, text: str, tokens: List[str] = None) -> float:
+        """Years of experience stated in or spanned by the text's date ranges"""
+        if tokens is None:
+            tokens = tokenize(text)
+        return self.experience.years(tokens)
+    
+    def calculate_capability_score(self, resume_skills, job_skills, 
+                                 resume_exp: str, job_title: str, job_level: str = None,
+                                 skill_confidence: np.ndarray = None) -> Dict[str, Any]:
+        """Calculate comprehensive scores (skills as extract_skills() results, skill IDs or masks).
+        
+        skill_confidence, per skill ID in [0, 1] (see SemanticMatcher.confidence),
+        gives partial credit for job skills the resume only paraphrases.
+        """
+        
+        # Calculate weighted skill match
+        resume_mask = self.skill_mask(resume_skills)
+        job_mask = self.skill_mask(job_skills)
+        total_possible_score = float(self.skill_weights[job_mask].sum())
+        if skill_confidence is None:
+            actual_score = float(self.skill_weights[job_mask & resume_mask].sum())
+        else:
+            credit = np.maximum(resume_mask, skill_confidence)
+            actual_score = float(self.skill_weights[job_mask] @ credit[job_mask])
+        
+        skill_match_percentage = (actual_score / total_possible_score * 100) if total_possible_score > 0 else 0
+        
+        # Calculate experience compatibility
+        if job_level is None:
+            job_level = self.detect_job_level(job_title)
+        exp_compatibility = self.calculate_experience_compatibility(resume_exp, job_level)
+        
+        # Overall capability score
+        overall_capability = (skill_match_percentage * 0.7) + (exp_compatibility * 0.3)
+        
+        return {
+            'overall_capability': round(overall_capability, 1),
+            'skill_match': round(skill_match_percentage, 1),
+            'experience_compatibility': round(exp_compatibility, 1),
+            'skill_breakdown': {
+                'total_possible': total_possible_score,
+                'actual_achieved': actual_score
+            }
+        }
+    
+    def detect_job_level(self, job_title: str) -> str:
+        """Detect job level from title"""
+        if not job_title:
+            return "mid"
+            
+        job_lower = job_title.lower()
+        
+        if any(word in job_lower for word in ['senior', 'lead', 'principal', 'architect', 'staff', 'manager']):
+            return 'senior'
+        elif any(word in job_lower for word in ['junior', 'entry', 'associate', 'graduate', 'intern']):
+            return 'junior'
+        else:
+            return 'mid'
+    
+    def experience_levels(self) -> List[str]:
+        """Every level a resume or job can have: the built-in ones plus any the taxonomy's indicators add"""
+        return list(dict.fromkeys(['senior', 'mid', 'junior', *self.experience.levels, 'unknown']))
+    
+    def calculate_experience_compatibility(self, resume_exp: str, job_level: str) -> float:
+        """Experience compatibility matrix (levels it does not know score 50)"""
+        compatibility_matrix = {
+            'senior': {'senior': 100, 'mid': 70, 'junior': 40, 'unknown': 50},
+            'mid': {'senior': 60, 'mid': 100, 'junior': 80, 'unknown': 70},
+            'junior': {'senior': 30, 'mid': 60, 'junior': 100, 'unknown': 80},
+            'unknown': {'senior': 40, 'mid': 60, 'junior': 80, 'unknown': 50}
+        }
+        
+        return compatibility_matrix.get(job_level, {}).get(resume_exp, 50)
+    
+    @instrument('analyze_resume_job_match')
+    def analyze_resume_job_match(self, resume_text: str, job_description: str, job_title: str,
+                                 resume_skills: Dict = None, resume_experience: str = None,
+                                 job_profile: Dict = None) -> Dict[str, Any]:
+        """Main analysis function.
+        
+        Pass a cached resume profile (resume_skills as an extract_skills() result,
+        skill IDs or a skill mask, plus resume_experience) or a compiled job
+        profile to skip re-extraction. With semantic matching enabled, job
+        skills the resume only paraphrases get partial credit and are listed
+        in semantic_matches with their confidence (they stay in missing_skills).
+        """
+        if not resume_text or not job_description:
+            return self.get_empty_analysis()
+            
+        # The resume is tokenized at most once, for whatever is not cached
+        tokens = None
+        if resume_skills is None or resume_experience is None or self.semantic is not None:
+            tokens = tokenize(resume_text)
+        if resume_skills is None:
+            resume_mask = self.skill_mask(self.matcher.match_ids(tokens))
+        else:
+            resume_mask = self.skill_mask(resume_skills)
+        if resume_experience is None:
+            resume_experience = self.experience.detect(tokens)
+        skill_confidence = self.semantic.confidence(tokens) if self.semantic is not None else None
+        if job_profile is None:
+            job_profile = self.compile_job_profile(job_description, job_title)
+        elif job_profile.get('weights') != self.weights_fingerprint:
+            job_profile = self.reweight_job_profile(job_profile)
+        job_mask = self.skill_mask(job_profile['skill_ids'])
+        job_level = job_profile['level']
+        
+        # Calculate capability scores
+        capability_scores = self.calculate_capability_score(
+            resume_mask, job_mask, resume_experience, job_title, job_level=job_level,
+            skill_confidence=skill_confidence
+        )
+        
+        # Find matching and missing skills
+        matching_skills = self.matcher.group(np.flatnonzero(job_mask & resume_mask).tolist())
+        missing_skills = self.matcher.group(np.flatnonzero(job_mask & ~resume_mask).tolist())
+        semantic_matches = {}
+        if skill_confidence is not None:
+            for skill_id in np.flatnonzero(job_mask & ~resume_mask & (skill_confidence > 0)).tolist():
+                category, skill = self.matcher.skills[skill_id]
+                semantic_matches.setdefault(category, {})[skill] = round(float(skill_confidence[skill_id]), 2)
+        
+        return {
+            **capability_scores,
+            "resume_experience_level": resume_experience,
+            "job_level": job_level,
+            "matching_skills": matching_skills,
+            "missing_skills": missing_skills,
+            "semantic_matches": semantic_matches,
+            "resume_skills": resume_skills if isinstance(resume_skills, dict) else self.skills_from_mask(resume_mask),
+            "job_skills": job_profile['skills']
+        }
+    
+    def compile_job_profile(self, job_description: str, job_title: str) -> Dict[str, Any]:
+        """Everything about a job that does not depend on the resume (JSON-serializable)"""
+        skill_ids = sorted(self.matcher.match_ids(tokenize(job_description)))
+        return self.reweight_job_profile({'skill_ids': skill_ids, 'level': self.detect_job_level(job_title)})
+    
+    def reweight_job_profile(self, profile: Dict[str, Any]) -> Dict[str, Any]:
+        """Job profile with its weight-dependent fields brought up to date (no text is scanned)"""
+        skill_ids = profile['skill_ids']
+        return {
+            **profile,
+            'skills': self.skills_from_ids(skill_ids),
+            'total_possible': float(self.skill_weights[skill_ids].sum()) if skill_ids else 0.0,
+            'weights': self.weights_fingerprint
+        }
+    
+    def skill_matrix(self, texts: List[str]) -> np.ndarray:
+        """Build a document x skill boolean matrix, scanning each text once"""
+        return self.profile_matrix(texts)[0]
+    
+    def profile_matrix(self, texts: List[str]) -> Tuple[np.ndarray, List[str], Optional[np.ndarray]]:
+        """Document x skill boolean matrix, each document's experience level and, with
+        semantic matching on, a document x skill confidence matrix; each text is tokenized once"""
+        matrix = np.zeros((len(texts), len(self.matcher.skills)), dtype=bool)
+        confidence = None if self.semantic is None else np.zeros(matrix.shape, dtype=np.float32)
+        levels = []
+        for row, text in enumerate(texts):
+            tokens = tokenize(text)
+            skill_ids = self.matcher.match_ids(tokens)
+            if skill_ids:
+                matrix[row, list(skill_ids)] = True
+            levels.append(self.experience.detect(tokens))
+            if confidence is not None:
+                confidence[row] = self.semantic.confidence(tokens)
+        return matrix, levels, confidence
+    
+    def batch_analyze(self, resumes: List[Dict[str, str]], jobs: List[Dict[str, str]],
+                      job_profiles: List[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """Score N resumes against M jobs in one vectorized pass.
+        
+        resumes: [{'name': ..., 'text': ...}], jobs: [{'title': ..., 'description': ...}].
+        job_profiles, if given, are the compiled profiles of jobs (same order).
+        Returns one row per (resume, job) pair, best overall capability first.
+        """
+        if not resumes or not jobs:
+            return []
+        if job_profiles is None:
+            job_profiles = [self.compile_job_profile(j['description'], j['title']) for j in jobs]
+        
+        resume_matrix, resume_levels, confidence = self.profile_matrix([r['text'] for r in resumes])
+        job_matrix = np.zeros((len(jobs), len(self.matcher.skills)), dtype=bool)
+        for row, profile in enumerate(job_profiles):
+            job_matrix[row, profile['skill_ids']] = True
+        
+        # Same arithmetic as calculate_capability_score, for every pair at once
+        weighted_jobs = job_matrix * self.skill_weights
+        total_possible = weighted_jobs.sum(axis=1)
+        credit = resume_matrix.astype(np.float64)
+        if confidence is not None:
+            np.maximum(credit, confidence, out=credit)
+        actual = credit @ weighted_jobs.T
+        skill_match = np.divide(actual * 100, total_possible, out=np.zeros_like(actual), where=total_possible > 0)
+        
+        levels = self.experience_levels()
+        job_levels = [profile['level'] for profile in job_profiles]
+        compatibility = np.array([
+            [self.calculate_experience_compatibility(resume_level, job_level) for resume_level in levels]
+            for job_level in levels
+        ], dtype=np.float64)
+        level_index = {level: index for index, level in enumerate(levels)}
+        exp_compatibility = compatibility[
+            np.array([level_index[level] for level in job_levels])[np.newaxis, :],
+            np.array([level_index[level] for level in resume_levels])[:, np.newaxis]
+        ]
+        
+        overall = skill_match * 0.7 + exp_compatibility * 0.3
+        matching_counts = resume_matrix.astype(np.int32) @ job_matrix.T.astype(np.int32)
+        missing_counts = job_matrix.sum(axis=1)[np.newaxis, :] - matching_counts
+        
+        rows = []
+        for i, resume in enumerate(resumes):
+            for j, job in enumerate(jobs):
+                rows.append({
+                    'resume': resume['name'],
+                    'job': job['title'],
+                    'overall_capability': round(float(overall[i, j]), 1),
+                    'skill_match': round(float(skill_match[i, j]), 1),
+                    'experience_compatibility': round(float(exp_compatibility[i, j]), 1),
+                    'resume_experience_level': resume_levels[i],
+                    'job_level': job_levels[j],
+                    'matching_skills': int(matching_counts[i, j]),
+                    'missing_skills': int(missing_counts[i, j])
+                })
+        
+        rows.sort(key=lambda row: row['overall_capability'], reverse=True)
+        return rows
+    
+    def get_empty_analysis(self):
+        """Return empty analysis structure"""
+        return {
+            'overall_capability': 0,
+            'skill_match': 0,
+            'experience_compatibility': 0,
+            'resume_experience_level': 'unknown',
+            'job_level': 'unknown',
+            'matching_skills': {},
+            'missing_skills': {},
+            'semantic_matches': {},
+            'resume_skills': {},
+            'job_skills': {},
+            'skill_breakdown': {'total_possible': 0, 'actual_achieved': 0}
+        }
+    
+    def skill_context(self, analysis: Dict, limit: int = 12) -> str:
+        """Matching and missing skills for a prompt, heaviest categories first, at most limit of each"""
+        def listed(grouped):
+            ranked = sorted(grouped.items(), key=lambda item: -self.skill_keywords.get(item[0], {}).get('weight', 0))
+            skills = [skill for _, category_skills in ranked for skill in category_skills]
+            return ", ".join(skills[:limit]) or "none"
+        return (
+            f"Matching Skills: {listed(analysis.get('matching_skills', {}))}\n"
+            f"Missing Skills: {listed(analysis.get('missing_skills', {}))}"
+        )
+    
+    def analysis_summary(self, analysis: Dict) -> str:
+        return (
+            f"Overall Capability: {analysis['overall_capability']}%\n"
+            f"Skill Match: {analysis['skill_match']}%\n"
+            f"Experience Compatibility: {analysis['experience_compatibility']}%\n"
+            f"Candidate Level: {analysis['resume_experience_level']}\n"
+            f"Job Level: {analysis['job_level']}\n"
+            f"{self.skill_context(analysis)}"
+        )
+    
+    def document_excerpts(self, resume_text: str, job_description: str, analysis: Dict) -> Dict[str, str]:
+        """The resume and job sections most relevant to the matching/missing skills, within prompt_token_budget"""
+        from prompts import select_excerpts, share_budget
+        relevant = [
+            self.skill_lookup[(category, skill)]
+            for key in ('matching_skills', 'missing_skills')
+            for category, skills in analysis.get(key, {}).items()
+            for skill in skills
+            if (category, skill) in self.skill_lookup
+        ]
+        resume_budget, job_budget = share_budget(self.prompt_token_budget, [resume_text, job_description], [0.6, 0.4])
+        return {
+            'resume': select_excerpts(resume_text, self.matcher, self.skill_weights, relevant, resume_budget),
+            'job': select_excerpts(job_description, self.matcher, self.skill_weights, relevant, job_budget)
+        }
+    
+    def explanation_prompt(self, analysis: Dict) -> str:
+        """Prompt for the career-coach assessment"""
+        return f"""
+            As a career coach, provide a brief but insightful analysis of this job match:
+            
+            {self.analysis_summary(analysis)}
+            
+            Provide a 2-3 sentence professional assessment focusing on strengths and fit.
+            """
+    
+    def rule_based_explanation(self, analysis: Dict) -> str:
+        """Explanation used when Gemini is unavailable"""
+        score = analysis['overall_capability']
+        if score >= 85:
+            return "🧠 **AI Insight**: Excellent match! Strong technical alignment and ideal experience fit."
+        elif score >= 70:
+            return "📊 **AI Assessment**: Strong candidate with good technical alignment."
+        elif score >= 50:
+            return "💡 **AI Analysis**: Moderate fit with room for skill development."
+        else:
+            return "🎯 **AI Recommendation**: Foundational match - consider skill development."
+    
+    def complete(self, prompt: str) -> Optional[str]:
+        """LLM completion, or None without an LLM or when the call fails"""
+        if self.llm is None:
+            return None
+        try:
+            return self.llm(prompt) or None
+        except Exception:
+            return None
+    
+    def generate_ai_explanation(self, analysis: Dict) -> str:
+        """Create natural language explanations using Gemini"""
+        text = self.complete(self.explanation_prompt(analysis))
+        # Fallback to rule-based explanation
+        return text if text is not None else self.rule_based_explanation(analysis)
+    
+    def cover_letter_prompt(self, resume_text: str, job_description: str, job_title: str, analysis: Dict) -> str:
+        """Prompt for the cover letter"""
+        excerpts = self.document_excerpts(resume_text, job_description, analysis)
+        return f"""
+        Generate a professional cover letter for this job application:
+        
+        JOB TITLE: {job_title}
+        JOB DESCRIPTION EXCERPTS:
+        {excerpts['job']}
+        RESUME EXCERPTS:
+        {excerpts['resume']}
+        MATCH ANALYSIS: Overall capability: {analysis['overall_capability']}%
+        {self.skill_context(analysis)}
+        
+        Requirements:
+        {COVER_LETTER_REQUIREMENTS}
+        
+        Generate only the cover letter content without any additional explanations.
+        """
+    
+    def combined_prompt(self, analysis: Dict, fields=AI_SECTIONS, resume_text: str = "",
+                        job_description: str = "", job_title: str = "") -> str:
+        """One prompt answering several AI sections as a JSON object (resume/job text only matter for the letter)"""
+        instructions = {
+            'explanation': "a 2-3 sentence professional assessment focusing on strengths and fit",
+            'recommendation': "2-3 specific, actionable career recommendations for this candidate, as a markdown list",
+            'cover_letter': "the cover letter content only, meeting the requirements below"
+        }
+        keys = "\n".join(f'- "{name}": {instructions[name]}' for name in fields)
+        documents = ""
+        if 'cover_letter' in fields:
+            excerpts = self.document_excerpts(resume_text, job_description, analysis)
+            documents = (
+                f"JOB TITLE: {job_title}\nJOB DESCRIPTION EXCERPTS:\n{excerpts['job']}\n"
+                f"RESUME EXCERPTS:\n{excerpts['resume']}\n\n"
+                f"Cover letter requirements:\n{COVER_LETTER_REQUIREMENTS}\n\n"
+            )
+        return (
+            "As a career coach, review this job match and answer with a single JSON object "
+            "(no code fences, no other text) with these string fields:\n"
+            f"{keys}\n\nMATCH ANALYSIS:\n{self.analysis_summary(analysis)}\n\n{documents}"
+        )
+    
+    @staticmethod
+    def parse_ai_sections(response: str, fields=AI_SECTIONS) -> Dict[str, str]:
+        """Fields of a combined_prompt() answer that came back as non-empty strings; ValueError if it is not JSON"""
+        text = (response or "").strip()
+        start, end = text.find("{"), text.rfind("}")
+        if start < 0 or end < start:
+            raise ValueError("response is not a JSON object")
+        data = json.loads(text[start:end + 1])
+        if not isinstance(data, dict):
+            raise ValueError("response is not a JSON object")
+        return {name: data[name].strip() for name in fields if isinstance(data.get(name), str) and data[name].strip()}
+    
+    def generate_ai_sections(self, analysis: Dict, fields=AI_SECTIONS, resume_text: str = "",
+                             job_description: str = "", job_title: str = "") -> Dict[str, str]:
+        """All requested AI sections from one LLM call, with the usual fallback for any that are missing"""
+        sections = {}
+        response = self.complete(self.combined_prompt(analysis, fields, resume_text, job_description, job_title))
+        if response is not None:
+            try:
+                sections = self.parse_ai_sections(response, fields)
+            except ValueError:
+                pass
+        fallbacks = {
+            'explanation': lambda: self.rule_based_explanation(analysis),
+            'recommendation': lambda: self.rule_based_recommendation(analysis),
+            'cover_letter': lambda: "Gemini AI not available for cover letter generation."
+        }
+        return {name: sections[name] if name in sections else fallbacks[name]() for name in fields}
+    
+    def generate_cover_letter(self, resume_text: str, job_description: str, job_title: str, analysis: Dict) -> str:
+        """Generate cover letter using Gemini AI"""
+        text = self.complete(self.cover_letter_prompt(resume_text, job_description, job_title, analysis))
+        return text if text is not None else "Gemini AI not available for cover letter generation."
+    
+    def recommendation_prompt(self, analysis: Dict) -> str:
+        """Prompt for the career advice"""
+        return f"""
+            Based on this job match analysis, provide specific career advice:
+            
+            {self.analysis_summary(analysis)}
+            
+            Provide 2-3 specific, actionable recommendations for this candidate.
+            """
+    
+    def rule_based_recommendation(self, analysis: Dict) -> str:
+        """Recommendation used when Gemini is unavailable"""
+        overall = analysis['overall_capability']
+        if overall >= 80:
+            return "**Next Steps**: You're a strong candidate! Focus on interview preparation."
+        elif overall >= 60:
+            return "**Next Steps**: You're competitive! Develop 1-2 key missing skills."
+        else:
+            return "**Next Steps**: Build foundation in missing technical areas."
+    
+    def get_personalized_recommendation(self, analysis: Dict) -> str:
+        """Create tailored advice using Gemini"""
+        text = self.complete(self.recommendation_prompt(analysis))
+        # Fallback recommendations
+        return text if text is not None else self.rule_based_recommendation(analysis)
@@ -0,0 +1,124 @@
+# doc_cache.py
+"""Content-addressed cache for extracted resume text and skill profiles.
+
+Entries are keyed by the SHA-256 of the uploaded bytes (plus a namespace,
+so a taxonomy change never serves stale skills). A size-bounded LRU lives
+in memory; an optional SQLite file keeps entries across restarts.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+def content_key(data: bytes) -> str:
+    """SHA-256 hex digest of an upload"""
+    return hashlib.sha256(data).hexdigest()
+
+class DocumentCache:
+    """Two-tier (memory LRU + optional SQLite) cache of JSON-serializable entries"""
+
+    def __init__(self, max_memory_bytes: int = 64 * 1024 * 1024, disk_path: Optional[str] = None,
+                 max_disk_bytes: int = 512 * 1024 * 1024, namespace: str = ""):
+        self.max_memory_bytes = max_memory_bytes
+        self.max_disk_bytes = max_disk_bytes
+        self.namespace = namespace
+        self._memory = OrderedDict()  # key -> (payload, size)
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._db = None
+        if disk_path:
+            directory = os.path.dirname(os.path.abspath(disk_path))
+            os.makedirs(directory, exist_ok=True)
+            self._db = sqlite3.connect(disk_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                "key TEXT PRIMARY KEY, payload TEXT NOT NULL, size INTEGER NOT NULL, accessed REAL NOT NULL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed)")
+            self._db.commit()
+
+    def _full_key(self, key: str) -> str:
+        return f"{self.namespace}:{key}" if self.namespace else key
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the cached entry for a content key, or None"""
+        full_key = self._full_key(key)
+        with self._lock:
+            cached = self._memory.get(full_key)
+            if cached is not None:
+                self._memory.move_to_end(full_key)
+                self.hits += 1
+                return json.loads(cached[0])
+            if self._db is not None:
+                row = self._db.execute("SELECT payload FROM entries WHERE key = ?", (full_key,)).fetchone()
+                if row is not None:
+                    self._db.execute("UPDATE entries SET accessed = ? WHERE key = ?", (time.time(), full_key))
+                    self._db.commit()
+                    self._remember(full_key, row[0])
+                    self.hits += 1
+                    self.disk_hits += 1
+                    return json.loads(row[0])
+            self.misses += 1
+            return None
+
+    def put(self, key: str, entry: Dict[str, Any]):
+        """Store an entry in memory and, if configured, on disk"""
+        full_key = self._full_key(key)
+        payload = json.dumps(entry)
+        with self._lock:
+            self._remember(full_key, payload)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO entries (key, payload, size, accessed) VALUES (?, ?, ?, ?)",
+                    (full_key, payload, len(payload), time.time())
+                )
+                self._evict_disk()
+                self._db.commit()
+
+    def _remember(self, full_key: str, payload: str):
+        """Insert into the memory tier and evict least-recently-used entries over budget"""
+        size = len(payload)
+        previous = self._memory.pop(full_key, None)
+        if previous is not None:
+            self._memory_bytes -= previous[1]
+        if size > self.max_memory_bytes:
+            return
+        self._memory[full_key] = (payload, size)
+        self._memory_bytes += size
+        while self._memory_bytes > self.max_memory_bytes:
+            _, (_, evicted_size) = self._memory.popitem(last=False)
+            self._memory_bytes -= evicted_size
+            self.evictions += 1
+
+    def _evict_disk(self):
+        """Drop the least-recently-accessed disk entries until under the size budget"""
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_disk_bytes:
+            return
+        for key, size in self._db.execute("SELECT key, size FROM entries ORDER BY accessed").fetchall():
+            self._db.execute("DELETE FROM entries WHERE key = ?", (key,))
+            self.evictions += 1
+            total -= size
+            if total <= self.max_disk_bytes:
+                break
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and current memory usage"""
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'disk_hits': self.disk_hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0,
+            'evictions': self.evictions,
+            'memory_entries': len(self._memory),
+            'memory_bytes': self._memory_bytes
+        }
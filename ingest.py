@@ -0,0 +1,331 @@
+# ingest.py
+"""Document text extraction, spread across a process pool.
+
+Workers only import this module, so they start without Streamlit or the
+Gemini client; PyPDF2 and docx2txt are imported on first use. PDFs are
+split into page ranges so that one large upload uses several cores; a
+batch of uploads is submitted all at once. A PDF is written once to a
+temporary file, a worker counts its pages, and each worker keeps the last
+PDF it parsed, so page ranges neither re-send nor re-parse the document.
+
+PDF pages are extracted one at a time and each page's content and image
+streams are released once its text is out, so memory stays flat on
+image-heavy PDFs. IngestPool.iter_pages yields page texts as the page ranges
+complete and stops at the configured page and text-size limits.
+"""
+import io
+import os
+import tempfile
+import threading
+import time
+import multiprocessing
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, TimeoutError as FutureTimeoutError, wait
+from typing import Iterable, Iterator, List, Optional, Tuple, Union
+
+PDF_TYPE = "application/pdf"
+DOCX_TYPE = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+TXT_TYPE = "text/plain"
+SUPPORTED_TYPES = (PDF_TYPE, DOCX_TYPE, TXT_TYPE)
+
+class IngestError(Exception):
+    """Raised when a document cannot be extracted (bad file, timeout, unsupported type)"""
+
+# Worker functions (run inside the pool)
+_last_pdf = None  # (file identity, PdfReader) of the spooled PDF this process read last
+
+def open_pdf(source: Union[bytes, str]):
+    """PdfReader over PDF bytes or a spooled PDF file.
+
+    The reader of the last file is kept, so the page ranges of one document
+    that land on the same worker read and parse the file once.
+    """
+    global _last_pdf
+    from PyPDF2 import PdfReader
+    if not isinstance(source, str):
+        return PdfReader(io.BytesIO(source))
+    stat = os.stat(source)
+    identity = (source, stat.st_ino, stat.st_mtime_ns)
+    if _last_pdf is None or _last_pdf[0] != identity:
+        _last_pdf = None
+        with open(source, "rb") as f:
+            _last_pdf = (identity, PdfReader(io.BytesIO(f.read())))
+    return _last_pdf[1]
+
+def iter_pdf_pages(source: Union[bytes, str], start: int = 0, stop: Optional[int] = None) -> Iterator[str]:
+    """Yield the text of pages [start, stop) of a PDF (bytes or spooled file) one page at a time"""
+    from PyPDF2.generic import StreamObject
+    reader = open_pdf(source)
+    stop = len(reader.pages) if stop is None else min(stop, len(reader.pages))
+    for index in range(start, stop):
+        resolved = reader.resolved_objects
+        before = set(resolved)
+        page_text = reader.pages[index].extract_text()
+        # The reader caches every object it resolves; drop this page's content and image streams
+        for key in [key for key, value in resolved.items() if key not in before and isinstance(value, StreamObject)]:
+            del resolved[key]
+        yield page_text or ""
+
+def extract_pdf_pages(source: Union[bytes, str], start: int, stop: int) -> List[str]:
+    """Extract the text of pages [start, stop) of a PDF, skipping empty pages"""
+    return [text for text in iter_pdf_pages(source, start, stop) if text]
+
+def extract_docx(data: bytes) -> str:
+    """Extract text from DOCX bytes"""
+    import docx2txt
+    return docx2txt.process(io.BytesIO(data)) or ""
+
+def decode_txt(data: bytes) -> str:
+    """Decode a plain-text upload"""
+    return data.decode('utf-8')
+
+def count_pdf_pages(source: Union[bytes, str]) -> int:
+    """Number of pages in a PDF (only the page tree is parsed)"""
+    return len(open_pdf(source).pages)
+
+def join_pages(page_texts: List[str]) -> str:
+    """Join page texts the way the single-threaded extractor did"""
+    return "".join(text + "\n" for text in page_texts)
+
+def limit_pages(page_texts: Iterable[str], max_pages: Optional[int] = None,
+                max_bytes: Optional[int] = None) -> Iterator[str]:
+    """Pass page texts through until max_pages pages or max_bytes of UTF-8 text; the last page may be cut"""
+    total = 0
+    for count, text in enumerate(page_texts, 1):
+        if max_bytes is not None:
+            size = len(text.encode('utf-8'))
+            if total + size >= max_bytes:
+                yield text.encode('utf-8')[:max_bytes - total].decode('utf-8', errors='ignore')
+                return
+            total += size
+        yield text
+        if max_pages is not None and count >= max_pages:
+            return
+
+def extract_text(data: bytes, file_type: str) -> str:
+    """Extract a document in the current process"""
+    if file_type == PDF_TYPE:
+        return join_pages(extract_pdf_pages(data, 0, count_pdf_pages(data)))
+    if file_type == DOCX_TYPE:
+        return extract_docx(data)
+    if file_type == TXT_TYPE:
+        return decode_txt(data)
+    raise IngestError(f"Unsupported file type: {file_type}")
+
+def terminate_executor(executor: ProcessPoolExecutor):
+    """Shut a process pool down now, killing workers that are stuck on a task"""
+    processes = list((getattr(executor, "_processes", None) or {}).values())
+    executor.shutdown(wait=False, cancel_futures=True)
+    for process in processes:
+        process.terminate()
+
+class Extraction:
+    """One document's tasks on an IngestPool.
+
+    A PDF starts with a page-count task; its page ranges are queued once the
+    count is in. spool is the PDF's temporary file, removed when the
+    document has been collected.
+    """
+
+    def __init__(self, file_type: str, futures: List[Future], spool: Optional[str] = None):
+        self.file_type = file_type
+        self.futures = futures
+        self.spool = spool
+        self.expanded = file_type != PDF_TYPE
+
+    def discard(self):
+        for future in self.futures:
+            future.cancel()
+        if self.spool is not None:
+            # cancel() only stops ranges the pool has not handed to a worker yet. A range
+            # that already opened the file keeps reading it; one that opens it after this
+            # fails with FileNotFoundError, and nothing reads its result any more.
+            try:
+                os.remove(self.spool)
+            except OSError:
+                pass
+            self.spool = None
+
+class IngestPool:
+    """Process pool for PDF/DOCX extraction with per-file timeouts and size limits.
+
+    One pool serves every session. A worker stuck on a pathological file
+    cannot be killed on its own, so restart() retires the whole pool: new
+    work goes to a fresh one while the retired workers finish what other
+    callers queued on them, and only then are they killed.
+    """
+
+    def __init__(self, workers: int = None, timeout: float = 30.0, pages_per_task: int = 8,
+                 max_pages: Optional[int] = None, max_text_bytes: Optional[int] = None):
+        self.workers = workers or os.cpu_count() or 1
+        self.timeout = timeout
+        self.pages_per_task = max(1, pages_per_task)
+        self.max_pages = max_pages
+        self.max_text_bytes = max_text_bytes
+        self._executor = None
+        self._live = set()  # unfinished futures on the current executor
+        self._lock = threading.RLock()
+
+    @property
+    def executor(self) -> ProcessPoolExecutor:
+        # Spawned workers avoid forking the Streamlit server's threads
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn")
+                )
+            return self._executor
+
+    def _run(self, fn, *args) -> Future:
+        """Submit a task, tracking it until it finishes"""
+        with self._lock:
+            future = self.executor.submit(fn, *args)
+            live = self._live
+            live.add(future)
+        future.add_done_callback(live.discard)
+        return future
+
+    def _submit(self, data: bytes, file_type: str) -> Extraction:
+        """Queue the first tasks for one document"""
+        if file_type == PDF_TYPE:
+            # Written once and read by the workers, instead of pickling the PDF into every page range
+            fd, spool = tempfile.mkstemp(prefix="ingest-", suffix=".pdf")
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            try:
+                return Extraction(file_type, [self._run(count_pdf_pages, spool)], spool)
+            except BaseException:
+                os.remove(spool)
+                raise
+        if file_type == DOCX_TYPE:
+            return Extraction(file_type, [self._run(extract_docx, data)])
+        raise IngestError(f"Unsupported file type: {file_type}")
+
+    def _expand(self, extraction: Extraction, deadline: float):
+        """Queue a PDF's page ranges once a worker has counted its pages"""
+        if extraction.expanded:
+            return
+        page_count = extraction.futures[0].result(timeout=max(0.0, deadline - time.monotonic()))
+        if self.max_pages is not None:
+            page_count = min(page_count, self.max_pages)
+        extraction.futures = [
+            self._run(extract_pdf_pages, extraction.spool, start, min(start + self.pages_per_task, page_count))
+            for start in range(0, page_count, self.pages_per_task)
+        ]
+        extraction.expanded = True
+
+    def _iter_results(self, extraction: Extraction, restart_on_timeout: bool = True) -> Iterator:
+        """Yield one document's results in order, within the per-file timeout"""
+        deadline = time.monotonic() + self.timeout
+        try:
+            self._expand(extraction, deadline)
+            for future in extraction.futures:
+                yield future.result(timeout=max(0.0, deadline - time.monotonic()))
+        except FutureTimeoutError:
+            if restart_on_timeout:
+                self.restart(extraction.futures)
+            raise IngestError(f"Extraction timed out after {self.timeout:.0f}s")
+        finally:
+            # Stopping early (limit reached, consumer gone, error) leaves nothing queued
+            extraction.discard()
+
+    def _collect(self, extraction: Extraction, restart_on_timeout: bool = True) -> str:
+        """Wait up to the per-file timeout for one document's futures"""
+        if extraction.file_type == PDF_TYPE:
+            return join_pages(self._limit(
+                text for chunk in self._iter_results(extraction, restart_on_timeout) for text in chunk
+            ))
+        return "".join(self._limit(self._iter_results(extraction, restart_on_timeout)))
+
+    def _limit(self, page_texts: Iterable[str]) -> Iterator[str]:
+        return limit_pages(page_texts, self.max_pages, self.max_text_bytes)
+
+    def iter_pages(self, data: bytes, file_type: str) -> Iterator[str]:
+        """Yield a document's non-empty page texts in order as workers finish them.
+
+        A DOCX or TXT file comes through as a single page. Iteration stops at
+        the page and text-size limits, and unstarted page ranges are cancelled.
+        """
+        if file_type == TXT_TYPE:
+            yield from self._limit([decode_txt(data)])
+            return
+        results = self._iter_results(self._submit(data, file_type))
+        if file_type == PDF_TYPE:
+            results = (text for chunk in results for text in chunk)
+        yield from self._limit(results)
+
+    def extract(self, data: bytes, file_type: str) -> str:
+        """Extract one document, splitting PDF pages across workers"""
+        if file_type == TXT_TYPE:
+            return "".join(self._limit([decode_txt(data)]))
+        return self._collect(self._submit(data, file_type))
+
+    def extract_many(self, files: List[Tuple[bytes, str]]) -> List[Tuple[str, str]]:
+        """Extract a batch of (data, file_type) documents concurrently.
+
+        Returns (text, error) per input in the same order; error is "" on success.
+        """
+        submitted = []
+        for data, file_type in files:
+            try:
+                if file_type == TXT_TYPE:
+                    submitted.append(("".join(self._limit([decode_txt(data)])), None))
+                else:
+                    submitted.append((None, self._submit(data, file_type)))
+            except Exception as e:
+                submitted.append((e, None))
+
+        # Page counts come back quickly; queue every PDF's page ranges before waiting on any one document
+        counting = [extraction for _, extraction in submitted if extraction is not None and not extraction.expanded]
+        wait([extraction.futures[0] for extraction in counting], timeout=self.timeout)
+        for extraction in counting:
+            if extraction.futures[0].done() and extraction.futures[0].exception() is None:
+                self._expand(extraction, time.monotonic())
+
+        # Retiring the pool mid-batch would let the later files' tasks run out of time, so do it once at the end
+        results = []
+        abandoned = []
+        for value, extraction in submitted:
+            if extraction is None:
+                results.append(("", str(value)) if isinstance(value, Exception) else (value, ""))
+                continue
+            try:
+                results.append((self._collect(extraction, restart_on_timeout=False), ""))
+            except IngestError as e:
+                abandoned.extend(extraction.futures)
+                results.append(("", str(e)))
+            except Exception as e:
+                results.append(("", str(e)))
+        if abandoned:
+            self.restart(abandoned)
+        return results
+
+    def restart(self, abandoned: Iterable[Future] = ()):
+        """Retire the pool (e.g. a worker is stuck on a pathological PDF); new work starts a fresh one.
+
+        abandoned are the timed-out tasks. If none of them is on the current
+        pool, it was retired already and is kept. The retired pool is killed
+        once the other tasks on it stop making progress.
+        """
+        abandoned = set(abandoned)
+        with self._lock:
+            if abandoned and self._live.isdisjoint(abandoned):
+                return
+            executor, live = self._executor, self._live
+            self._executor, self._live = None, set()
+        if executor is None:
+            return
+
+        def drain():
+            pending = [future for future in list(live) if future not in abandoned]
+            while pending:
+                finished, pending = wait(pending, timeout=self.timeout, return_when=FIRST_COMPLETED)
+                if not finished:
+                    break
+            terminate_executor(executor)
+        threading.Thread(target=drain, name="ingest-drain", daemon=True).start()
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
@@ -0,0 +1,117 @@
+# job_profiles.py
+"""Precompiled job profiles keyed by job content.
+
+A job profile (see ResumeAnalyzer.compile_job_profile) holds the job's skills,
+skill IDs, total possible weighted score and level, so per-request analysis
+only has to process the resume. Profiles are keyed by the SHA-256 of the
+title and description and stamped with the analyzer fingerprint: a stored
+profile compiled under a different taxonomy is recompiled when loaded. After
+a weight change only the weight-dependent fields are refreshed, on next use.
+
+Saved custom jobs are kept in SQLite together with their description, so
+they survive restarts and can be recompiled after a taxonomy change.
+"""
+import json
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional
+
+from doc_cache import content_key
+
+def job_key(job_description: str, job_title: str) -> str:
+    """Content hash of a job's title and description"""
+    return content_key(f"{job_title}\x00{job_description}".encode('utf-8'))
+
+class JobProfileStore:
+    """In-memory job profiles with optional SQLite persistence of saved jobs"""
+
+    def __init__(self, analyzer, path: Optional[str] = None, max_profiles: int = 10000):
+        self.analyzer = analyzer
+        self.max_profiles = max_profiles
+        self._profiles = OrderedDict()  # key -> profile compiled under analyzer.fingerprint, LRU order
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self._db = None
+        if path:
+            directory = os.path.dirname(os.path.abspath(path))
+            os.makedirs(directory, exist_ok=True)
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                "key TEXT PRIMARY KEY, title TEXT NOT NULL, description TEXT NOT NULL, "
+                "fingerprint TEXT NOT NULL, profile TEXT NOT NULL)"
+            )
+            self._db.commit()
+            self._load()
+
+    def _load(self):
+        """Load stored profiles, recompiling any built under another taxonomy"""
+        rows = self._db.execute("SELECT key, title, description, fingerprint, profile FROM jobs").fetchall()
+        stale = []
+        for key, title, description, fingerprint, profile in rows:
+            if fingerprint == self.analyzer.fingerprint:
+                self._profiles[key] = json.loads(profile)
+            else:
+                self._profiles[key] = self.analyzer.compile_job_profile(description, title)
+                stale.append((self.analyzer.fingerprint, json.dumps(self._profiles[key]), key))
+        if stale:
+            self._db.executemany("UPDATE jobs SET fingerprint = ?, profile = ? WHERE key = ?", stale)
+            self._db.commit()
+
+    def get(self, job_description: str, job_title: str) -> Dict[str, Any]:
+        """Profile for a job, compiled on first use"""
+        key = job_key(job_description, job_title)
+        with self._lock:
+            profile = self._profiles.get(key)
+            if profile is not None:
+                if profile.get('weights') != self.analyzer.weights_fingerprint:
+                    profile = self._profiles[key] = self.analyzer.reweight_job_profile(profile)
+                self._profiles.move_to_end(key)
+                self.hits += 1
+                return profile
+            self.misses += 1
+        profile = self.analyzer.compile_job_profile(job_description, job_title)
+        with self._lock:
+            self._profiles[key] = profile
+            while len(self._profiles) > self.max_profiles:
+                self._profiles.popitem(last=False)
+        return profile
+
+    def warm(self, jobs: Iterable[Dict[str, str]]):
+        """Compile profiles for [{'title', 'description'}] ahead of the first request"""
+        for job in jobs:
+            self.get(job['description'], job['title'])
+
+    def save(self, job_description: str, job_title: str) -> Dict[str, Any]:
+        """Compile a custom job and keep it (and its description) for later sessions"""
+        profile = self.get(job_description, job_title)
+        if self._db is not None:
+            with self._lock:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO jobs (key, title, description, fingerprint, profile) VALUES (?, ?, ?, ?, ?)",
+                    (job_key(job_description, job_title), job_title, job_description,
+                     self.analyzer.fingerprint, json.dumps(profile))
+                )
+                self._db.commit()
+        return profile
+
+    def saved_jobs(self) -> List[Dict[str, str]]:
+        """Saved custom jobs as [{'title', 'description'}], oldest first"""
+        if self._db is None:
+            return []
+        with self._lock:
+            rows = self._db.execute("SELECT title, description FROM jobs ORDER BY rowid").fetchall()
+        return [{'title': title, 'description': description} for title, description in rows]
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and profile count"""
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0,
+            'profiles': len(self._profiles)
+        }
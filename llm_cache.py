@@ -0,0 +1,90 @@
+# llm_cache.py
+"""On-disk cache of Gemini responses keyed by a prompt fingerprint.
+
+The explanation and recommendation prompts only vary with a few rounded
+scores and levels, so identical prompts recur across users. Responses are
+kept in SQLite with a TTL and least-recently-used eviction. Prompts that
+quote a resume (cover letters) are personal data and are never stored;
+callers pass store=False to GeminiClient for them.
+"""
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional
+
+def normalize_prompt(prompt: str) -> str:
+    """Collapse whitespace so indentation differences do not change the key"""
+    return re.sub(r"\s+", " ", prompt).strip()
+
+def prompt_fingerprint(model: str, prompt: str) -> str:
+    """SHA-256 of the model name and normalized prompt"""
+    return hashlib.sha256(f"{model}\n{normalize_prompt(prompt)}".encode('utf-8')).hexdigest()
+
+class ResponseCache:
+    """SQLite-backed prompt -> response cache with TTL, LRU eviction and hit-rate metrics"""
+
+    def __init__(self, path: str, ttl_seconds: float = 7 * 24 * 3600, max_entries: int = 10000):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, model TEXT NOT NULL, response TEXT NOT NULL, "
+            "created REAL NOT NULL, accessed REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed)")
+        self._db.commit()
+
+    def get(self, model: str, prompt: str) -> Optional[str]:
+        """Cached response for (model, prompt), or None if absent or expired"""
+        key = prompt_fingerprint(model, prompt)
+        now = time.time()
+        with self._lock:
+            row = self._db.execute("SELECT response, created FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None or now - row[1] > self.ttl_seconds:
+                if row is not None:
+                    self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    self._db.commit()
+                self.misses += 1
+                return None
+            self._db.execute("UPDATE responses SET accessed = ? WHERE key = ?", (now, key))
+            self._db.commit()
+            self.hits += 1
+            return row[0]
+
+    def put(self, model: str, prompt: str, response: str):
+        """Store a successful response and trim the cache to max_entries"""
+        key = prompt_fingerprint(model, prompt)
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses (key, model, response, created, accessed) VALUES (?, ?, ?, ?, ?)",
+                (key, model, response, now, now)
+            )
+            self._db.execute("DELETE FROM responses WHERE created < ?", (now - self.ttl_seconds,))
+            self._db.execute(
+                "DELETE FROM responses WHERE key IN ("
+                "SELECT key FROM responses ORDER BY accessed DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            )
+            self._db.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and entry count"""
+        lookups = self.hits + self.misses
+        with self._lock:
+            entries = self._db.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0,
+            'entries': entries
+        }
@@ -0,0 +1,321 @@
+# llm_client.py
+"""Thread-pooled Gemini client.
+
+GenerativeModel objects are created once per model name and reused, and
+prompts can be submitted concurrently so a page that needs several
+completions waits for the slowest one rather than the sum of all.
+
+Calls go through a token-bucket rate limiter shared by every session and
+retry transient errors (quota, 5xx, timeouts) with exponential backoff and
+full jitter. A circuit breaker stops calling the API after repeated
+failures, and identical prompts already in flight share one call. When the
+API cannot be used, LLMUnavailable is raised so callers can fall back to
+the rule-based texts.
+"""
+import random
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+from llm_cache import ResponseCache
+from metrics import REGISTRY, SIZE_BUCKETS
+
+DEFAULT_MODEL = "gemini-pro"
+
+# Error class names (google.api_core and builtins) and HTTP codes worth retrying
+RETRYABLE_ERRORS = ('ResourceExhausted', 'TooManyRequests', 'ServiceUnavailable', 'InternalServerError',
+                    'DeadlineExceeded', 'GatewayTimeout', 'TimeoutError', 'ConnectionError')
+RETRYABLE_CODES = (429, 500, 502, 503, 504)
+
+class LLMUnavailable(Exception):
+    """The API is not being called right now (circuit open or rate limit wait too long)"""
+
+def is_retryable(error: Exception) -> bool:
+    """Whether an API error is transient"""
+    if any(cls.__name__ in RETRYABLE_ERRORS for cls in type(error).__mro__):
+        return True
+    code = getattr(error, 'code', None)
+    return getattr(code, 'value', code) in RETRYABLE_CODES
+
+class TokenBucket:
+    """Blocking token-bucket rate limiter"""
+
+    def __init__(self, rate_per_second: float, burst: int):
+        self.rate = rate_per_second
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, timeout: float) -> bool:
+        """Take one token, waiting up to timeout seconds; False if none became available"""
+        deadline = time.monotonic() + timeout
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return True
+                wait_seconds = (1 - self.tokens) / self.rate
+            if now + wait_seconds > deadline:
+                return False
+            time.sleep(wait_seconds)
+
+class CircuitBreaker:
+    """Opens after consecutive failures; after reset_timeout one trial call is let through"""
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        return "half-open" if time.monotonic() - self.opened_at >= self.reset_timeout else "open"
+
+    def allow(self) -> bool:
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return True
+            if state == "half-open" and not self._trial_running:
+                self._trial_running = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial_running = False
+
+    def release_trial(self):
+        """End a trial call that finished without an outcome (e.g. an abandoned stream); the next call retries"""
+        with self._lock:
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._trial_running or self.failures >= self.failure_threshold:
+                if self.opened_at is None or self._trial_running:
+                    REGISTRY.inc("llm_circuit_opened_total")
+                self.opened_at = time.monotonic()
+            self._trial_running = False
+
+class GeminiClient:
+    """Shared Gemini client with a worker pool, per-call timeouts, rate limiting and retries.
+
+    model_factory builds a model object from a model name (default:
+    genai.GenerativeModel); llm_fake.FakeModel can stand in for tests.
+    """
+
+    def __init__(self, model: str = DEFAULT_MODEL, max_workers: int = 4, timeout: float = 60.0,
+                 cache: ResponseCache = None, requests_per_minute: float = 60.0, burst: int = 10,
+                 max_retries: int = 3, backoff_base: float = 0.5, backoff_max: float = 8.0,
+                 breaker: CircuitBreaker = None, model_factory: Callable[[str], Any] = None):
+        self.default_model = model
+        self.timeout = timeout
+        self.cache = cache
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.limiter = TokenBucket(requests_per_minute / 60.0, burst)
+        self.breaker = breaker or CircuitBreaker()
+        self.model_factory = model_factory
+        self._models = {}
+        self._in_flight = {}  # (model, prompt) -> Future shared by identical concurrent calls
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="gemini")
+
+    def get_model(self, model: str = None):
+        """Return the cached GenerativeModel for a model name"""
+        name = model or self.default_model
+        with self._lock:
+            if name not in self._models:
+                if self.model_factory is not None:
+                    self._models[name] = self.model_factory(name)
+                else:
+                    import google.generativeai as genai
+                    self._models[name] = genai.GenerativeModel(name)
+            return self._models[name]
+
+    def _admit(self):
+        """Pass the rate limiter and circuit breaker, or raise LLMUnavailable"""
+        if not self.limiter.acquire(timeout=self.timeout):
+            REGISTRY.inc("llm_rate_limited_total")
+            raise LLMUnavailable("AI request rate limit reached")
+        if not self.breaker.allow():
+            REGISTRY.inc("llm_short_circuited_total")
+            raise LLMUnavailable("AI service temporarily disabled after repeated errors")
+
+    def _backoff(self, attempt: int) -> float:
+        """Full-jitter exponential backoff"""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    def _request_options(self) -> Dict[str, Any]:
+        """Per-request options; the timeout is the API deadline, so a hung call fails instead of holding a thread"""
+        return {'timeout': self.timeout}
+
+    def _call(self, name: str, prompt: str) -> str:
+        """One completion with retries on transient errors"""
+        for attempt in range(self.max_retries + 1):
+            self._admit()
+            try:
+                text = self.get_model(name).generate_content(prompt, request_options=self._request_options()).text
+            except Exception as e:
+                retryable = is_retryable(e)
+                if retryable:
+                    self.breaker.record_failure()
+                else:
+                    # The API answered (e.g. a blocked prompt); that is not an outage
+                    self.breaker.record_success()
+                if not retryable or attempt == self.max_retries:
+                    raise
+                REGISTRY.inc("llm_retries_total")
+                time.sleep(self._backoff(attempt))
+            except BaseException:
+                self.breaker.release_trial()
+                raise
+            else:
+                self.breaker.record_success()
+                return text
+
+    def stats(self) -> Dict[str, float]:
+        """Circuit state (0 closed, 1 half-open, 2 open), consecutive failures and calls in flight"""
+        return {
+            'circuit_state': {"closed": 0, "half-open": 1, "open": 2}[self.breaker.state],
+            'consecutive_failures': self.breaker.failures,
+            'in_flight': len(self._in_flight)
+        }
+
+    def _record_sizes(self, prompt: str, response: str):
+        """Payload sizes; tokens are estimated at ~4 characters each"""
+        REGISTRY.observe("llm_prompt_bytes", len(prompt.encode('utf-8')), buckets=SIZE_BUCKETS)
+        REGISTRY.observe("llm_response_bytes", len(response.encode('utf-8')), buckets=SIZE_BUCKETS)
+        REGISTRY.inc("llm_prompt_tokens_estimated_total", amount=len(prompt) // 4)
+        REGISTRY.inc("llm_response_tokens_estimated_total", amount=len(response) // 4)
+
+    def generate(self, prompt: str, model: str = None, store: bool = True) -> str:
+        """Blocking completion (served from the response cache when possible).
+
+        Identical prompts already in flight wait for that call instead of
+        making their own. store=False keeps the prompt and response out of
+        the response cache (e.g. prompts quoting a resume). Raises
+        LLMUnavailable or the API error.
+        """
+        name = model or self.default_model
+        if store and self.cache is not None:
+            cached = self.cache.get(name, prompt)
+            if cached is not None:
+                return cached
+        key = (name, prompt)
+        with self._lock:
+            shared = self._in_flight.get(key)
+            if shared is None:
+                owner = self._in_flight[key] = Future()
+        if shared is not None:
+            REGISTRY.inc("llm_coalesced_total")
+            return shared.result()
+        try:
+            with REGISTRY.timer("llm_generate"):
+                text = self._call(name, prompt)
+            self._record_sizes(prompt, text)
+            if store and self.cache is not None:
+                self.cache.put(name, prompt, text)
+            owner.set_result(text)
+            return text
+        except BaseException as e:
+            owner.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+
+    def stream(self, prompt: str, model: str = None, cancel: Optional[threading.Event] = None,
+               store: bool = True) -> Iterator[str]:
+        """Yield response text chunks as they arrive; stops early once cancel is set.
+
+        Only complete responses are written to the cache, and none with store=False.
+        """
+        name = model or self.default_model
+        if store and self.cache is not None:
+            cached = self.cache.get(name, prompt)
+            if cached is not None:
+                yield cached
+                return
+        parts = []
+        with REGISTRY.timer("llm_stream"):
+            # Retried only until the first chunk arrives; after that a failure ends the stream
+            for attempt in range(self.max_retries + 1):
+                self._admit()
+                settled = False
+                try:
+                    for chunk in self.get_model(name).generate_content(
+                            prompt, stream=True, request_options=self._request_options()):
+                        if cancel is not None and cancel.is_set():
+                            settled = True
+                            self.breaker.record_success()
+                            return
+                        parts.append(chunk.text)
+                        yield parts[-1]
+                except Exception as e:
+                    settled = True
+                    retryable = is_retryable(e)
+                    if retryable:
+                        self.breaker.record_failure()
+                    else:
+                        self.breaker.record_success()
+                    if parts or not retryable or attempt == self.max_retries:
+                        raise
+                    REGISTRY.inc("llm_retries_total")
+                    time.sleep(self._backoff(attempt))
+                else:
+                    settled = True
+                    self.breaker.record_success()
+                    break
+                finally:
+                    if not settled:
+                        # Abandoned by the consumer (GeneratorExit on a Streamlit rerun or Stop):
+                        # chunks arriving means the API is up; otherwise just free the trial slot
+                        if parts:
+                            self.breaker.record_success()
+                        else:
+                            self.breaker.release_trial()
+        self._record_sizes(prompt, "".join(parts))
+        if store and self.cache is not None:
+            self.cache.put(name, prompt, "".join(parts))
+
+    def submit(self, prompt: str, model: str = None, store: bool = True) -> Future:
+        """Run generate() on the pool"""
+        return self._executor.submit(self.generate, prompt, model, store)
+
+    def iter_completed(self, futures: Dict[str, Future], timeout: float = None) -> Iterator[Tuple[str, str, Exception]]:
+        """Yield (name, text, error) for each named future as it finishes.
+
+        Calls still running when the timeout expires are yielded with a
+        TimeoutError (their threads finish in the background and are ignored).
+        """
+        limit = self.timeout if timeout is None else timeout
+        deadline = time.monotonic() + limit
+        pending = {future: name for name, future in futures.items()}
+        while pending:
+            remaining = deadline - time.monotonic()
+            done, _ = wait(list(pending), timeout=max(0.0, remaining), return_when=FIRST_COMPLETED)
+            if not done:
+                for future, name in pending.items():
+                    future.cancel()
+                    yield name, "", TimeoutError(f"no response after {limit:g}s")
+                return
+            for future in done:
+                name = pending.pop(future)
+                error = future.exception()
+                yield name, "" if error else future.result(), error
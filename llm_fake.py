@@ -0,0 +1,74 @@
+# llm_fake.py
+"""Offline stand-in for the Gemini API, for tests and local development.
+
+    client = GeminiClient(model_factory=FakeModel.factory(latency=0.2, failures=2))
+
+Replies are deterministic (derived from the prompt), and the first
+`failures` calls raise a retryable 503-style error, so retries, the circuit
+breaker and request coalescing can be exercised without network access.
+Set GEMINI_FAKE=1 to run the app against it.
+"""
+import hashlib
+import json
+import re
+import threading
+import time
+from typing import Callable, Iterator, Optional
+
+class FakeServiceUnavailable(Exception):
+    """Retryable error, shaped like google.api_core's ServiceUnavailable"""
+    code = 503
+
+class FakeResponse:
+    def __init__(self, text: str):
+        self.text = text
+
+class FakeModel:
+    """Duck-typed genai.GenerativeModel returning canned replies"""
+
+    def __init__(self, name: str = "fake", reply: Optional[Callable[[str], str]] = None, failures: int = 0,
+                 latency: float = 0.0, chunk_words: int = 5):
+        self.name = name
+        self.reply = reply or self.default_reply
+        self.failures = failures
+        self.latency = latency
+        self.chunk_words = max(1, chunk_words)
+        self.calls = 0
+        self.request_options = []  # request_options of every call, newest last
+        self._lock = threading.Lock()
+
+    @classmethod
+    def factory(cls, **kwargs) -> Callable[[str], 'FakeModel']:
+        """model_factory for GeminiClient"""
+        return lambda name: cls(name, **kwargs)
+
+    @staticmethod
+    def default_reply(prompt: str) -> str:
+        digest = hashlib.sha256(prompt.encode('utf-8')).hexdigest()[:8]
+        text = f"Offline AI response {digest}: the candidate shows relevant strengths for this role."
+        # Combined requests (ResumeAnalyzer.combined_prompt) list the JSON fields they want as '- "name":'
+        fields = re.findall(r'^- "(\w+)":', prompt, flags=re.MULTILINE)
+        return json.dumps({field: text for field in fields}) if fields else text
+
+    def _start_call(self, request_options: Optional[dict]):
+        with self._lock:
+            self.calls += 1
+            self.request_options.append(request_options)
+            failing = self.calls <= self.failures
+        if self.latency:
+            time.sleep(self.latency)
+        if failing:
+            raise FakeServiceUnavailable("503 fake service unavailable")
+
+    def generate_content(self, prompt: str, stream: bool = False, request_options: Optional[dict] = None):
+        self._start_call(request_options)
+        text = self.reply(prompt)
+        if not stream:
+            return FakeResponse(text)
+        return self._chunks(text)
+
+    def _chunks(self, text: str) -> Iterator[FakeResponse]:
+        words = text.split(" ")
+        for start in range(0, len(words), self.chunk_words):
+            piece = " ".join(words[start:start + self.chunk_words])
+            yield FakeResponse(piece if start == 0 else " " + piece)
@@ -0,0 +1,187 @@
+# metrics.py
+"""Lightweight, process-wide instrumentation.
+
+Records per-stage latency histograms, call and error counts, payload sizes
+and cache statistics, and renders them in the Prometheus text format
+(served over HTTP, written to a file, or shown in the Streamlit debug panel).
+"""
+import functools
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Tuple
+
+PREFIX = "resume_analyzer"
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+SIZE_BUCKETS = (64, 256, 1024, 4096, 16384, 65536, 262144, 1048576)
+
+def _label_key(labels: Dict[str, str]) -> Tuple[Tuple[str, str], ...]:
+    return tuple(sorted((labels or {}).items()))
+
+def _format_labels(labels: Tuple[Tuple[str, str], ...], extra: Tuple[Tuple[str, str], ...] = ()) -> str:
+    pairs = labels + extra
+    if not pairs:
+        return ""
+    escaped = (value.replace("\\", "\\\\").replace('"', '\\"') for _, value in pairs)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus sense"""
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.count += 1
+        self.sum += value
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[index] += 1
+
+class MetricsRegistry:
+    """Thread-safe store of counters, histograms and gauge collectors"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}  # name -> {labels: value}
+        self._histograms = {}  # name -> {labels: Histogram}
+        self._collectors = {}  # name -> fn returning {metric: value}
+
+    def inc(self, name: str, labels: Dict[str, str] = None, amount: float = 1):
+        key = _label_key(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + amount
+
+    def observe(self, name: str, value: float, labels: Dict[str, str] = None,
+                buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        key = _label_key(labels)
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            if key not in series:
+                series[key] = Histogram(buckets)
+            series[key].observe(value)
+
+    @contextmanager
+    def timer(self, stage: str):
+        """Time a stage; exceptions are counted as errors and re-raised"""
+        labels = {"stage": stage}
+        start = time.perf_counter()
+        try:
+            yield
+        except Exception:
+            self.inc("stage_errors_total", labels)
+            raise
+        finally:
+            self.observe("stage_seconds", time.perf_counter() - start, labels)
+            self.inc("stage_calls_total", labels)
+
+    def record_error(self, stage: str):
+        """Count an error that was handled (and turned into a message) by the caller"""
+        self.inc("stage_errors_total", {"stage": stage})
+
+    def register_collector(self, name: str, collect: Callable[[], Dict[str, float]]):
+        """Register (or replace) a callback whose values are exported as gauges"""
+        with self._lock:
+            self._collectors[name] = collect
+
+    def render(self) -> str:
+        """Prometheus text exposition format"""
+        lines = []
+        with self._lock:
+            counters = {name: dict(series) for name, series in self._counters.items()}
+            histograms = {name: dict(series) for name, series in self._histograms.items()}
+            collectors = dict(self._collectors)
+
+        for name in sorted(counters):
+            full_name = f"{PREFIX}_{name}"
+            lines.append(f"# TYPE {full_name} counter")
+            for labels, value in sorted(counters[name].items()):
+                lines.append(f"{full_name}{_format_labels(labels)} {value}")
+
+        for name in sorted(histograms):
+            full_name = f"{PREFIX}_{name}"
+            lines.append(f"# TYPE {full_name} histogram")
+            for labels, histogram in sorted(histograms[name].items()):
+                for bound, count in zip(histogram.buckets, histogram.counts):
+                    lines.append(f"{full_name}_bucket{_format_labels(labels, (('le', repr(float(bound))),))} {count}")
+                lines.append(f"{full_name}_bucket{_format_labels(labels, (('le', '+Inf'),))} {histogram.count}")
+                lines.append(f"{full_name}_sum{_format_labels(labels)} {histogram.sum}")
+                lines.append(f"{full_name}_count{_format_labels(labels)} {histogram.count}")
+
+        for source in sorted(collectors):
+            try:
+                values = collectors[source]()
+            except Exception:
+                continue
+            for metric, value in sorted(values.items()):
+                if isinstance(value, bool) or not isinstance(value, (int, float)):
+                    continue
+                full_name = f"{PREFIX}_{source}_{metric}"
+                lines.append(f"# TYPE {full_name} gauge")
+                lines.append(f"{full_name} {value}")
+        return "\n".join(lines) + "\n"
+
+    def stage_summary(self) -> Dict[str, Dict[str, float]]:
+        """Per-stage calls, errors and mean latency (for the debug panel)"""
+        with self._lock:
+            latencies = dict(self._histograms.get("stage_seconds", {}))
+            errors = dict(self._counters.get("stage_errors_total", {}))
+        summary = {}
+        for labels, histogram in latencies.items():
+            stage = dict(labels)["stage"]
+            summary[stage] = {
+                "calls": histogram.count,
+                "errors": errors.get(labels, 0),
+                "mean_ms": round(histogram.sum / histogram.count * 1000, 2) if histogram.count else 0.0,
+                "total_s": round(histogram.sum, 3)
+            }
+        for labels, count in errors.items():
+            stage = dict(labels)["stage"]
+            summary.setdefault(stage, {"calls": 0, "errors": count, "mean_ms": 0.0, "total_s": 0.0})
+        return summary
+
+    def write(self, path: str):
+        """Write the exposition to a file (for node_exporter's textfile collector)"""
+        temp_path = f"{path}.tmp"
+        with open(temp_path, "w") as f:
+            f.write(self.render())
+        os.replace(temp_path, path)
+
+REGISTRY = MetricsRegistry()
+
+def instrument(stage: str):
+    """Decorator form of REGISTRY.timer"""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with REGISTRY.timer(stage):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def serve(port: int, host: str = "0.0.0.0", registry: MetricsRegistry = REGISTRY) -> ThreadingHTTPServer:
+    """Serve /metrics from a daemon thread"""
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = registry.render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    return server
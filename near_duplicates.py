@@ -0,0 +1,153 @@
+# near_duplicates.py
+"""Near-duplicate detection for extracted resume text (MinHash + LSH).
+
+Re-uploads, the same resume saved as PDF and DOCX, or a copy with a
+changed phone number all hash differently, so the content-addressed
+caches miss them. Here each text becomes a set of word shingles (built
+with core.tokenize, so case and punctuation do not matter), summarized
+by a MinHash signature. Signatures are split into LSH bands, so a lookup
+only compares against documents that share a band. The estimated Jaccard
+similarity of those candidates is then checked against the threshold.
+"""
+import os
+import sqlite3
+import threading
+import zlib
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+from core import tokenize
+
+MERSENNE_PRIME = (1 << 31) - 1
+
+def lsh_shape(num_perm: int, threshold: float) -> Tuple[int, int]:
+    """(bands, rows) whose candidate curve rises a little below the threshold, so few true matches are missed"""
+    best = (num_perm, 1)
+    for rows in range(1, num_perm + 1):
+        if num_perm % rows:
+            continue
+        bands = num_perm // rows
+        if (1 / bands) ** (1 / rows) <= threshold - 0.1:
+            best = (bands, rows)
+    return best
+
+class NearDuplicateIndex:
+    """MinHash signatures in an LSH index, optionally persisted to SQLite"""
+
+    def __init__(self, threshold: float = 0.9, num_perm: int = 128, shingle_size: int = 3,
+                 path: Optional[str] = None, seed: int = 1, chunk_size: int = 4096):
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        self.chunk_size = chunk_size
+        self.bands, self.rows = lsh_shape(num_perm, threshold)
+        # Fixed seed: signatures stored on disk stay comparable across restarts
+        generator = np.random.RandomState(seed)
+        self._a = generator.randint(1, MERSENNE_PRIME, size=num_perm, dtype=np.int64).astype(np.uint64)
+        self._b = generator.randint(0, MERSENNE_PRIME, size=num_perm, dtype=np.int64).astype(np.uint64)
+        self._signatures = {}  # key -> signature
+        self._buckets = [{} for _ in range(self.bands)]  # band -> {band bytes: [keys]}
+        self._lock = threading.Lock()
+        self.queries = 0
+        self.duplicates = 0
+        self._db = None
+        if path:
+            directory = os.path.dirname(os.path.abspath(path))
+            os.makedirs(directory, exist_ok=True)
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute("CREATE TABLE IF NOT EXISTS signatures (key TEXT PRIMARY KEY, signature BLOB NOT NULL)")
+            self._db.commit()
+            for key, blob in self._db.execute("SELECT key, signature FROM signatures").fetchall():
+                signature = np.frombuffer(blob, dtype=np.uint32)
+                if len(signature) == num_perm:
+                    self._insert(key, signature)
+
+    def shingles(self, text: str) -> np.ndarray:
+        """31-bit hashes of the text's word shingles"""
+        tokens = tokenize(text)
+        if not tokens:
+            return np.zeros(0, dtype=np.uint64)
+        hashes = np.array([zlib.crc32(token.encode('utf-8')) for token in tokens], dtype=np.uint64)
+        size = min(self.shingle_size, len(hashes))
+        prime = np.uint64(MERSENNE_PRIME)
+        combined = np.zeros(len(hashes) - size + 1, dtype=np.uint64)
+        for offset in range(size):
+            combined = (combined * np.uint64(1000003) + hashes[offset:offset + len(combined)]) % prime
+        return np.unique(combined)
+
+    def signature(self, text: str) -> Optional[np.ndarray]:
+        """MinHash signature of a text (None for text without tokens)"""
+        shingles = self.shingles(text)
+        if not len(shingles):
+            return None
+        prime = np.uint64(MERSENNE_PRIME)
+        signature = np.full(self.num_perm, MERSENNE_PRIME, dtype=np.uint64)
+        # Chunked so a huge document never builds a num_perm x shingles matrix at once
+        for start in range(0, len(shingles), self.chunk_size):
+            chunk = shingles[start:start + self.chunk_size]
+            values = (self._a[:, np.newaxis] * chunk[np.newaxis, :] + self._b[:, np.newaxis]) % prime
+            np.minimum(signature, values.min(axis=1), out=signature)
+        return signature.astype(np.uint32)
+
+    def _band_keys(self, signature: np.ndarray):
+        for band in range(self.bands):
+            yield band, signature[band * self.rows:(band + 1) * self.rows].tobytes()
+
+    def _insert(self, key: str, signature: np.ndarray):
+        self._signatures[key] = signature
+        for band, band_key in self._band_keys(signature):
+            self._buckets[band].setdefault(band_key, []).append(key)
+
+    def query(self, signature: Optional[np.ndarray]) -> Optional[Tuple[str, float]]:
+        """Most similar indexed document at or above the threshold, as (key, estimated similarity)"""
+        if signature is None:
+            return None
+        with self._lock:
+            self.queries += 1
+            candidates = set()
+            for band, band_key in self._band_keys(signature):
+                candidates.update(self._buckets[band].get(band_key, ()))
+            best = None
+            for key in candidates:
+                similarity = float(np.mean(self._signatures[key] == signature))
+                if similarity >= self.threshold and (best is None or similarity > best[1]):
+                    best = (key, similarity)
+            if best is not None:
+                self.duplicates += 1
+            return best
+
+    def add(self, key: str, signature: Optional[np.ndarray]):
+        """Index a document's signature under its key"""
+        if signature is None:
+            return
+        with self._lock:
+            if key in self._signatures:
+                return
+            self._insert(key, signature)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR IGNORE INTO signatures (key, signature) VALUES (?, ?)", (key, signature.tobytes())
+                )
+                self._db.commit()
+
+    def find_or_add(self, key: str, text: str) -> Optional[Tuple[str, float]]:
+        """Earlier near-duplicate of a text as (key, similarity); otherwise the text is indexed and None returned"""
+        if key in self._signatures:
+            return None
+        signature = self.signature(text)
+        match = self.query(signature)
+        if match is None:
+            self.add(key, signature)
+        return match
+
+    def stats(self) -> Dict[str, Any]:
+        """Index size and lookup counters"""
+        return {
+            'documents': len(self._signatures),
+            'queries': self.queries,
+            'duplicates': self.duplicates,
+            'duplicate_rate': round(self.duplicates / self.queries, 3) if self.queries else 0.0,
+            'bands': self.bands,
+            'rows': self.rows
+        }
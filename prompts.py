@@ -0,0 +1,138 @@
+# prompts.py
+"""Token-budgeted excerpts of resume and job text for Gemini prompts.
+
+Instead of cutting documents at a fixed character count, the text is
+split into sections (paragraphs, or runs of lines under a heading). Each
+section is scored by the weight of the relevant skills it mentions, and
+the best ones that fit the token budget are kept in their original order.
+Skill mentions are found with the analyzer's SkillMatcher, so the
+excerpts agree with the analysis.
+"""
+import re
+from typing import Iterable, List
+
+import numpy as np
+
+from core import SkillMatcher, tokenize
+
+# Rough size of a Gemini token in characters (the client's metrics use the same estimate)
+CHARS_PER_TOKEN = 4
+HEADING = re.compile(r"^[^\w]*[A-Za-z][A-Za-z &/]{1,40}:?$")
+BULLET = re.compile(r"^\s*(?:[-•*▪●◦]|\d+[.)])\s+")
+SENTENCE_END = re.compile(r"(?<=[.!?;])\s+")
+GAP = "\n...\n"
+
+def estimate_tokens(text: str) -> int:
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+def _split_long(section: str, max_tokens: int) -> List[str]:
+    """Split an oversized section at sentence ends (hard cuts as a last resort)"""
+    pieces, current = [], ""
+    for sentence in SENTENCE_END.split(section):
+        while estimate_tokens(sentence) > max_tokens:
+            cut = max_tokens * CHARS_PER_TOKEN
+            if current:
+                pieces.append(current)
+                current = ""
+            pieces.append(sentence[:cut])
+            sentence = sentence[cut:]
+        if current and estimate_tokens(f"{current} {sentence}") > max_tokens:
+            pieces.append(current)
+            current = sentence
+        else:
+            current = f"{current} {sentence}".strip()
+    if current:
+        pieces.append(current)
+    return pieces
+
+def split_sections(text: str, max_tokens: int = 120) -> List[str]:
+    """Split text into sections of at most max_tokens.
+
+    A section ends at a blank line, before a heading-like line (a short
+    line in capitals, Title Case or ending in ':', e.g. 'EXPERIENCE',
+    'Skills:') or when it would grow past max_tokens. A heading stays with
+    the body after it. Lines keep their breaks, and runs of spaces are
+    collapsed.
+    """
+    sections, lines = [], []
+    headings = 0  # 1 while the section is just its heading line, which stays with its body
+
+    def flush():
+        section = "\n".join(lines)
+        if section:
+            sections.extend([section] if estimate_tokens(section) <= max_tokens else _split_long(section, max_tokens))
+        lines.clear()
+
+    for raw_line in (text or "").splitlines():
+        line = " ".join(raw_line.split())
+        if not line:
+            if len(lines) > headings:
+                flush()
+                headings = 0
+            continue
+        is_heading = (bool(HEADING.match(line)) and len(line.split()) <= 5 and not BULLET.match(line)
+                      and (line.endswith(":") or line.isupper() or line.istitle()))
+        has_body = len(lines) > headings
+        if has_body and (is_heading or estimate_tokens("\n".join(lines + [line])) > max_tokens):
+            flush()
+            headings = 0
+        lines.append(line)
+        if is_heading and len(lines) == 1:
+            headings = 1
+    flush()
+    return sections
+
+def select_excerpts(text: str, matcher: SkillMatcher, skill_weights: np.ndarray, relevant_ids: Iterable[int],
+                    budget_tokens: int, max_section_tokens: int = 120) -> str:
+    """The most skill-relevant sections of a text that fit in budget_tokens, in document order.
+
+    A section scores the summed weight of the relevant skills it mentions;
+    sections mentioning none are left out, except the first one (usually
+    the name and headline). Skipped stretches are marked with '...'.
+    """
+    sections = split_sections(text, max_section_tokens)
+    if not sections or budget_tokens <= 0:
+        return ""
+    if estimate_tokens("\n".join(sections)) <= budget_tokens:
+        return "\n".join(sections)
+    relevant = np.zeros(len(skill_weights), dtype=bool)
+    relevant[list(relevant_ids)] = True
+    scores = []
+    for index, section in enumerate(sections):
+        skill_ids = list(matcher.match_ids(tokenize(section)))
+        score = float(skill_weights[skill_ids][relevant[skill_ids]].sum()) if skill_ids else 0.0
+        scores.append(score + (0.5 if index == 0 else 0.0))
+
+    chosen, used = set(), 0
+    for index in sorted(range(len(sections)), key=lambda i: (-scores[i], i)):
+        cost = estimate_tokens(sections[index]) + estimate_tokens(GAP)
+        if (scores[index] > 0 or index == 0) and used + cost <= budget_tokens:
+            chosen.add(index)
+            used += cost
+    excerpt, previous = [], None
+    for index in sorted(chosen):
+        if previous is not None:
+            excerpt.append(GAP if index > previous + 1 else "\n")
+        excerpt.append(sections[index])
+        previous = index
+    return "".join(excerpt)
+
+def share_budget(budget_tokens: int, texts: List[str], shares: List[float]) -> List[int]:
+    """Split a token budget between texts by share, handing what a short text leaves unused to the others"""
+    needs = [estimate_tokens(text) for text in texts]
+    budgets = [0] * len(texts)
+    remaining = budget_tokens
+    open_texts = [index for index, need in enumerate(needs) if need > 0]
+    while remaining > 0 and open_texts:
+        total_share = sum(shares[index] for index in open_texts) or 1.0
+        offered = {index: int(remaining * shares[index] / total_share) for index in open_texts}
+        satisfied = [index for index in open_texts if needs[index] - budgets[index] <= offered[index]]
+        if not satisfied:
+            for index in open_texts:
+                budgets[index] += offered[index]
+            break
+        for index in satisfied:
+            remaining -= needs[index] - budgets[index]
+            budgets[index] = needs[index]
+            open_texts.remove(index)
+    return budgets
@@ -0,0 +1,49 @@
+# report.py
+"""PDF export of an analysis (fpdf is imported on first use)"""
+import time
+from typing import Dict
+
+from metrics import instrument
+
+# PDF Report Generator
+class PDFReport:
+    """Stateless renderer: every report gets its own FPDF document, so sessions never share pages"""
+    
+    @instrument('generate_report')
+    def generate_report(self, analysis: Dict, resume_file_name: str, job_title: str, cover_letter: str = "") -> bytes:
+        """Generate PDF report in memory and return its bytes"""
+        from fpdf import FPDF
+        
+        pdf = FPDF()
+        pdf.add_page()
+        
+        # Title
+        pdf.set_font('Arial', 'B', 16)
+        pdf.cell(0, 10, 'AI Resume Analysis Report', 0, 1, 'C')
+        pdf.ln(10)
+        
+        # Basic info
+        pdf.set_font('Arial', '', 12)
+        pdf.cell(0, 10, f'Resume: {resume_file_name}', 0, 1)
+        pdf.cell(0, 10, f'Target Position: {job_title}', 0, 1)
+        pdf.cell(0, 10, f'Generated on: {time.strftime("%Y-%m-%d %H:%M:%S")}', 0, 1)
+        pdf.ln(10)
+        
+        # Scores
+        pdf.set_font('Arial', 'B', 14)
+        pdf.cell(0, 10, 'Assessment Scores', 0, 1)
+        pdf.set_font('Arial', '', 12)
+        pdf.cell(0, 10, f'Overall Capability: {analysis["overall_capability"]}%', 0, 1)
+        pdf.cell(0, 10, f'Skill Match: {analysis["skill_match"]}%', 0, 1)
+        pdf.cell(0, 10, f'Experience Compatibility: {analysis["experience_compatibility"]}%', 0, 1)
+        pdf.ln(10)
+        
+        # Cover letter
+        if cover_letter and cover_letter != "Gemini AI not available for cover letter generation.":
+            pdf.add_page()
+            pdf.set_font('Arial', 'B', 14)
+            pdf.cell(0, 10, 'AI-Generated Cover Letter', 0, 1)
+            pdf.set_font('Arial', '', 11)
+            pdf.multi_cell(0, 8, cover_letter)
+        
+        return bytes(pdf.output())
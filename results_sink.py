@@ -0,0 +1,249 @@
+# results_sink.py
+"""Columnar storage of analysis results for analytics.
+
+    python cli.py resumes.zip --sample-job "Data Scientist" --checkpoint .cache/bulk.sqlite3 --columnar results/
+
+A ResultsSink appends results (cli.analyze_item dicts: id, job title, scores,
+levels and per-category matching/missing skills) to a directory of part
+files. Rows are buffered and written batch_size at a time, as Parquet row
+groups or Arrow IPC record batches. Each sink writes its own part, renamed
+into place on close, so readers never see a half-written file and
+historical runs simply accumulate. A checkpointed bulk run keeps one part
+named after the run, which each invocation rewrites from the checkpoint,
+so resuming a run never duplicates its rows. Skills become one list<string> column
+per category and direction (matching_core_technical,
+missing_core_technical, ...).
+
+pyarrow is optional and imported on first use. Without it, parts are CSV,
+with each skill list joined by "; ". Parquet and Arrow parts are read a
+batch at a time from memory-mapped files (Arrow IPC parts are uncompressed
+so the mapping is zero-copy), so millions of rows can be scanned without
+loading them all into RAM.
+"""
+import csv
+import glob
+import importlib.util
+import os
+import time
+import uuid
+from collections import Counter
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Union
+
+FORMATS = {'parquet': '.parquet', 'arrow': '.arrow', 'csv': '.csv'}
+LIST_SEPARATOR = "; "
+SCORE_FIELDS = ('overall_capability', 'skill_match', 'experience_compatibility')
+LEVEL_FIELDS = ('resume_experience_level', 'job_level')
+
+def arrow_available() -> bool:
+    return importlib.util.find_spec('pyarrow') is not None
+
+def default_format() -> str:
+    """Parquet when pyarrow is installed, CSV otherwise"""
+    return 'parquet' if arrow_available() else 'csv'
+
+def check_format(format: Optional[str]) -> str:
+    """The format to write (default_format() for None); ValueError if unknown or pyarrow is missing"""
+    format = format or default_format()
+    if format not in FORMATS:
+        raise ValueError(f"Unknown results format: {format} (choose from {', '.join(FORMATS)})")
+    if format != 'csv' and not arrow_available():
+        raise ValueError(f"The {format} format needs pyarrow; install it or use csv")
+    return format
+
+def skill_columns(categories: Iterable[str]) -> List[str]:
+    return [f"{direction}_{category}" for direction in ('matching', 'missing') for category in categories]
+
+class ResultsSink:
+    """Append-only writer of one part file in a results directory"""
+
+    def __init__(self, directory: str, categories: Iterable[str], format: Optional[str] = None,
+                 batch_size: int = 10000, part_name: Optional[str] = None):
+        self.format = check_format(format)
+        self.categories = list(categories)
+        self.columns = ['resume_id', 'job_title', *SCORE_FIELDS, *LEVEL_FIELDS, 'matching_count', 'missing_count',
+                        'recorded_at', *skill_columns(self.categories)]
+        self.batch_size = batch_size
+        os.makedirs(directory, exist_ok=True)
+        # A stable part_name (e.g. one per bulk run) replaces the earlier part of that name on close
+        self.part_name = part_name or f"{int(time.time() * 1000)}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self.directory = directory
+        self.path = os.path.join(directory, f"part-{self.part_name}{FORMATS[self.format]}")
+        self._temp_path = self.path + ".tmp"
+        self._rows = []
+        self._writer = None
+        self._file = None
+        self.rows_written = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _row(self, result: Dict[str, Any], recorded_at: int) -> Dict[str, Any]:
+        row = {
+            'resume_id': str(result['id']),
+            'job_title': result.get('job_title', ''),
+            **{field: float(result[field]) for field in SCORE_FIELDS},
+            **{field: result[field] for field in LEVEL_FIELDS},
+            'recorded_at': recorded_at
+        }
+        for direction in ('matching', 'missing'):
+            skills = result[f"{direction}_skills"]
+            row[f"{direction}_count"] = sum(len(skills.get(category, [])) for category in self.categories)
+            for category in self.categories:
+                row[f"{direction}_{category}"] = list(skills.get(category, []))
+        return row
+
+    def write(self, results: Iterable[Dict[str, Any]]):
+        """Buffer results (failed items, which carry an 'error', are skipped), writing full batches"""
+        recorded_at = int(time.time())
+        for result in results:
+            if 'error' not in result:
+                self._rows.append(self._row(result, recorded_at))
+                if len(self._rows) >= self.batch_size:
+                    self.flush()
+
+    def _schema(self):
+        import pyarrow as pa
+        return pa.schema(
+            [('resume_id', pa.string()), ('job_title', pa.string())]
+            + [(field, pa.float64()) for field in SCORE_FIELDS]
+            + [(field, pa.string()) for field in LEVEL_FIELDS]
+            + [('matching_count', pa.int32()), ('missing_count', pa.int32()), ('recorded_at', pa.timestamp('s'))]
+            + [(column, pa.list_(pa.string())) for column in skill_columns(self.categories)]
+        )
+
+    def flush(self):
+        """Write the buffered rows as one row group / record batch"""
+        if not self._rows:
+            return
+        if self.format == 'csv':
+            if self._file is None:
+                self._file = open(self._temp_path, "w", newline="", encoding="utf-8")
+                self._writer = csv.DictWriter(self._file, fieldnames=self.columns)
+                self._writer.writeheader()
+            for row in self._rows:
+                self._writer.writerow({
+                    column: LIST_SEPARATOR.join(value) if isinstance(value, list) else value
+                    for column, value in row.items()
+                })
+        else:
+            import pyarrow as pa
+            schema = self._schema()
+            batch = pa.RecordBatch.from_pylist(self._rows, schema=schema)
+            if self._writer is None:
+                if self.format == 'parquet':
+                    import pyarrow.parquet as pq
+                    self._writer = pq.ParquetWriter(self._temp_path, schema, compression='zstd')
+                else:
+                    import pyarrow.ipc as ipc
+                    self._writer = ipc.new_file(self._temp_path, schema)
+            self._writer.write_batch(batch)
+        self.rows_written += len(self._rows)
+        self._rows.clear()
+
+    def close(self):
+        """Flush and publish the part file (nothing is published if no rows were written)"""
+        self.flush()
+        if self._writer is None:
+            return
+        if self._file is not None:
+            self._file.close()
+        else:
+            self._writer.close()
+        self._writer = self._file = None
+        os.replace(self._temp_path, self.path)
+        # A part of the same name written earlier in another format is superseded too
+        for extension in FORMATS.values():
+            stale = os.path.join(self.directory, f"part-{self.part_name}{extension}")
+            if stale != self.path and os.path.exists(stale):
+                os.remove(stale)
+
+def part_files(directory: str, formats: Iterable[str] = FORMATS) -> List[str]:
+    """Published part files of a results directory, oldest first"""
+    paths = []
+    for format in formats:
+        paths.extend(glob.glob(os.path.join(directory, f"part-*{FORMATS[format]}")))
+    return sorted(paths, key=os.path.basename)
+
+def _select(names: List[str], columns) -> Optional[List[str]]:
+    if columns is None:
+        return None
+    if callable(columns):
+        return [name for name in names if columns(name)]
+    return [column for column in columns if column in names]
+
+def is_missing_column(name: str) -> bool:
+    return name.startswith('missing_') and name != 'missing_count'
+
+def iter_batches(directory: str, columns: Union[List[str], Callable[[str], bool], None] = None) -> Iterator[Any]:
+    """pyarrow RecordBatches of every Parquet and Arrow part, read from memory-mapped files.
+
+    columns is a list of names or a predicate on names. Parts written under
+    another taxonomy may lack some skill columns; only the requested columns
+    each part has are returned.
+    """
+    import pyarrow as pa
+    import pyarrow.ipc as ipc
+    import pyarrow.parquet as pq
+    for path in part_files(directory, ('parquet', 'arrow')):
+        if path.endswith(FORMATS['parquet']):
+            parquet_file = pq.ParquetFile(path, memory_map=True)
+            selected = _select(parquet_file.schema_arrow.names, columns)
+            yield from parquet_file.iter_batches(columns=selected)
+        else:
+            with pa.memory_map(path) as source:
+                reader = ipc.open_file(source)
+                selected = _select(reader.schema.names, columns)
+                for index in range(reader.num_record_batches):
+                    batch = reader.get_batch(index)
+                    yield batch if selected is None else batch.select(selected)
+
+def read_results(directory: str, columns: Union[List[str], Callable[[str], bool], None] = None):
+    """All Parquet and Arrow parts as one pyarrow Table (e.g. for .to_pandas() or DuckDB)"""
+    import pyarrow as pa
+    tables = [pa.Table.from_batches([batch]) for batch in iter_batches(directory, columns)]
+    if not tables:
+        return pa.table({})
+    return pa.concat_tables(tables, promote_options="default")
+
+def iter_csv_rows(directory: str) -> Iterator[Dict[str, Any]]:
+    """Rows of the CSV parts, one at a time, with skill lists split again"""
+    for path in part_files(directory, ('csv',)):
+        with open(path, newline="", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                for column, value in row.items():
+                    if column.startswith(('matching_', 'missing_')) and not column.endswith('_count'):
+                        row[column] = value.split(LIST_SEPARATOR) if value else []
+                yield row
+
+def skill_gap_frequencies(directory: str, job_title: Optional[str] = None) -> Dict[str, Dict[str, int]]:
+    """How often each skill is missing, per job title, most frequent first.
+
+    Only the job title and missing-skill columns are read, a batch at a time.
+    """
+    counts = {}
+    if arrow_available() and part_files(directory, ('parquet', 'arrow')):
+        import pyarrow as pa
+        import pyarrow.compute as pc
+        for batch in iter_batches(directory, lambda name: name == 'job_title' or is_missing_column(name)):
+            titles = batch.column('job_title')
+            for column, name in zip(batch.columns, batch.schema.names):
+                if not is_missing_column(name):
+                    continue
+                pairs = pa.table({
+                    'job_title': pc.take(titles, pc.list_parent_indices(column)),
+                    'skill': pc.list_flatten(column)
+                })
+                if job_title is not None:
+                    pairs = pairs.filter(pc.equal(pairs['job_title'], job_title))
+                for row in pairs.group_by(['job_title', 'skill']).aggregate([('skill', 'count')]).to_pylist():
+                    counts.setdefault(row['job_title'], Counter())[row['skill']] += row['skill_count']
+    for row in iter_csv_rows(directory):
+        if job_title is None or row['job_title'] == job_title:
+            job_counts = counts.setdefault(row['job_title'], Counter())
+            for column, value in row.items():
+                if is_missing_column(column):
+                    job_counts.update(value)
+    return {title: dict(job_counts.most_common()) for title, job_counts in counts.items()}
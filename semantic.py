@@ -0,0 +1,164 @@
+# semantic.py
+"""Offline semantic skill matching with hashed character n-grams.
+
+Exact matching (core.SkillMatcher) only finds skills written the way the
+taxonomy spells them. This optional stage also gives credit for near
+matches such as 'restful apis' for 'rest api' or 'microservice
+architecture' for 'microservices'. It works like this:
+
+- Every skill phrase and alias is embedded once as a signed, hashed bag of
+  character n-grams, and the rows are kept as a normalized matrix.
+- Every window of 1..max_span tokens in a document is embedded the same way.
+- A skill's confidence is its best cosine similarity over all windows,
+  computed with batched NumPy dot products.
+
+Everything runs on CPU with no model files and no Gemini calls. Token
+vectors and their projections onto the skill matrix are cached, so a
+document mostly costs a few cumulative sums. Abbreviations that share no
+letters with the skill (e.g. 'ml') still need a taxonomy alias.
+"""
+import threading
+import zlib
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from core import tokenize
+
+class SemanticMatcher:
+    """Precomputed skill embeddings and window-level similarity search"""
+
+    def __init__(self, skills: List[Tuple[str, str]], aliases: Optional[Dict[str, str]] = None,
+                 threshold: float = 0.8, dim: int = 2048, ngram_range: Tuple[int, int] = (3, 5),
+                 max_span: int = 3, cache_size: int = 200000):
+        self.threshold = threshold
+        self.dim = dim
+        self.ngram_range = ngram_range
+        self.cache_size = cache_size
+        self._cache = {}  # token -> n-gram vector
+        self._projections = {}  # token -> (dot products with the skill rows, squared norm)
+        self._pair_dots = {}  # (token, token) -> dot product of their vectors
+        self._lock = threading.Lock()  # the caches are shared by the app's and server's threads
+        self.size = len(skills)
+
+        # One row per skill phrase or alias; owners maps rows back to skill IDs
+        ids_by_name = {}
+        phrases, owners = [], []
+        for skill_id, (_, skill) in enumerate(skills):
+            ids_by_name.setdefault(skill, []).append(skill_id)
+            phrases.append(tokenize(skill))
+            owners.append(skill_id)
+        for alias, skill in (aliases or {}).items():
+            for skill_id in ids_by_name.get(skill, []):
+                phrases.append(tokenize(alias))
+                owners.append(skill_id)
+        self.owners = np.array(owners, dtype=np.intp)
+        self.max_span = max(1, min(max_span, max((len(p) for p in phrases), default=1)))
+        self.matrix = self._normalize(
+            np.stack([self.embed(phrase) for phrase in phrases]) if phrases
+            else np.zeros((0, dim), dtype=np.float32)
+        )
+
+    @staticmethod
+    def _normalize(vectors: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.where(norms > 0, norms, 1.0)
+
+    def token_vector(self, token: str) -> np.ndarray:
+        """Signed hashed counts of the token's character n-grams (with word-boundary markers)"""
+        vector = self._cache.get(token)
+        if vector is not None:
+            return vector
+        vector = np.zeros(self.dim, dtype=np.float32)
+        padded = f"<{token}>"
+        low, high = self.ngram_range
+        for n in range(low, high + 1):
+            for start in range(max(1, len(padded) - n + 1)):
+                # crc32 is stable across processes, unlike hash()
+                code = zlib.crc32(padded[start:start + n].encode('utf-8'))
+                vector[code % self.dim] += 1.0 if code & 0x80000000 else -1.0
+        if len(self._cache) >= self.cache_size:
+            self._cache.clear()
+        self._cache[token] = vector
+        return vector
+
+    def embed(self, tokens: List[str]) -> np.ndarray:
+        """Unnormalized embedding of a phrase: the sum of its token vectors"""
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for token in tokens:
+            vector += self.token_vector(token)
+        return vector
+
+    def _project(self, tokens: List[str]):
+        """Per-position projections onto the skill rows and squared norms of the token vectors"""
+        unique = list(dict.fromkeys(tokens))
+        new = [token for token in unique if token not in self._projections]
+        if new:
+            if len(self._projections) + len(new) > self.cache_size:
+                self._projections.clear()
+                self._pair_dots.clear()
+                new = unique
+            vectors = np.stack([self.token_vector(token) for token in new])
+            for token, projection, norm in zip(new, vectors @ self.matrix.T, np.einsum('ij,ij->i', vectors, vectors)):
+                self._projections[token] = (projection, float(norm))
+        rows = [self._projections[token] for token in tokens]
+        return np.stack([row[0] for row in rows]), np.array([row[1] for row in rows], dtype=np.float64)
+
+    def _pair_dot(self, first: str, second: str) -> float:
+        key = (first, second) if first <= second else (second, first)
+        dot = self._pair_dots.get(key)
+        if dot is None:
+            if len(self._pair_dots) >= self.cache_size:
+                self._pair_dots.clear()
+            dot = self._pair_dots[key] = float(np.dot(self.token_vector(first), self.token_vector(second)))
+        return dot
+
+    def similarities(self, tokens: List[str]) -> np.ndarray:
+        """Best cosine similarity per skill ID over the document's windows (0 where none).
+
+        A window's vector is the sum of its token vectors, so its dot product
+        with each skill row is a difference of cumulative sums of cached
+        per-token projections. Its norm comes from the token norms and the dot
+        products of nearby token pairs, so no window is ever materialized.
+        """
+        per_skill = np.zeros(self.size, dtype=np.float32)
+        if not tokens or not len(self.owners):
+            return per_skill
+        count = len(tokens)
+        with self._lock:
+            projections, norms = self._project(tokens)
+            # Cumulative dot products of token pairs `gap` positions apart
+            running_pairs = {
+                gap: np.concatenate([[0.0], np.cumsum([
+                    self._pair_dot(tokens[index], tokens[index + gap]) for index in range(count - gap)
+                ])])
+                for gap in range(1, min(self.max_span, count))
+            }
+        running = np.vstack([np.zeros((1, projections.shape[1])), np.cumsum(projections, axis=0, dtype=np.float64)])
+        running_norms = np.concatenate([[0.0], np.cumsum(norms)])
+        best = np.zeros(len(self.owners), dtype=np.float64)
+        for span in range(1, min(self.max_span, count) + 1):
+            windows = count - span + 1
+            dots = running[span:] - running[:-span]
+            squared = running_norms[span:] - running_norms[:-span]
+            for gap in range(1, span):
+                pairs = running_pairs[gap]
+                squared = squared + 2 * (pairs[span - gap:span - gap + windows] - pairs[:windows])
+            lengths = np.sqrt(np.maximum(squared, 0.0))
+            scores = np.divide(dots, lengths[:, np.newaxis], out=np.zeros_like(dots), where=lengths[:, np.newaxis] > 0)
+            np.maximum(best, scores.max(axis=0), out=best)
+        np.maximum.at(per_skill, self.owners, best.astype(np.float32))
+        return per_skill
+
+    def confidence(self, tokens: List[str]) -> np.ndarray:
+        """Per-skill-ID confidence in [0, 1]: similarities below the threshold count as 0"""
+        similarities = np.clip(self.similarities(tokens), 0.0, 1.0)
+        similarities[similarities < self.threshold] = 0.0
+        return similarities
+
+    def confidence_matrix(self, token_lists: List[List[str]]) -> np.ndarray:
+        """Document x skill confidence matrix"""
+        matrix = np.zeros((len(token_lists), self.size), dtype=np.float32)
+        for row, tokens in enumerate(token_lists):
+            matrix[row] = self.confidence(tokens)
+        return matrix
@@ -0,0 +1,306 @@
+# server.py
+"""Asyncio HTTP scoring service for ATS integrations.
+
+    python server.py --port 8080
+
+POST /analyze  {"resume_text", "job_description", "job_title", "enrich": false}
+GET  /health   queue depth and batching stats
+GET  /metrics  Prometheus text format
+
+Requests are queued on a bounded queue (full queue -> 503 with Retry-After)
+and drained by a batcher; job descriptions are compiled into job profiles
+once and reused, so only the resume side is processed per request. With "enrich": true and a
+GEMINI_API_KEY, the explanation and recommendation come from one combined
+Gemini request; otherwise the rule-based texts are returned. Only the
+standard library is used for HTTP.
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from core import SAMPLE_JOBS
+from job_profiles import JobProfileStore
+from metrics import REGISTRY, SIZE_BUCKETS
+from taxonomy import TaxonomyStore
+
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+           413: "Payload Too Large", 503: "Service Unavailable"}
+MAX_BODY_BYTES = 2 * 1024 * 1024
+
+class ScoringService:
+    """Bounded queue + micro-batcher in front of the taxonomy's current ResumeAnalyzer"""
+
+    def __init__(self, taxonomy: TaxonomyStore, max_queue: int = 1000, max_batch: int = 64,
+                 batch_window: float = 0.005, llm_client=None, semantic: Optional[float] = None):
+        self.taxonomy = taxonomy
+        self.semantic = semantic
+        self._job_profiles = None
+        self.max_batch = max_batch
+        self.batch_window = batch_window
+        self.llm_client = llm_client
+        self.queue = asyncio.Queue(maxsize=max_queue)
+        self.batches = 0
+        self.requests = 0
+        self.rejected = 0
+        self._batcher = None
+
+    @property
+    def analyzer(self):
+        return self.taxonomy.current()
+
+    @property
+    def job_profiles(self) -> JobProfileStore:
+        """Job profiles for the current analyzer, rebuilt after a taxonomy reload"""
+        analyzer = self.analyzer
+        if self._job_profiles is None or self._job_profiles.analyzer is not analyzer:
+            analyzer.enable_semantic(self.semantic)
+            job_profiles = JobProfileStore(analyzer)
+            job_profiles.warm(SAMPLE_JOBS)
+            self._job_profiles = job_profiles
+        return self._job_profiles
+
+    def start(self):
+        self._batcher = asyncio.ensure_future(self._run_batcher())
+
+    async def stop(self):
+        if self._batcher is not None:
+            self._batcher.cancel()
+
+    def health(self) -> Dict[str, Any]:
+        return {
+            'status': 'ok',
+            'taxonomy': self.analyzer.fingerprint,
+            'taxonomy_error': self.taxonomy.last_error,
+            'queue_depth': self.queue.qsize(),
+            'queue_capacity': self.queue.maxsize,
+            'requests': self.requests,
+            'rejected': self.rejected,
+            'batches': self.batches,
+            'mean_batch_size': round(self.requests / self.batches, 2) if self.batches else 0.0
+        }
+
+    async def submit(self, request: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Queue one request and wait for its analysis; None means the queue is full"""
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self.queue.put_nowait((request, future))
+        except asyncio.QueueFull:
+            self.rejected += 1
+            REGISTRY.inc("server_rejected_total")
+            return None
+        analysis = await future
+        if request.get('enrich'):
+            analysis.update(await self.enrich(analysis))
+        return analysis
+
+    async def _run_batcher(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            deadline = loop.time() + self.batch_window
+            while len(batch) < self.max_batch:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+            self.batches += 1
+            self.requests += len(batch)
+            REGISTRY.observe("server_batch_size", len(batch), buckets=SIZE_BUCKETS)
+            try:
+                # Scoring is CPU-bound; keep the event loop free to accept requests
+                results = await loop.run_in_executor(None, self.score_batch, [request for request, _ in batch])
+            except Exception as e:
+                results = [e] * len(batch)
+            for (_, future), result in zip(batch, results):
+                if future.done():
+                    continue
+                if isinstance(result, Exception):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+
+    def score_batch(self, requests: List[Dict[str, Any]]) -> List[Any]:
+        """Analyze a batch; each distinct job is compiled once and then reused across batches"""
+        with REGISTRY.timer("server_batch"):
+            # One taxonomy version per batch, even if a reload lands mid-batch
+            job_profiles = self.job_profiles
+            analyzer = job_profiles.analyzer
+            results = []
+            for request in requests:
+                try:
+                    job_title = request.get('job_title', '')
+                    results.append(analyzer.analyze_resume_job_match(
+                        request['resume_text'], request['job_description'], job_title,
+                        job_profile=job_profiles.get(request['job_description'], job_title)
+                    ))
+                except Exception as e:
+                    results.append(e)
+            return results
+
+    async def enrich(self, analysis: Dict[str, Any]) -> Dict[str, str]:
+        """AI explanation and recommendation from one combined request (rule-based without Gemini)"""
+        analyzer = self.analyzer
+        fallbacks = {
+            'explanation': analyzer.rule_based_explanation,
+            'recommendation': analyzer.rule_based_recommendation
+        }
+        if self.llm_client is None:
+            return {name: fallback(analysis) for name, fallback in fallbacks.items()}
+        fields = tuple(fallbacks)
+        sections = {}
+        try:
+            response = await asyncio.wait_for(
+                asyncio.wrap_future(self.llm_client.submit(analyzer.combined_prompt(analysis, fields))),
+                self.llm_client.timeout
+            )
+            sections = analyzer.parse_ai_sections(response, fields)
+        except Exception:
+            REGISTRY.record_error("server_enrich")
+        return {name: sections.get(name) or fallback(analysis) for name, fallback in fallbacks.items()}
+
+# Minimal HTTP/1.1 handling
+async def read_request(reader: asyncio.StreamReader) -> Optional[Tuple[str, str, Dict[str, str], bytes]]:
+    request_line = await reader.readline()
+    if not request_line:
+        return None
+    method, path, _ = request_line.decode('latin-1').split(" ", 2)
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode('latin-1').partition(":")
+        headers[name.strip().lower()] = value.strip()
+    length = int(headers.get('content-length', '0'))
+    if length > MAX_BODY_BYTES:
+        raise ValueError("payload too large")
+    body = await reader.readexactly(length) if length else b""
+    return method, path, headers, body
+
+def write_response(writer: asyncio.StreamWriter, status: int, body: Any, content_type: str = "application/json",
+                   extra_headers: Dict[str, str] = None, keep_alive: bool = True):
+    payload = body if isinstance(body, bytes) else (
+        body.encode('utf-8') if isinstance(body, str) else json.dumps(body).encode('utf-8')
+    )
+    headers = {
+        'Content-Type': content_type,
+        'Content-Length': str(len(payload)),
+        'Connection': 'keep-alive' if keep_alive else 'close',
+        **(extra_headers or {})
+    }
+    head = f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n" + "".join(f"{k}: {v}\r\n" for k, v in headers.items())
+    writer.write(head.encode('latin-1') + b"\r\n" + payload)
+
+async def dispatch(service: ScoringService, method: str, path: str, body: bytes) -> Tuple[int, Any, Dict[str, str]]:
+    path = path.split("?")[0]
+    if path == "/health":
+        return 200, service.health(), {}
+    if path == "/metrics":
+        return 200, REGISTRY.render(), {}
+    if path != "/analyze":
+        return 404, {'error': 'not found'}, {}
+    if method != "POST":
+        return 405, {'error': 'use POST'}, {}
+    try:
+        request = json.loads(body or b"{}")
+        if not isinstance(request, dict) or not request.get('resume_text') or not request.get('job_description'):
+            raise ValueError("resume_text and job_description are required")
+    except ValueError as e:
+        return 400, {'error': str(e)}, {}
+    started = time.perf_counter()
+    result = await service.submit(request)
+    REGISTRY.observe("server_request_seconds", time.perf_counter() - started)
+    if result is None:
+        return 503, {'error': 'queue full'}, {'Retry-After': '1'}
+    return 200, result, {}
+
+async def handle_connection(service: ScoringService, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+    try:
+        while True:
+            try:
+                request = await read_request(reader)
+            except (ValueError, asyncio.IncompleteReadError) as e:
+                write_response(writer, 413 if "too large" in str(e) else 400, {'error': str(e)}, keep_alive=False)
+                break
+            if request is None:
+                break
+            method, path, headers, body = request
+            keep_alive = headers.get('connection', '').lower() != 'close'
+            try:
+                status, payload, extra = await dispatch(service, method, path, body)
+            except Exception as e:
+                REGISTRY.record_error("server")
+                status, payload, extra = 500, {'error': str(e)}, {}
+            content_type = "text/plain; version=0.0.4" if path.startswith("/metrics") else "application/json"
+            write_response(writer, status, payload, content_type, extra, keep_alive)
+            await writer.drain()
+            if not keep_alive:
+                break
+    except ConnectionError:
+        pass
+    finally:
+        writer.close()
+
+def make_llm_client():
+    """Shared Gemini client when GEMINI_API_KEY (or GEMINI_FAKE) is set, else None"""
+    from llm_client import GeminiClient
+    settings = dict(
+        timeout=float(os.getenv('GEMINI_TIMEOUT', '60')),
+        requests_per_minute=float(os.getenv('GEMINI_RPM', '60')),
+        max_retries=int(os.getenv('GEMINI_MAX_RETRIES', '3'))
+    )
+    if os.getenv('GEMINI_FAKE'):
+        from llm_fake import FakeModel
+        return GeminiClient(model_factory=FakeModel.factory(), **settings)
+    api_key = os.getenv('GEMINI_API_KEY')
+    if not api_key:
+        return None
+    import google.generativeai as genai
+    from llm_cache import ResponseCache
+    genai.configure(api_key=api_key)
+    cache = ResponseCache(
+        os.getenv('GEMINI_CACHE_PATH', os.path.join('.cache', 'gemini_responses.sqlite3')),
+        ttl_seconds=float(os.getenv('GEMINI_CACHE_TTL', str(7 * 24 * 3600)))
+    )
+    return GeminiClient(cache=cache, **settings)
+
+async def serve(host: str, port: int, service: ScoringService):
+    service.start()
+    server = await asyncio.start_server(lambda r, w: handle_connection(service, r, w), host, port)
+    async with server:
+        await server.serve_forever()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Resume scoring HTTP service")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--max-queue", type=int, default=1000, help="queued requests before returning 503")
+    parser.add_argument("--max-batch", type=int, default=64)
+    parser.add_argument("--batch-window-ms", type=float, default=5.0, help="how long a batch waits to fill")
+    parser.add_argument("--taxonomy", default=os.getenv('SKILL_TAXONOMY_PATH'),
+                        help="skill taxonomy JSON, reloaded when it changes (default: built-in)")
+    parser.add_argument("--semantic", type=float, metavar="THRESHOLD",
+                        default=float(os.getenv('SEMANTIC_MATCH_THRESHOLD') or 0) or None,
+                        help="credit paraphrased skills at or above this similarity, e.g. 0.8 (default: off)")
+    args = parser.parse_args(argv)
+
+    async def run():
+        service = ScoringService(
+            TaxonomyStore(args.taxonomy), max_queue=args.max_queue, max_batch=args.max_batch,
+            batch_window=args.batch_window_ms / 1000, llm_client=make_llm_client(), semantic=args.semantic
+        )
+        await serve(args.host, args.port, service)
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
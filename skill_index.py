@@ -0,0 +1,227 @@
+# skill_index.py
+"""Inverted skill index over a pool of analyzed resumes.
+
+Each taxonomy skill maps to a posting list of internal document numbers.
+A job's skills are answered with a weighted top-k query using WAND: every
+job skill contributes a fixed share of the score (its category weight), so
+its upper bound is exact and documents that cannot beat the current k-th
+score are skipped without being scored.
+
+Postings are rebuilt in memory from SQLite on open; every add is written
+through, so the pool survives restarts.
+"""
+import bisect
+import heapq
+import json
+import os
+import sqlite3
+import threading
+from array import array
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+
+class SkillIndex:
+    """Persistent skill -> resume posting lists with WAND top-k search"""
+
+    def __init__(self, analyzer, path: Optional[str] = None):
+        self.analyzer = analyzer
+        self.skill_ids = analyzer.skill_lookup
+        # skill_id -> ascending doc numbers, as 4-byte ints rather than lists of int objects
+        self.postings = [array('i') for _ in analyzer.matcher.skills]
+        self.docs = {}  # doc -> (resume_id, experience_level, display name)
+        self.doc_by_resume = {}  # resume_id -> doc
+        self.next_doc = 0
+        self._lock = threading.Lock()
+        self._db = None
+        if path:
+            directory = os.path.dirname(os.path.abspath(path))
+            os.makedirs(directory, exist_ok=True)
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS resumes ("
+                "doc INTEGER PRIMARY KEY, resume_id TEXT UNIQUE NOT NULL, "
+                "experience_level TEXT NOT NULL, skills TEXT NOT NULL, name TEXT)"
+            )
+            columns = [row[1] for row in self._db.execute("PRAGMA table_info(resumes)")]
+            if 'name' not in columns:
+                # Pools written before display names were kept
+                self._db.execute("ALTER TABLE resumes ADD COLUMN name TEXT")
+            self._db.commit()
+            self._load()
+
+    def _load(self):
+        """Rebuild the in-memory postings from the database"""
+        rows = self._db.execute("SELECT doc, resume_id, experience_level, skills, name FROM resumes ORDER BY doc")
+        for doc, resume_id, experience_level, skills, name in rows:
+            # Skills are stored by name, so a reordered or extended taxonomy still loads
+            skill_ids = [self.skill_ids[tuple(skill)] for skill in json.loads(skills) if tuple(skill) in self.skill_ids]
+            self._insert(doc, resume_id, experience_level, skill_ids, name)
+            self.next_doc = doc + 1
+
+    def _insert(self, doc: int, resume_id: str, experience_level: str, skill_ids: Iterable[int],
+                name: Optional[str] = None):
+        previous = self.doc_by_resume.get(resume_id)
+        if previous is not None:
+            # Stale postings of the old version are skipped at query time
+            del self.docs[previous]
+        self.docs[doc] = (resume_id, experience_level, name or resume_id)
+        self.doc_by_resume[resume_id] = doc
+        for skill_id in skill_ids:
+            self.postings[skill_id].append(doc)
+
+    def skill_ids_for(self, skills) -> List[int]:
+        """Sorted skill IDs of an extract_skills() result, skill IDs or skill mask"""
+        return np.flatnonzero(self.analyzer.skill_mask(skills)).tolist()
+
+    def add(self, resume_id: str, skills, experience_level: str, name: Optional[str] = None):
+        """Index (or re-index) a resume from its skills (any form skill_mask accepts) and level.
+
+        resume_id identifies the resume (e.g. its content key); name is only
+        shown in results and defaults to resume_id.
+        """
+        skill_ids = self.skill_ids_for(skills)
+        with self._lock:
+            doc = self.next_doc
+            self.next_doc += 1
+            self._insert(doc, resume_id, experience_level, skill_ids, name)
+            if self._db is not None:
+                self._db.execute("DELETE FROM resumes WHERE resume_id = ?", (resume_id,))
+                self._db.execute(
+                    "INSERT INTO resumes (doc, resume_id, experience_level, skills, name) VALUES (?, ?, ?, ?, ?)",
+                    (doc, resume_id, experience_level, json.dumps([self.analyzer.matcher.skills[i] for i in skill_ids]), name)
+                )
+                self._db.commit()
+
+    def __len__(self) -> int:
+        return len(self.docs)
+
+    def _compatibility(self, job_level: str) -> Dict[str, float]:
+        return {
+            level: self.analyzer.calculate_experience_compatibility(level, job_level)
+            for level in self.analyzer.experience_levels()
+        }
+
+    def search(self, job_profile: Dict[str, Any], k: int = 10, weights: np.ndarray = None) -> List[Dict[str, Any]]:
+        """Top-k resumes for a compiled job profile, scored like calculate_capability_score.
+
+        Only resumes sharing at least one skill with the job are candidates.
+        weights overrides the analyzer's per-skill weights (see ResumeAnalyzer.weight_vector).
+        """
+        job_skill_ids = job_profile['skill_ids']
+        weights = self.analyzer.skill_weights if weights is None else weights
+        total_possible = float(weights[job_skill_ids].sum()) if job_skill_ids else 0.0
+        if total_possible <= 0 or k <= 0:
+            return []
+        job_level = job_profile['level']
+        compatibility = self._compatibility(job_level)
+        experience_bound = 0.3 * max(compatibility.values())
+
+        with self._lock:
+            docs = dict(self.docs)
+            # [contribution to overall score, postings, cursor]
+            terms = [
+                [0.7 * 100 * float(weights[skill_id]) / total_possible, self.postings[skill_id], 0]
+                for skill_id in job_skill_ids if self.postings[skill_id]
+            ]
+
+        heap = []  # (score, doc) min-heap of the current top k
+        threshold = -1.0
+
+        def current(term):
+            return term[1][term[2]] if term[2] < len(term[1]) else None
+
+        terms = [term for term in terms if current(term) is not None]
+        while terms:
+            terms.sort(key=current)
+            # Pivot: first term where the accumulated upper bounds could beat the threshold
+            bound = experience_bound
+            pivot = None
+            for index, term in enumerate(terms):
+                bound += term[0]
+                if bound > threshold:
+                    pivot = index
+                    break
+            if pivot is None:
+                break
+            pivot_doc = current(terms[pivot])
+
+            if current(terms[0]) == pivot_doc:
+                # Every term up to the pivot is on pivot_doc: score it fully
+                skill_score = 0.0
+                for term in terms:
+                    if current(term) != pivot_doc:
+                        break
+                    skill_score += term[0]
+                    term[2] += 1
+                entry = docs.get(pivot_doc)
+                if entry is not None:
+                    score = skill_score + 0.3 * compatibility.get(entry[1], 50)
+                    if len(heap) < k:
+                        heapq.heappush(heap, (score, pivot_doc))
+                    elif score > heap[0][0]:
+                        heapq.heapreplace(heap, (score, pivot_doc))
+                    if len(heap) == k:
+                        threshold = heap[0][0]
+            else:
+                # Skip the lagging terms straight to the pivot document
+                for term in terms[:pivot]:
+                    term[2] = bisect.bisect_left(term[1], pivot_doc, term[2])
+            terms = [term for term in terms if current(term) is not None]
+
+        results = []
+        for score, doc in sorted(heap, reverse=True):
+            results.append(self._row(*docs[doc], score, compatibility, job_level))
+        return results
+
+    def _row(self, resume_id: str, experience_level: str, name: str, score: float, compatibility: Dict[str, float],
+             job_level: str) -> Dict[str, Any]:
+        experience_score = compatibility.get(experience_level, 50)
+        return {
+            'resume_id': resume_id,
+            'name': name,
+            'overall_capability': round(score, 1),
+            'skill_match': round((score - 0.3 * experience_score) / 0.7, 1),
+            'experience_compatibility': round(float(experience_score), 1),
+            'resume_experience_level': experience_level,
+            'job_level': job_level
+        }
+
+    def rescore(self, job_profile: Dict[str, Any], weights: np.ndarray = None) -> List[Dict[str, Any]]:
+        """Score every resume in the pool for a job, best first.
+
+        Works from the stored skill sets only, so trying new weights never
+        re-reads resume text.
+        """
+        job_skill_ids = job_profile['skill_ids']
+        weights = self.analyzer.skill_weights if weights is None else weights
+        job_level = job_profile['level']
+        compatibility = self._compatibility(job_level)
+        with self._lock:
+            docs = dict(self.docs)
+            postings = [np.array(self.postings[skill_id], dtype=np.int64) for skill_id in job_skill_ids]
+        doc_numbers = np.array(sorted(docs), dtype=np.int64)
+        if not len(doc_numbers):
+            return []
+
+        # Resume x job-skill matrix from the posting lists (stale postings fall out here)
+        matrix = np.zeros((len(doc_numbers), len(job_skill_ids)), dtype=bool)
+        for column, docs_with_skill in enumerate(postings):
+            positions = np.searchsorted(doc_numbers, docs_with_skill)
+            inside = positions < len(doc_numbers)
+            positions, docs_with_skill = positions[inside], docs_with_skill[inside]
+            matrix[positions[doc_numbers[positions] == docs_with_skill], column] = True
+
+        job_weights = weights[job_skill_ids] if job_skill_ids else np.zeros(0)
+        total_possible = float(job_weights.sum())
+        if total_possible > 0:
+            skill_match = matrix.astype(np.float64) @ job_weights * 100 / total_possible
+        else:
+            skill_match = np.zeros(len(doc_numbers))
+        experience = np.array([compatibility.get(docs[doc][1], 50) for doc in doc_numbers.tolist()], dtype=np.float64)
+        overall = skill_match * 0.7 + experience * 0.3
+
+        results = []
+        for index in np.argsort(-overall, kind='stable').tolist():
+            results.append(self._row(*docs[int(doc_numbers[index])], float(overall[index]), compatibility, job_level))
+        return results
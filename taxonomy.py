@@ -0,0 +1,161 @@
+# taxonomy.py
+"""Skill taxonomy files, precompiled matcher artifacts and hot reload.
+
+A taxonomy file is JSON with the same shape as core.DEFAULT_TAXONOMY:
+
+    {"skills": {"cloud_devops": {"weight": 1.4, "skills": ["kubernetes", ...]}, ...},
+     "aliases": {"k8s": "kubernetes", "postgres": "postgresql"},
+     "experience_indicators": {"senior": [...], "mid": [...], "junior": [...]}}
+
+Building the matcher trie for a large taxonomy is slow, so the compiled
+taxonomy is pickled next to the file (or in artifact_dir), keyed by the
+SHA-256 of the file's bytes, and later loads skip compilation. TaxonomyStore
+watches the file and swaps in a new analyzer when it changes.
+"""
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+from core import ResumeAnalyzer, SkillMatcher
+
+# Bump when SkillMatcher's layout changes so old artifacts are rebuilt
+ARTIFACT_VERSION = 1
+
+class TaxonomyError(Exception):
+    """Raised when a taxonomy file is missing or malformed"""
+
+def validate_taxonomy(taxonomy: Any) -> Dict[str, Any]:
+    """Check a parsed taxonomy's structure; returns it with an aliases map filled in"""
+    if not isinstance(taxonomy, dict):
+        raise TaxonomyError("taxonomy must be a JSON object")
+    skills = taxonomy.get('skills')
+    if not isinstance(skills, dict) or not skills:
+        raise TaxonomyError("'skills' must map categories to {'weight', 'skills'}")
+    for category, data in skills.items():
+        if not isinstance(data, dict) or not isinstance(data.get('skills'), list):
+            raise TaxonomyError(f"category '{category}' needs a 'skills' list")
+        if not all(isinstance(skill, str) for skill in data['skills']):
+            raise TaxonomyError(f"category '{category}' skills must all be strings")
+        if isinstance(data.get('weight'), bool) or not isinstance(data.get('weight'), (int, float)):
+            raise TaxonomyError(f"category '{category}' needs a numeric 'weight'")
+    aliases = taxonomy.setdefault('aliases', {})
+    if not isinstance(aliases, dict) or not all(isinstance(skill, str) for skill in aliases.values()):
+        raise TaxonomyError("'aliases' must map alias -> skill")
+    indicators = taxonomy.get('experience_indicators')
+    if not isinstance(indicators, dict) or not all(
+        isinstance(phrases, list) and all(isinstance(phrase, str) for phrase in phrases)
+        for phrases in indicators.values()
+    ):
+        raise TaxonomyError("'experience_indicators' must map levels to phrase lists")
+    return taxonomy
+
+def artifact_path(path: str, digest: str, artifact_dir: Optional[str] = None) -> str:
+    directory = artifact_dir or os.path.dirname(os.path.abspath(path))
+    name = os.path.splitext(os.path.basename(path))[0]
+    return os.path.join(directory, f"{name}.{digest[:16]}.compiled")
+
+def compile_taxonomy(path: str, artifact_dir: Optional[str] = None) -> Dict[str, Any]:
+    """Load a taxonomy file, reusing (or writing) its compiled artifact.
+
+    Returns {'digest', 'taxonomy', 'matcher'}.
+    """
+    try:
+        with open(path, 'rb') as f:
+            raw = f.read()
+    except OSError as e:
+        raise TaxonomyError(f"Cannot read taxonomy {path}: {e}")
+    digest = hashlib.sha256(raw).hexdigest()
+    compiled_path = artifact_path(path, digest, artifact_dir)
+    try:
+        with open(compiled_path, 'rb') as f:
+            compiled = pickle.load(f)
+        if compiled.get('version') == ARTIFACT_VERSION and compiled.get('digest') == digest:
+            return compiled
+    except Exception:
+        pass  # Missing, corrupt or incompatible artifacts are rebuilt and overwritten below
+
+    try:
+        taxonomy = validate_taxonomy(json.loads(raw.decode('utf-8')))
+    except ValueError as e:
+        raise TaxonomyError(f"Invalid taxonomy JSON in {path}: {e}")
+    try:
+        matcher = SkillMatcher(taxonomy['skills'], taxonomy['aliases'])
+    except Exception as e:
+        raise TaxonomyError(f"Cannot compile taxonomy {path}: {e}")
+    compiled = {
+        'version': ARTIFACT_VERSION,
+        'digest': digest,
+        'taxonomy': taxonomy,
+        'matcher': matcher
+    }
+    # Written atomically so a concurrent reader never sees half an artifact
+    directory = os.path.dirname(compiled_path)
+    try:
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        with os.fdopen(fd, 'wb') as f:
+            pickle.dump(compiled, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, compiled_path)
+    except OSError:
+        pass  # A read-only location just means compiling again next time
+    return compiled
+
+def load_analyzer(path: Optional[str] = None, llm: Optional[Callable[[str], str]] = None,
+                  artifact_dir: Optional[str] = None) -> ResumeAnalyzer:
+    """ResumeAnalyzer for a taxonomy file (the built-in taxonomy when path is None)"""
+    if not path:
+        return ResumeAnalyzer(llm=llm)
+    compiled = compile_taxonomy(path, artifact_dir)
+    return ResumeAnalyzer(llm=llm, taxonomy=compiled['taxonomy'], matcher=compiled['matcher'])
+
+class TaxonomyStore:
+    """Current analyzer for a taxonomy file, reloaded when the file changes"""
+
+    def __init__(self, path: Optional[str] = None, llm: Optional[Callable[[str], str]] = None,
+                 artifact_dir: Optional[str] = None, check_interval: float = 2.0):
+        self.path = path
+        self.llm = llm
+        self.artifact_dir = artifact_dir
+        self.check_interval = check_interval
+        self.reloads = 0
+        self.last_error = ""
+        self._lock = threading.Lock()
+        self._stat = self._file_stat()
+        self._checked = time.monotonic()
+        self._analyzer = load_analyzer(path, llm, artifact_dir)
+
+    def _file_stat(self):
+        if not self.path:
+            return None
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def current(self) -> ResumeAnalyzer:
+        """The analyzer for the latest valid version of the file.
+
+        The file is stat'ed at most every check_interval seconds. If an edited
+        file fails to load (for any reason), the previous analyzer stays in
+        use and the error is kept in last_error until the file changes again.
+        """
+        if not self.path or time.monotonic() - self._checked < self.check_interval:
+            return self._analyzer
+        with self._lock:
+            self._checked = time.monotonic()
+            stat = self._file_stat()
+            if stat is not None and stat != self._stat:
+                try:
+                    self._analyzer = load_analyzer(self.path, self.llm, self.artifact_dir)
+                    self.reloads += 1
+                    self.last_error = ""
+                except Exception as e:
+                    self.last_error = str(e)
+                self._stat = stat
+            return self._analyzer
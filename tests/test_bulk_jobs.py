@@ -0,0 +1,108 @@
+# test_bulk_jobs.py
+"""Checkpointed bulk runs: resume after an interruption without redoing work"""
+import io
+import json
+import os
+import time
+
+import pytest
+
+import cli
+from bulk_jobs import BulkJob, format_progress
+from core import SAMPLE_JOBS
+
+JOB = SAMPLE_JOBS[0]
+
+class Interrupted(Exception):
+    pass
+
+def crash_or_hang(item):
+    """analyze function for worker processes: 005.txt kills its worker, 007.txt never finishes"""
+    if item['id'].endswith("005.txt"):
+        os._exit(1)
+    if item['id'].endswith("007.txt"):
+        time.sleep(600)
+    return cli.analyze_item(item)
+
+@pytest.fixture
+def resumes(tmp_path):
+    directory = tmp_path / "resumes"
+    directory.mkdir()
+    for number in range(40):
+        (directory / f"{number:03d}.txt").write_text(
+            f"Candidate {number}: python django aws docker {'senior' if number % 2 else 'junior'} engineer"
+        )
+    (directory / "broken.pdf").write_bytes(b"not a pdf")
+    return str(directory)
+
+def test_interrupted_run_resumes_without_redoing_work(resumes, tmp_path):
+    checkpoint = str(tmp_path / "bulk.sqlite3")
+
+    def stop_after_ten(progress):
+        if progress['processed'] >= 10:
+            raise Interrupted
+
+    job = BulkJob(checkpoint, resumes, JOB, commit_every=1, timeout=None)
+    with pytest.raises(Interrupted):
+        job.run(progress=stop_after_ten, interval=0)
+    assert job.counts()['completed'] == 10
+    job.close()
+
+    resumed = BulkJob(checkpoint, resumes, JOB, timeout=None)
+    state = resumed.run()
+    assert state['resumed'] == 10
+    assert state['processed'] == 31
+    assert state['completed'] == state['total'] == 41
+    assert state['failed'] == 1
+    assert "41/41" in format_progress(state)
+
+    output = io.StringIO()
+    cli.run(resumes, JOB, output)
+    expected = [json.loads(line) for line in output.getvalue().splitlines()]
+    assert list(resumed.results()) == expected
+    resumed.close()
+
+def test_failed_items_are_skipped_unless_retried(resumes, tmp_path):
+    checkpoint = str(tmp_path / "bulk.sqlite3")
+    BulkJob(checkpoint, resumes, JOB, timeout=None).run()
+    assert BulkJob(checkpoint, resumes, JOB, timeout=None).run()['processed'] == 0
+    assert BulkJob(checkpoint, resumes, JOB, retry_failed=True, timeout=None).run()['processed'] == 1
+
+def test_changed_job_starts_a_new_run(resumes, tmp_path):
+    checkpoint = str(tmp_path / "bulk.sqlite3")
+    BulkJob(checkpoint, resumes, JOB, timeout=None).run()
+    assert BulkJob(checkpoint, resumes, SAMPLE_JOBS[1], timeout=None).run()['processed'] == 41
+
+def test_hung_and_crashing_items_are_checkpointed_as_failed(resumes, tmp_path):
+    checkpoint = str(tmp_path / "bulk.sqlite3")
+    job = BulkJob(checkpoint, resumes, JOB, workers=2, timeout=5, analyze=crash_or_hang)
+    state = job.run()
+    assert state['completed'] == 41
+    assert state['failed'] == 3
+    errors = {result['id'].rsplit("/", 1)[-1]: result['error'] for result in job.results() if 'error' in result}
+    assert errors["005.txt"] == "worker process died (e.g. out of memory)"
+    assert errors["007.txt"] == "timed out after 5s"
+    assert "broken.pdf" in errors
+    job.close()
+    assert BulkJob(checkpoint, resumes, JOB, workers=2, timeout=5, analyze=crash_or_hang).run()['processed'] == 0
+
+def test_columnar_export_is_not_duplicated_by_resuming(resumes, tmp_path):
+    from results_sink import iter_csv_rows, part_files
+    checkpoint = str(tmp_path / "bulk.sqlite3")
+    columnar = str(tmp_path / "results")
+    categories = ['core_technical', 'frameworks']
+
+    def stop_after_five(progress):
+        if progress['processed'] >= 5:
+            raise Interrupted
+
+    job = BulkJob(checkpoint, resumes, JOB, commit_every=1, timeout=None)
+    with pytest.raises(Interrupted):
+        job.run(progress=stop_after_five, interval=0)
+    assert job.export(columnar, categories, 'csv').rows_written == 5
+    resumed = BulkJob(checkpoint, resumes, JOB, timeout=None)
+    resumed.run()
+    resumed.export(columnar, categories, 'csv')
+    resumed.export(columnar, categories, 'csv')
+    assert len(part_files(columnar)) == 1
+    assert len(list(iter_csv_rows(columnar))) == 40
@@ -0,0 +1,51 @@
+# test_experience.py
+"""Experience detector: whole-word indicators, date ranges and 'N+ years' claims"""
+import pytest
+
+from core import DEFAULT_TAXONOMY, ExperienceDetector, ResumeAnalyzer, tokenize
+
+NOW = 2024.75
+
+@pytest.fixture(scope="module")
+def detector():
+    return ExperienceDetector(DEFAULT_TAXONOMY['experience_indicators'])
+
+@pytest.fixture(scope="module")
+def analyzer():
+    return ResumeAnalyzer()
+
+@pytest.mark.parametrize("text, level", [
+    ("Intern at Acme", "junior"),
+    ("Sales at an international company", "unknown"),
+    ("Lead developer", "senior"),
+    ("Showed leadership in a small team", "unknown"),
+])
+def test_indicators_match_whole_words(analyzer, text, level):
+    assert analyzer.detect_experience_level(text) == level
+
+def test_date_ranges_merge_overlaps_and_skip_education(detector):
+    tokens = tokenize(
+        "Education: BSc computer science, state university 2010 - 2014. "
+        "Experience: backend developer building payment services in python and go at Acme, Jan 2015 - Dec 2018. "
+        "Platform engineer running kubernetes clusters at Initech, 2017 - 2020."
+    )
+    assert detector.years(tokens, NOW) == pytest.approx(5.0)
+
+def test_present_counts_up_to_now(detector):
+    assert detector.years(tokenize("Developer, Jan 2020 - Present"), NOW) == pytest.approx(NOW - 2020)
+
+def test_claimed_years_set_the_level_without_a_title(analyzer):
+    assert analyzer.detect_experience_level("Developer with 7+ years of experience") == "senior"
+    assert analyzer.detect_experience_level("Developer with 4 years of experience in Python") == "mid"
+    assert analyzer.detect_experience_level("Software engineer, Jan 2012 - Jan 2020") == "senior"
+
+@pytest.mark.parametrize("text", [
+    "Senior software engineer, 2023 - 2024",
+    "Lead developer. Jan 2022 - Present",
+])
+def test_explicit_title_outweighs_years(analyzer, text):
+    assert analyzer.detect_experience_level(text) == "senior"
+
+def test_years_break_ties_between_titles(detector):
+    tokens = tokenize("Junior developer promoted to senior engineer, Jan 2012 - Jan 2020")
+    assert detector.detect(tokens) == "senior"
@@ -0,0 +1,63 @@
+# test_ingest.py
+"""Extraction pool: page-range splitting, spooled PDFs and restarts that spare other callers"""
+import tempfile
+import time
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+from ingest import IngestPool, PDF_TYPE, TXT_TYPE, extract_text
+
+def multi_page_pdf(pages: int) -> bytes:
+    fpdf = pytest.importorskip("fpdf")
+    pdf = fpdf.FPDF()
+    pdf.set_font('Helvetica', '', 11)
+    for number in range(pages):
+        pdf.add_page()
+        pdf.multi_cell(0, 6, f"Page {number}: python kubernetes terraform")
+    return bytes(pdf.output())
+
+@pytest.fixture
+def pool():
+    pool = IngestPool(workers=2, timeout=10, pages_per_task=2)
+    yield pool
+    pool.close()
+
+def test_pdf_pages_are_split_across_workers_from_one_spooled_file(pool, tmp_path, monkeypatch):
+    monkeypatch.setattr(tempfile, "tempdir", str(tmp_path))
+    data = multi_page_pdf(7)
+    text = pool.extract(data, PDF_TYPE)
+    assert text == extract_text(data, PDF_TYPE)
+    assert text.count("Page ") == 7
+    assert list(tmp_path.iterdir()) == []
+
+def test_extract_many_keeps_input_order_and_reports_errors(pool):
+    results = pool.extract_many([(multi_page_pdf(3), PDF_TYPE), (b"plain text", TXT_TYPE), (b"not a pdf", PDF_TYPE)])
+    assert results[0][0].count("Page ") == 3 and results[0][1] == ""
+    assert results[1] == ("plain text", "")
+    assert results[2][0] == "" and results[2][1]
+
+def test_restart_lets_other_callers_finish(pool):
+    stuck = pool._run(time.sleep, 600)
+    other = pool._run(time.sleep, 2)
+    pool.restart([stuck])
+    assert other.result(timeout=30) is None
+    with pytest.raises(BrokenProcessPool):
+        stuck.result(timeout=30)
+    # New work goes to a fresh pool
+    assert pool.extract(b"after restart", TXT_TYPE) == "after restart"
+    assert pool.extract(multi_page_pdf(1), PDF_TYPE).startswith("Page 0")
+
+def test_timeout_from_a_retired_pool_does_not_restart_the_new_one(pool):
+    stuck = pool._run(time.sleep, 600)
+    pool.restart([stuck])
+    executor = pool.executor
+    pool.restart([stuck])
+    assert pool.executor is executor
+
+def test_text_size_limit_applies_to_every_path():
+    pool = IngestPool(workers=1, max_text_bytes=10)
+    data = b"0123456789 more than ten bytes"
+    assert pool.extract(data, TXT_TYPE) == "0123456789"
+    assert "".join(pool.iter_pages(data, TXT_TYPE)) == "0123456789"
+    assert pool.extract_many([(data, TXT_TYPE)]) == [("0123456789", "")]
@@ -0,0 +1,178 @@
+# test_llm_client.py
+"""Circuit breaker, retries with backoff, rate limiting and coalescing, driven by llm_fake.FakeModel"""
+import threading
+import time
+
+import pytest
+
+import llm_client
+from llm_client import CircuitBreaker, GeminiClient, LLMUnavailable, TokenBucket, is_retryable
+from llm_fake import FakeModel, FakeServiceUnavailable
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    """Record backoff sleeps instead of waiting"""
+    recorded = []
+    monkeypatch.setattr(llm_client.time, "sleep", recorded.append)
+    return recorded
+
+def make_client(failures=0, latency=0.0, **kwargs):
+    model = FakeModel(failures=failures, latency=latency)
+    return GeminiClient(model_factory=lambda name: model, **kwargs), model
+
+# Circuit breaker state machine
+def test_breaker_opens_after_threshold():
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=60)
+    for _ in range(2):
+        assert breaker.allow()
+        breaker.record_failure()
+    assert breaker.state == "closed"
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert not breaker.allow()
+
+def test_breaker_success_resets_failure_count():
+    breaker = CircuitBreaker(failure_threshold=2)
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.state == "closed"
+
+def test_breaker_half_open_allows_one_trial():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.01)
+    breaker.record_failure()
+    time.sleep(0.02)
+    assert breaker.state == "half-open"
+    assert breaker.allow()
+    assert not breaker.allow()
+
+def test_breaker_trial_success_closes():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.01)
+    breaker.record_failure()
+    time.sleep(0.02)
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed"
+    assert breaker.allow()
+
+def test_breaker_trial_failure_reopens():
+    breaker = CircuitBreaker(failure_threshold=5, reset_timeout=0.05)
+    for _ in range(5):
+        breaker.record_failure()
+    time.sleep(0.06)
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert not breaker.allow()
+
+def test_breaker_release_trial_keeps_half_open():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.01)
+    breaker.record_failure()
+    time.sleep(0.02)
+    assert breaker.allow()
+    breaker.release_trial()
+    assert breaker.state == "half-open"
+    assert breaker.allow()
+
+# Retries and backoff
+def test_is_retryable():
+    assert is_retryable(FakeServiceUnavailable("503"))
+    assert is_retryable(TimeoutError())
+    assert not is_retryable(ValueError("blocked prompt"))
+
+def test_transient_errors_are_retried(sleeps):
+    client, model = make_client(failures=2, max_retries=3)
+    assert client.generate("hello").startswith("Offline AI response")
+    assert model.calls == 3
+    assert len(sleeps) == 2
+
+def test_retries_give_up_after_max_retries(sleeps):
+    client, model = make_client(failures=10, max_retries=2, breaker=CircuitBreaker(failure_threshold=100))
+    with pytest.raises(FakeServiceUnavailable):
+        client.generate("hello")
+    assert model.calls == 3
+    assert len(sleeps) == 2
+
+def test_every_request_carries_the_timeout(sleeps):
+    client, model = make_client(failures=1, timeout=12.5)
+    client.generate("blocking")
+    "".join(client.stream("streamed"))
+    assert model.request_options == [{'timeout': 12.5}] * 3
+
+def test_unstored_prompts_stay_out_of_the_response_cache(tmp_path):
+    from llm_cache import ResponseCache
+    cache = ResponseCache(str(tmp_path / "responses.sqlite3"))
+    client, model = make_client(cache=cache)
+    client.generate("explanation")
+    client.generate("cover letter quoting a resume", store=False)
+    "".join(client.stream("streamed cover letter", store=False))
+    assert cache.get(client.default_model, "explanation") is not None
+    assert cache.get(client.default_model, "cover letter quoting a resume") is None
+    assert cache.get(client.default_model, "streamed cover letter") is None
+    client.submit("cover letter quoting a resume", store=False).result()
+    assert model.calls == 4
+
+def test_non_retryable_error_is_raised_at_once(sleeps):
+    def reply(prompt):
+        raise ValueError("blocked prompt")
+    model = FakeModel(reply=reply)
+    client = GeminiClient(model_factory=lambda name: model, max_retries=3)
+    with pytest.raises(ValueError):
+        client.generate("hello")
+    assert model.calls == 1
+    assert sleeps == []
+    assert client.breaker.state == "closed"
+
+def test_backoff_is_full_jitter_with_a_cap():
+    client, _ = make_client(backoff_base=0.5, backoff_max=2.0)
+    for attempt in range(6):
+        delays = [client._backoff(attempt) for _ in range(200)]
+        cap = min(2.0, 0.5 * 2 ** attempt)
+        assert all(0 <= delay <= cap for delay in delays)
+        assert max(delays) > cap / 2
+
+def test_open_circuit_short_circuits_calls(sleeps):
+    client, model = make_client(failures=10, max_retries=5,
+                                breaker=CircuitBreaker(failure_threshold=2, reset_timeout=60))
+    with pytest.raises(LLMUnavailable):
+        client.generate("hello")
+    assert model.calls == 2
+    with pytest.raises(LLMUnavailable):
+        client.generate("another prompt")
+    assert model.calls == 2
+
+def test_abandoned_trial_stream_does_not_disable_the_client():
+    client, _ = make_client(failures=1, max_retries=0,
+                            breaker=CircuitBreaker(failure_threshold=1, reset_timeout=0.01))
+    with pytest.raises(FakeServiceUnavailable):
+        client.generate("hello")
+    time.sleep(0.02)
+    stream = client.stream("a streamed cover letter")
+    next(stream)
+    stream.close()
+    assert client.breaker.state == "closed"
+    assert client.generate("hello again")
+
+# Rate limiting and coalescing
+def test_token_bucket_allows_burst_then_refuses():
+    bucket = TokenBucket(rate_per_second=0.001, burst=3)
+    assert all(bucket.acquire(timeout=0) for _ in range(3))
+    assert not bucket.acquire(timeout=0)
+
+def test_rate_limited_call_raises_unavailable():
+    client, model = make_client(requests_per_minute=0.06, burst=1, timeout=0.01)
+    client.generate("first")
+    with pytest.raises(LLMUnavailable):
+        client.generate("second")
+    assert model.calls == 1
+
+def test_identical_concurrent_prompts_share_one_call():
+    client, model = make_client(latency=0.2)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(client.generate("same"))) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert model.calls == 1
+    assert len(set(results)) == 1 and len(results) == 5
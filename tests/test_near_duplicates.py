@@ -0,0 +1,43 @@
+# test_near_duplicates.py
+"""MinHash/LSH near-duplicate detection"""
+import random
+
+from near_duplicates import NearDuplicateIndex, lsh_shape
+
+WORDS = ("python django flask aws docker kubernetes terraform sql postgresql react typescript "
+         "machine learning pandas numpy led team built deployed designed services api").split()
+
+def resume(seed, length=300):
+    generator = random.Random(seed)
+    return " ".join(generator.choice(WORDS) for _ in range(length))
+
+def test_lsh_shape_uses_every_permutation():
+    bands, rows = lsh_shape(128, 0.9)
+    assert bands * rows == 128
+    assert (1 / bands) ** (1 / rows) <= 0.8
+
+def test_edited_copy_is_found():
+    index = NearDuplicateIndex(threshold=0.8)
+    original = resume(1)
+    assert index.find_or_add("original", original) is None
+    edited = original.replace("python", "golang", 1) + " phone 555 0100"
+    match = index.find_or_add("edited", edited)
+    assert match is not None and match[0] == "original" and match[1] >= 0.8
+
+def test_different_resume_is_not_a_duplicate():
+    index = NearDuplicateIndex(threshold=0.8)
+    index.find_or_add("first", resume(1))
+    assert index.find_or_add("second", resume(2)) is None
+    assert index.stats()['documents'] == 2
+
+def test_empty_text_is_ignored():
+    index = NearDuplicateIndex()
+    assert index.find_or_add("empty", "") is None
+    assert index.stats()['documents'] == 0
+
+def test_signatures_persist(tmp_path):
+    path = str(tmp_path / "signatures.sqlite3")
+    NearDuplicateIndex(threshold=0.8, path=path).find_or_add("original", resume(3))
+    reopened = NearDuplicateIndex(threshold=0.8, path=path)
+    match = reopened.find_or_add("copy", resume(3))
+    assert match is not None and match[0] == "original" and match[1] == 1.0
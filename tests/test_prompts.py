@@ -0,0 +1,95 @@
+# test_prompts.py
+"""Prompt excerpts: section splitting, budgeted selection and parsing the combined answer"""
+import json
+
+import pytest
+
+from core import ResumeAnalyzer
+from prompts import GAP, estimate_tokens, select_excerpts, share_budget, split_sections
+
+RESUME = "\n".join([
+    "Jane Doe - Platform Engineer",
+    "",
+    "HOBBIES",
+    "Hiking, chess and baking sourdough bread on weekends with friends and family. " * 3,
+    "",
+    "EXPERIENCE",
+    "Ran kubernetes clusters and wrote terraform modules for every team.",
+    "",
+    "VOLUNTEERING",
+    "Organised the neighbourhood book club and the local charity run every spring. " * 3,
+    "",
+    "SKILLS",
+    "Python, kubernetes, terraform, postgresql",
+])
+
+@pytest.fixture(scope="module")
+def analyzer():
+    return ResumeAnalyzer()
+
+def relevant_ids(analyzer, *skills):
+    return [analyzer.skill_lookup[key] for key in analyzer.skill_lookup if key[1] in skills]
+
+def excerpt(analyzer, text, budget, *skills):
+    return select_excerpts(text, analyzer.matcher, analyzer.skill_weights, relevant_ids(analyzer, *skills), budget)
+
+def test_split_sections_keeps_headings_with_their_body():
+    sections = split_sections("Skills:\nPython\n\nEXPERIENCE\nAcme   engineer\nBuilt things")
+    assert sections == ["Skills:\nPython", "EXPERIENCE\nAcme engineer\nBuilt things"]
+    assert split_sections("EDUCATION\n\nBSc physics\n\nAwards") == ["EDUCATION\nBSc physics", "Awards"]
+
+def test_split_sections_breaks_long_sections_at_sentences():
+    text = " ".join(f"Sentence number {n} is here." for n in range(40))
+    sections = split_sections(text, max_tokens=20)
+    assert len(sections) > 1
+    assert all(estimate_tokens(section) <= 20 for section in sections)
+    assert all(section.endswith(".") for section in sections)
+
+def test_short_text_is_kept_whole(analyzer):
+    assert excerpt(analyzer, RESUME, 10_000, "kubernetes") == "\n".join(split_sections(RESUME))
+
+def test_excerpt_fits_the_budget(analyzer):
+    for budget in (20, 40, 60):
+        assert estimate_tokens(excerpt(analyzer, RESUME, budget, "kubernetes", "terraform")) <= budget
+
+def test_relevant_sections_win_in_document_order(analyzer):
+    text = excerpt(analyzer, RESUME, 60, "kubernetes", "terraform")
+    assert text.startswith("Jane Doe - Platform Engineer")
+    assert text.index("EXPERIENCE") < text.index("SKILLS")
+    assert "HOBBIES" not in text and "VOLUNTEERING" not in text
+    assert GAP in text
+
+def test_no_budget_gives_no_excerpt(analyzer):
+    assert excerpt(analyzer, RESUME, 0, "kubernetes") == ""
+
+def test_share_budget_splits_by_share():
+    assert share_budget(100, ["x" * 1000, "y" * 1000], [0.6, 0.4]) == [60, 40]
+
+def test_share_budget_hands_unused_budget_on():
+    assert share_budget(100, ["x" * 40, "y" * 1000], [0.6, 0.4]) == [10, 90]
+    assert share_budget(100, ["", "y" * 1000], [0.6, 0.4]) == [0, 100]
+    assert share_budget(100, ["x" * 40, "y" * 40], [0.6, 0.4]) == [10, 10]
+
+def test_parse_ai_sections_reads_the_json_object():
+    response = "Sure! ```json\n" + json.dumps({"explanation": " Good fit. ", "recommendation": "- Learn Go"}) + "\n```"
+    assert ResumeAnalyzer.parse_ai_sections(response) == {"explanation": "Good fit.", "recommendation": "- Learn Go"}
+
+def test_parse_ai_sections_drops_missing_and_blank_fields():
+    response = json.dumps({"explanation": "Good fit.", "recommendation": "  ", "cover_letter": 3})
+    assert ResumeAnalyzer.parse_ai_sections(response) == {"explanation": "Good fit."}
+
+@pytest.mark.parametrize("response", ["Gemini is unavailable", '{"explanation": "Good', "[1, 2]", ""])
+def test_parse_ai_sections_rejects_non_json(response):
+    with pytest.raises(ValueError):
+        ResumeAnalyzer.parse_ai_sections(response)
+
+@pytest.mark.parametrize("response", ["not json", json.dumps({"explanation": "Good fit."})])
+def test_generate_ai_sections_falls_back_per_section(response):
+    analyzer = ResumeAnalyzer(llm=lambda prompt: response)
+    analysis = analyzer.get_empty_analysis()
+    sections = analyzer.generate_ai_sections(analysis, fields=("explanation", "recommendation"))
+    expected = "Good fit." if response.startswith("{") else analyzer.rule_based_explanation(analysis)
+    assert sections == {
+        "explanation": expected,
+        "recommendation": analyzer.rule_based_recommendation(analysis),
+    }
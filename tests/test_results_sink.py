@@ -0,0 +1,56 @@
+# test_results_sink.py
+"""Columnar results: batched writes, memory-mapped reads and skill gap counts"""
+import pytest
+
+from results_sink import ResultsSink, iter_csv_rows, part_files, read_results, skill_gap_frequencies
+
+CATEGORIES = ['core_technical', 'cloud_devops']
+
+def result(number, job_title="Data Engineer"):
+    return {
+        'id': f"resume-{number}",
+        'job_title': job_title,
+        'overall_capability': 50.0 + number,
+        'skill_match': 40.0,
+        'experience_compatibility': 80.0,
+        'resume_experience_level': 'mid',
+        'job_level': 'senior',
+        'matching_skills': {'core_technical': ['python']},
+        'missing_skills': {'core_technical': ['sql'], 'cloud_devops': ['aws'] if number % 2 else []}
+    }
+
+@pytest.mark.parametrize("format", ["parquet", "arrow"])
+def test_arrow_formats_round_trip(tmp_path, format):
+    pytest.importorskip("pyarrow")
+    directory = str(tmp_path)
+    with ResultsSink(directory, CATEGORIES, format, batch_size=3) as sink:
+        sink.write([result(number) for number in range(10)] + [{'id': 'failed', 'error': 'no text extracted'}])
+    assert sink.rows_written == 10
+    table = read_results(directory, ['resume_id', 'overall_capability', 'missing_cloud_devops'])
+    assert table.num_rows == 10
+    assert table.column('missing_cloud_devops').to_pylist()[:2] == [[], ['aws']]
+    assert skill_gap_frequencies(directory) == {'Data Engineer': {'sql': 10, 'aws': 5}}
+
+def test_csv_round_trip(tmp_path):
+    directory = str(tmp_path)
+    with ResultsSink(directory, CATEGORIES, 'csv') as sink:
+        sink.write(result(number, "Analyst") for number in range(4))
+    rows = list(iter_csv_rows(directory))
+    assert len(rows) == 4 and rows[1]['missing_cloud_devops'] == ['aws']
+    assert skill_gap_frequencies(directory, "Analyst") == {'Analyst': {'sql': 4, 'aws': 2}}
+
+def test_nothing_is_published_until_close(tmp_path):
+    directory = str(tmp_path)
+    sink = ResultsSink(directory, CATEGORIES, 'csv', batch_size=1)
+    sink.write([result(1)])
+    assert part_files(directory) == []
+    sink.close()
+    assert len(part_files(directory)) == 1
+
+def test_empty_sink_publishes_nothing(tmp_path):
+    ResultsSink(str(tmp_path), CATEGORIES, 'csv').close()
+    assert part_files(str(tmp_path)) == []
+
+def test_unknown_format_is_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        ResultsSink(str(tmp_path), CATEGORIES, 'xlsx')
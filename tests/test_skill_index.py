@@ -0,0 +1,64 @@
+# test_skill_index.py
+"""WAND top-k search against exhaustive rescoring"""
+import random
+
+import pytest
+
+from core import SAMPLE_JOBS, ResumeAnalyzer
+from skill_index import SkillIndex
+
+@pytest.fixture(scope="module")
+def analyzer():
+    return ResumeAnalyzer()
+
+@pytest.fixture(scope="module")
+def pool(analyzer):
+    generator = random.Random(7)
+    skills = [skill for _, skill in analyzer.matcher.skills]
+    index = SkillIndex(analyzer)
+    for number in range(300):
+        text = " ".join(generator.sample(skills, generator.randint(1, 12)))
+        text += " " + generator.choice(["senior engineer", "junior developer", "mid-level", ""])
+        index.add(f"resume-{number}", *analyzer.text_profile(text))
+    return index
+
+@pytest.mark.parametrize("job", SAMPLE_JOBS, ids=[job['title'] for job in SAMPLE_JOBS])
+def test_search_matches_exhaustive_rescore(analyzer, pool, job):
+    profile = analyzer.compile_job_profile(job['description'], job['title'])
+    expected = [row for row in pool.rescore(profile) if row['skill_match'] > 0][:10]
+    found = pool.search(profile, k=10)
+    assert [row['overall_capability'] for row in found] == [row['overall_capability'] for row in expected]
+
+def test_search_scores_like_single_analysis(analyzer):
+    index = SkillIndex(analyzer)
+    text = "Senior engineer: python, django, aws, docker and postgresql"
+    index.add("only", *analyzer.text_profile(text))
+    job = SAMPLE_JOBS[0]
+    analysis = analyzer.analyze_resume_job_match(text, job['description'], job['title'])
+    [row] = index.search(analyzer.compile_job_profile(job['description'], job['title']), k=5)
+    assert row['overall_capability'] == pytest.approx(analysis['overall_capability'], abs=0.1)
+
+def test_persisted_pool_reloads(analyzer, tmp_path):
+    path = str(tmp_path / "pool.sqlite3")
+    SkillIndex(analyzer, path).add("saved", *analyzer.text_profile("python django aws"))
+    assert len(SkillIndex(analyzer, path)) == 1
+
+def test_same_named_resumes_are_kept_apart(analyzer, tmp_path):
+    path = str(tmp_path / "pool.sqlite3")
+    index = SkillIndex(analyzer, path)
+    index.add("key-a", *analyzer.text_profile("python django aws"), name="resume.pdf")
+    index.add("key-b", *analyzer.text_profile("java spring"), name="resume.pdf")
+    job = SAMPLE_JOBS[0]
+    rows = SkillIndex(analyzer, path).rescore(analyzer.compile_job_profile(job['description'], job['title']))
+    assert sorted((row['resume_id'], row['name']) for row in rows) == [("key-a", "resume.pdf"), ("key-b", "resume.pdf")]
+
+def test_pool_without_names_is_migrated(analyzer, tmp_path):
+    import sqlite3
+    path = str(tmp_path / "pool.sqlite3")
+    with sqlite3.connect(path) as db:
+        db.execute("CREATE TABLE resumes (doc INTEGER PRIMARY KEY, resume_id TEXT UNIQUE NOT NULL, "
+                   "experience_level TEXT NOT NULL, skills TEXT NOT NULL)")
+        db.execute("INSERT INTO resumes VALUES (0, 'old.pdf', 'mid', '[]')")
+    index = SkillIndex(analyzer, path)
+    index.add("new-key", *analyzer.text_profile("python"), name="new.pdf")
+    assert {name for _, _, name in SkillIndex(analyzer, path).docs.values()} == {"old.pdf", "new.pdf"}
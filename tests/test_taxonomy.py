@@ -0,0 +1,88 @@
+# test_taxonomy.py
+"""Taxonomy files: validation, aliases, compiled artifacts and hot reload"""
+import json
+import os
+
+import pytest
+
+import taxonomy
+from taxonomy import TaxonomyError, TaxonomyStore, compile_taxonomy, load_analyzer, validate_taxonomy
+
+def sample(skills=("kubernetes", "terraform"), aliases=None):
+    return {
+        "skills": {"cloud_devops": {"weight": 1.4, "skills": list(skills)}},
+        "aliases": aliases if aliases is not None else {"k8s": "kubernetes"},
+        "experience_indicators": {"senior": ["senior", "5+ years"], "junior": ["junior"]},
+    }
+
+def write(path, data):
+    path.write_text(json.dumps(data))
+    return str(path)
+
+def compiled_files(directory):
+    return [name for name in os.listdir(directory) if name.endswith(".compiled")]
+
+@pytest.mark.parametrize("data", [
+    [],
+    {"skills": {}},
+    {"skills": {"cloud": {"weight": 1.0}}, "experience_indicators": {}},
+    {"skills": {"cloud": {"weight": 1.0, "skills": ["go", 3]}}, "experience_indicators": {}},
+    {"skills": {"cloud": {"weight": True, "skills": ["go"]}}, "experience_indicators": {}},
+    {"skills": {"cloud": {"weight": 1.0, "skills": ["go"]}}, "aliases": {"golang": 1}, "experience_indicators": {}},
+    {"skills": {"cloud": {"weight": 1.0, "skills": ["go"]}}, "experience_indicators": {"senior": "lead"}},
+])
+def test_validate_rejects_malformed_taxonomies(data):
+    with pytest.raises(TaxonomyError):
+        validate_taxonomy(data)
+
+def test_validate_fills_in_aliases():
+    data = sample()
+    del data["aliases"]
+    assert validate_taxonomy(data)["aliases"] == {}
+
+def test_aliases_resolve_to_their_skill(tmp_path):
+    analyzer = load_analyzer(write(tmp_path / "tax.json", sample()))
+    assert analyzer.extract_skills("Ran k8s clusters")["cloud_devops"]["skills"] == ["kubernetes"]
+
+def test_artifact_is_reused_until_the_file_changes(tmp_path, monkeypatch):
+    path = write(tmp_path / "tax.json", sample())
+    first = compile_taxonomy(path)
+    assert len(compiled_files(tmp_path)) == 1
+
+    def fail(*args, **kwargs):
+        raise AssertionError("recompiled an unchanged taxonomy")
+    with monkeypatch.context() as m:
+        m.setattr(taxonomy, "SkillMatcher", fail)
+        assert compile_taxonomy(path)["digest"] == first["digest"]
+
+    write(tmp_path / "tax.json", sample(skills=("ansible",)))
+    second = compile_taxonomy(path)
+    assert second["digest"] != first["digest"]
+    assert second["taxonomy"]["skills"]["cloud_devops"]["skills"] == ["ansible"]
+
+# Empty, garbage, not a dict, and a class from a module that no longer exists
+@pytest.mark.parametrize("artifact", [b"", b"not a pickle", b"\x80\x05K\x01.", b"cno_such_module\nMatcher\n."])
+def test_unusable_artifact_is_rebuilt_and_overwritten(tmp_path, artifact):
+    path = write(tmp_path / "tax.json", sample())
+    compile_taxonomy(path)
+    compiled_path = os.path.join(tmp_path, compiled_files(tmp_path)[0])
+    with open(compiled_path, "wb") as f:
+        f.write(artifact)
+    assert compile_taxonomy(path)["taxonomy"]["aliases"] == {"k8s": "kubernetes"}
+    with open(compiled_path, "rb") as f:
+        assert f.read() != artifact
+
+def test_store_keeps_last_good_analyzer(tmp_path):
+    path = write(tmp_path / "tax.json", sample())
+    store = TaxonomyStore(path, check_interval=0)
+    good = store.current()
+
+    (tmp_path / "tax.json").write_text("{not json")
+    assert store.current() is good
+    assert store.last_error and store.reloads == 0
+
+    write(tmp_path / "tax.json", sample(skills=("kubernetes", "terraform", "ansible")))
+    reloaded = store.current()
+    assert reloaded is not good
+    assert store.last_error == "" and store.reloads == 1
+    assert "ansible" in reloaded.extract_skills("ansible playbooks")["cloud_devops"]["skills"]